@@ -1,10 +1,13 @@
 # app.py
 import streamlit as st
-import firebase_admin
-from firebase_admin import credentials, firestore
-import hashlib
 from datetime import datetime
 
+from core.bootstrap import medir, mostrar_perfil, repositorios
+from core.credenciales import verificar_login
+from core.instrumentacion import pagina, panel_instrumentacion
+from core.limites import ip_cliente, limitador_compartido
+from core.render import inyectar_css
+
 # =================================================================
 # === 1. CONFIGURACIÓN DE PÁGINA Y OCULTAMIENTO DE SIDEBAR ========
 # =================================================================
@@ -14,10 +17,10 @@ st.set_page_config(
     page_icon="⛽",
     layout="centered"
 )
+pagina("login")
 
 # CSS para ocultar sidebar y personalizar estilos de firma
-st.markdown("""
-    <style>
+inyectar_css("""
         section[data-testid="stSidebar"] { display: none !important; }
         button[data-testid="stSidebarToggle"] { display: none !important; }
         div[data-testid="stAppViewContainer"] { margin-left: 0 !important; padding-left: 0 !important; }
@@ -31,8 +34,7 @@ st.markdown("""
             border-bottom: 2px solid #eeeeee;
             padding-bottom: 10px;
         }
-    </style>
-""", unsafe_allow_html=True)
+""")
 
 # Firma del autor arriba del todo [cite: 13, 14]
 st.markdown('<div class="firma-autor">Hecho Nilser Cesar Tuero Mayta - Senati</div>', unsafe_allow_html=True)
@@ -47,30 +49,11 @@ for key, value in {
         st.session_state[key] = value
 
 # =================================================================
-# === 2. FIREBASE & HASH ===========================================
+# === 2. FIREBASE (INICIALIZACIÓN DIFERIDA) ========================
 # =================================================================
 
-def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
-
-if not firebase_admin._apps:
-    try:
-        cred_source = st.secrets["firebase"]
-        cred_dict = dict(cred_source)
-        if "private_key" in cred_dict:
-            cred_dict["private_key"] = cred_dict["private_key"].replace("\\n", "\n")
-        cred = credentials.Certificate(cred_dict)
-        PROJECT_ID = "streamlit-1320265"  
-        firebase_admin.initialize_app(cred, {
-            "projectId": PROJECT_ID,
-            "databaseURL": f"https://{PROJECT_ID}.firebaseio.com"
-        })
-    except Exception as e:
-        st.error(f"Error al conectar Firebase: {e}")
-        st.stop()
-
-db = firestore.client()
-employees_ref = db.collection("employees")
+# Firebase se inicializa en el primer acceso a datos (core/bootstrap.py),
+# así el formulario de login se dibuja sin esperar a firebase_admin.
 
 # =================================================================
 # === 3. FUNCIONES DE AUTENTICACIÓN ================================
@@ -78,19 +61,17 @@ employees_ref = db.collection("employees")
 
 def authenticate_user(dni, password):
     try:
-        doc = employees_ref.document(dni).get()
-        if not doc.exists:
-            return False, "❌ Usuario no encontrado."
-        user = doc.to_dict()
-        if hash_password(password) != user.get("password_hash"):
-            return False, "❌ Contraseña incorrecta."
-        if not user.get("is_active", False):
-            return False, "❌ Cuenta inactiva."
-        
+        # El limitador rechaza ráfagas y DNIs desconocidos antes de leer Firestore
+        cliente = ip_cliente(st.context.ip_address, st.context.headers.get("X-Forwarded-For"))
+        ok, msg, user = verificar_login(repositorios().empleados, dni, password,
+                                        limitador=limitador_compartido(), cliente=cliente)
+        if not ok:
+            return False, msg
+
         st.session_state.is_authenticated = True
         st.session_state.user_role = user.get("role")
         st.session_state.user_uid = dni
-        return True, f"Bienvenido, {user.get('name')}"
+        return True, msg
     except Exception as e:
         return False, f"Error inesperado: {e}"
 
@@ -123,7 +104,8 @@ else:
         btn = st.form_submit_button("Iniciar Sesión")
 
         if btn:
-            ok, msg = authenticate_user(dni, password)
+            with medir("app: authenticate_user"):
+                ok, msg = authenticate_user(dni, password)
             if ok:
                 st.success(msg)
                 st.rerun()
@@ -138,3 +120,6 @@ else:
             st.switch_page("pages/PRUEBA_DE_LA_APP.py")
         except Exception as e:
             st.error("Asegúrate de que el archivo existe en 'pages/PRUEBA_DE_LA_APP.py'")
+
+    mostrar_perfil()
+    panel_instrumentacion()
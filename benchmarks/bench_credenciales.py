@@ -0,0 +1,94 @@
+# benchmarks/bench_credenciales.py
+"""Benchmark de login según el costo del KDF.
+
+Uso (desde la raíz del proyecto)::
+
+    python -m benchmarks.bench_credenciales
+    python -m benchmarks.bench_credenciales --logins 200 --concurrencia 8
+
+Para cada configuración (PBKDF2 con distintas iteraciones, scrypt con
+distintos ``n``) reporta la latencia p50/p99 de un login y el throughput
+(logins/s) con varios usuarios a la vez, sin caché y con el caché de
+registros de autenticación.
+"""
+import argparse
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.bench_repositorio import percentil
+from core.credenciales import CacheRegistrosAuth, ParametrosKDF, hash_password, verificar_login
+from core.repositorio import crear_repositorios
+
+CONFIGURACIONES = [
+    ParametrosKDF("pbkdf2_sha256", iteraciones=100_000),
+    ParametrosKDF("pbkdf2_sha256", iteraciones=310_000),
+    ParametrosKDF("pbkdf2_sha256", iteraciones=600_000),
+    ParametrosKDF("scrypt", n=2 ** 14),
+    ParametrosKDF("scrypt", n=2 ** 15),
+]
+
+
+def describir(parametros):
+    if parametros.esquema == "pbkdf2_sha256":
+        return f"pbkdf2 {parametros.iteraciones:,} it"
+    return f"scrypt n=2^{parametros.n.bit_length() - 1}"
+
+
+def medir(parametros, n_logins, concurrencia, n_empleados=5):
+    repos = crear_repositorios("sqlite")
+    password_hash = hash_password("clave", parametros)
+    dnis = [f"{20000000 + i}" for i in range(n_empleados)]
+    for dni in dnis:
+        repos.empleados.guardar(dni, {"name": dni, "is_active": True, "password_hash": password_hash})
+
+    resultados = {"config": describir(parametros)}
+    for etiqueta, cache in (("sin_cache", None), ("con_cache", CacheRegistrosAuth())):
+        repos.reiniciar_contadores()
+
+        def login(i):
+            t0 = time.perf_counter()
+            ok, _, _ = verificar_login(repos.empleados, dnis[i % n_empleados], "clave",
+                                       cache=cache, parametros=parametros)
+            assert ok
+            return (time.perf_counter() - t0) * 1000
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+            tiempos = list(pool.map(login, range(n_logins)))
+        total = time.perf_counter() - inicio
+        resultados[etiqueta] = {
+            "p50_ms": round(statistics.median(tiempos), 2),
+            "p99_ms": round(percentil(tiempos, 99), 2),
+            "logins_por_s": round(n_logins / total, 1),
+            "lecturas": repos.empleados.lecturas,
+        }
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--concurrencia", type=int, default=4)
+    parser.add_argument("--json", help="Guarda los resultados en este archivo")
+    args = parser.parse_args(argv)
+
+    resultados = [medir(p, args.logins, args.concurrencia) for p in CONFIGURACIONES]
+
+    print(f"{args.logins} logins, {args.concurrencia} concurrentes")
+    print(f"{'configuración':<22}{'p50 ms':>9}{'p99 ms':>9}{'login/s':>9}{'lecturas':>10}"
+          f"{'p50 caché':>11}{'lecturas caché':>16}")
+    for r in resultados:
+        s, c = r["sin_cache"], r["con_cache"]
+        print(f"{r['config']:<22}{s['p50_ms']:>9.1f}{s['p99_ms']:>9.1f}{s['logins_por_s']:>9.1f}{s['lecturas']:>10}"
+              f"{c['p50_ms']:>11.1f}{c['lecturas']:>16}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2)
+    return resultados
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# benchmarks/bench_esquema.py
+"""Benchmark de memoria de las tablas de Reportes: bytes por bomba-día antes y después del esquema compacto.
+
+Uso (desde la raíz del proyecto)::
+
+    python -m benchmarks.bench_esquema
+    python -m benchmarks.bench_esquema --dias 730 --bombas 22 --anios 5 --estaciones 10 --json esquema.json
+
+Compara ``df_bombas`` con los tipos anteriores (``Fecha`` como objetos
+``date``, ``Bomba`` como texto, montos ``float64``) contra los tipos de
+``core/esquema.py``, en memoria y tras pasar por el almacén Parquet, y
+proyecta cuánta memoria ocupa el historial de varios años y estaciones.
+"""
+import argparse
+import json
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pyarrow as pa
+
+from core.almacen import AlmacenVentas
+from core.esquema import bytes_por_fila
+from core.historico import generar_historico
+
+
+def tipos_anteriores(df):
+    """``df_bombas`` como lo dejaban el generador y el almacén antes del esquema."""
+    return df.assign(Fecha=df["Fecha"].dt.date.astype(object), Bomba=df["Bomba"].astype(object),
+                     **{"Venta Soles": df["Venta Soles"].astype(np.float64)})
+
+
+def medir_lectura(almacen, desde, hasta, repeticiones=5):
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        df = almacen.leer("bombas", desde, hasta)
+        tiempos.append((time.perf_counter() - t0) * 1000)
+    return df, float(np.median(tiempos))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dias", type=int, default=365, help="Días de historial generados")
+    parser.add_argument("--bombas", type=int, default=22)
+    parser.add_argument("--anios", type=int, default=5, help="Años de la proyección")
+    parser.add_argument("--estaciones", type=int, default=10, help="Estaciones de la proyección")
+    parser.add_argument("--json", help="Guarda los resultados en este archivo")
+    args = parser.parse_args(argv)
+
+    inicio = date(2025, 1, 1)
+    fin = inicio + timedelta(days=args.dias - 1)
+    _, compacto = generar_historico(inicio, fin, n_bombas=args.bombas, seed=0)
+    anterior = tipos_anteriores(compacto)
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        almacen = AlmacenVentas(carpeta)
+        almacen.guardar("bombas", compacto)
+        leido, ms_mes = medir_lectura(almacen, inicio, inicio + timedelta(days=30))
+        # Lo que devolvía el almacén antes: to_pandas() sin esquema (fechas como objetos)
+        sin_esquema = pa.Table.from_pandas(anterior, preserve_index=False).to_pandas()
+        bytes_disco = sum(p.stat().st_size for p in almacen.raiz.rglob("*.parquet"))
+
+    filas = len(compacto)
+    resultados = {
+        "filas": filas,
+        "bytes_por_bomba_dia": {
+            "antes (generador)": round(bytes_por_fila(anterior), 1),
+            "antes (leído del almacén)": round(bytes_por_fila(sin_esquema), 1),
+            "compacto": round(bytes_por_fila(compacto), 1),
+            "compacto (leído del almacén)": round(bytes_por_fila(leido), 1),
+            "parquet en disco": round(bytes_disco / filas, 1),
+        },
+        "tipos_compactos": {c: str(t) for c, t in compacto.dtypes.items()},
+        "lectura_un_mes_ms": round(ms_mes, 2),
+    }
+    bomba_dias = args.anios * 365 * args.estaciones * args.bombas
+    resultados["proyeccion"] = {
+        "anios": args.anios, "estaciones": args.estaciones, "bomba_dias": bomba_dias,
+        "mb_antes": round(bomba_dias * resultados["bytes_por_bomba_dia"]["antes (generador)"] / 2**20, 1),
+        "mb_compacto": round(bomba_dias * resultados["bytes_por_bomba_dia"]["compacto"] / 2**20, 1),
+    }
+
+    print(f"df_bombas: {filas:,} filas ({args.dias} días x {args.bombas} bombas)")
+    print(f"{'representación':<32}{'bytes/bomba-día':>18}")
+    for nombre, valor in resultados["bytes_por_bomba_dia"].items():
+        print(f"{nombre:<32}{valor:>18.1f}")
+    print("tipos:", ", ".join(f"{c}={t}" for c, t in resultados["tipos_compactos"].items()))
+    print(f"lectura de un mes del almacén: {ms_mes:.2f} ms")
+    p = resultados["proyeccion"]
+    print(f"proyección {p['anios']} años x {p['estaciones']} estaciones ({p['bomba_dias']:,} bomba-días): "
+          f"{p['mb_antes']:,.1f} MB antes -> {p['mb_compacto']:,.1f} MB compacto")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+    return resultados
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# benchmarks/bench_repositorio.py
+"""Benchmark de latencia y lecturas por operación de la capa de repositorios.
+
+Uso (desde la raíz del proyecto)::
+
+    python -m benchmarks.bench_repositorio                       # SQLite en memoria
+    python -m benchmarks.bench_repositorio --empleados 5000 --repeticiones 500
+    FIRESTORE_EMULATOR_HOST=localhost:8080 python -m benchmarks.bench_repositorio --backend firestore
+
+Reporta p50/p99 (ms) y documentos leídos por operación: login, historial de
+precios y lista de empleados.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from core.credenciales import ParametrosKDF, hash_password, verificar_login
+from core.repositorio import crear_repositorios
+
+PRODUCTOS = ["90", "95", "DL"]
+# KDF barato: aquí se mide el acceso a datos, no el hash (ver bench_credenciales)
+KDF_BENCH = ParametrosKDF(iteraciones=1_000)
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    if not ordenados:
+        return 0.0
+    k = (len(ordenados) - 1) * p / 100
+    i = int(k)
+    j = min(i + 1, len(ordenados) - 1)
+    return ordenados[i] + (ordenados[j] - ordenados[i]) * (k - i)
+
+
+def poblar(repos, n_empleados, n_precios, seed=0):
+    rng = random.Random(seed)
+    password_hash = hash_password("clave", KDF_BENCH)
+    for i in range(n_empleados):
+        repos.empleados.guardar(f"{10000000 + i}", {
+            "name": f"EMP{i}", "last_name": "PRUEBA", "role": "Grifero",
+            "is_active": rng.random() > 0.1, "password_hash": password_hash,
+        })
+    inicio = datetime(2025, 1, 1)
+    for i in range(n_precios):
+        repos.precios.registrar({
+            "product_id": rng.choice(PRODUCTOS),
+            "price_per_gallon": round(rng.uniform(13, 17), 3),
+            "valid_from": inicio + timedelta(days=i),
+        })
+
+
+def medir(nombre, repos, operacion, repeticiones):
+    tiempos = []
+    repos.reiniciar_contadores()
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        operacion()
+        tiempos.append((time.perf_counter() - t0) * 1000)
+    lecturas = sum(repos.lecturas().values())
+    return {
+        "operacion": nombre,
+        "repeticiones": repeticiones,
+        "p50_ms": round(statistics.median(tiempos), 4),
+        "p99_ms": round(percentil(tiempos, 99), 4),
+        "lecturas_por_op": round(lecturas / repeticiones, 2),
+    }
+
+
+def crear_backend(backend):
+    if backend == "sqlite":
+        return crear_repositorios("sqlite")
+    if not os.environ.get("FIRESTORE_EMULATOR_HOST"):
+        raise SystemExit("Para --backend firestore define FIRESTORE_EMULATOR_HOST (emulador de Firestore).")
+    from google.cloud import firestore as gfirestore
+
+    return crear_repositorios("firestore", db=gfirestore.Client(project="bench-grifo"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=["sqlite", "firestore"], default="sqlite")
+    parser.add_argument("--empleados", type=int, default=1000)
+    parser.add_argument("--precios", type=int, default=300)
+    parser.add_argument("--repeticiones", type=int, default=200)
+    parser.add_argument("--json", help="Guarda los resultados en este archivo")
+    args = parser.parse_args(argv)
+
+    repos = crear_backend(args.backend)
+    poblar(repos, args.empleados, args.precios)
+    dnis = [f"{10000000 + i}" for i in range(args.empleados)]
+    rng = random.Random(1)
+
+    operaciones = {
+        "login": lambda: verificar_login(repos.empleados, rng.choice(dnis), "clave", cache=None, parametros=KDF_BENCH),
+        "historial_precios": lambda: repos.precios.historial(),
+        "lista_empleados": lambda: list(repos.empleados.listar_activos(campos=("name", "last_name"))),
+    }
+    resultados = [medir(nombre, repos, op, args.repeticiones) for nombre, op in operaciones.items()]
+
+    print(f"Backend: {args.backend} | empleados={args.empleados} precios={args.precios}")
+    print(f"{'operación':<20}{'p50 ms':>10}{'p99 ms':>10}{'lecturas/op':>14}")
+    for r in resultados:
+        print(f"{r['operacion']:<20}{r['p50_ms']:>10.3f}{r['p99_ms']:>10.3f}{r['lecturas_por_op']:>14.1f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"backend": args.backend, "resultados": resultados}, f, indent=2)
+    return resultados
+
+
+if __name__ == "__main__":
+    main()
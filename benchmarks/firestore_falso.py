@@ -0,0 +1,260 @@
+# benchmarks/firestore_falso.py
+"""Firestore en memoria para las pruebas de carga (``bench_sesiones``).
+
+Cubre solo lo que usa la app: colecciones y subcolecciones, ``document``,
+``add``, ``set``/``update``/``delete``, consultas con ``where``,
+``order_by`` (también por ``__name__``), ``limit``, ``start_after`` y
+``select``, lotes (``batch``) y ``get_all``. ``on_snapshot`` no está
+disponible, así que ``CacheColeccion`` usa polling como con el emulador.
+
+Cuenta documentos leídos y escritos, y puede simular la latencia de red
+de cada llamada (``latencia``, en segundos).
+"""
+import copy
+import itertools
+import threading
+import time
+from datetime import datetime, timezone
+
+from firebase_admin import firestore
+
+ID_DOCUMENTO = "__name__"
+
+OPERADORES = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a is not None and a < b,
+    "<=": lambda a, b: a is not None and a <= b,
+    ">": lambda a, b: a is not None and a > b,
+    ">=": lambda a, b: a is not None and a >= b,
+    "in": lambda a, b: a in b,
+    "array_contains": lambda a, b: isinstance(a, list) and b in a,
+}
+
+
+def _resolver_centinelas(datos):
+    """``SERVER_TIMESTAMP`` pasa a la hora actual, como lo guarda Firestore."""
+    ahora = datetime.now(timezone.utc)
+    return {k: (ahora if v is firestore.SERVER_TIMESTAMP else v) for k, v in datos.items()}
+
+
+class Snapshot:
+    def __init__(self, referencia, datos):
+        self.reference = referencia
+        self.id = referencia.id
+        self.exists = datos is not None
+        self._datos = datos
+
+    def to_dict(self):
+        return copy.deepcopy(self._datos) if self._datos is not None else None
+
+    def get(self, campo):
+        return (self._datos or {}).get(campo)
+
+
+class ReferenciaDocumento:
+    def __init__(self, db, ruta_coleccion, doc_id):
+        self._db = db
+        self._coleccion = ruta_coleccion
+        self.id = doc_id
+        self.path = f"{ruta_coleccion}/{doc_id}"
+
+    def _leer(self):
+        return self._db._docs(self._coleccion).get(self.id)
+
+    def get(self, field_paths=None):
+        self._db._rpc(lecturas=1)
+        with self._db._lock:
+            datos = self._leer()
+            if datos is not None and field_paths is not None:
+                datos = {k: v for k, v in datos.items() if k in field_paths}
+            return Snapshot(self, copy.deepcopy(datos))
+
+    def _set(self, datos, merge=False):
+        datos = _resolver_centinelas(copy.deepcopy(datos))
+        docs = self._db._docs(self._coleccion)
+        if merge and self.id in docs:
+            docs[self.id].update(datos)
+        else:
+            docs[self.id] = datos
+
+    def _update(self, datos):
+        docs = self._db._docs(self._coleccion)
+        if self.id not in docs:
+            raise KeyError(f"No existe el documento {self.path}")
+        docs[self.id].update(_resolver_centinelas(copy.deepcopy(datos)))
+
+    def set(self, datos, merge=False):
+        self._db._rpc(escrituras=1)
+        with self._db._lock:
+            self._set(datos, merge)
+
+    def update(self, datos):
+        self._db._rpc(escrituras=1)
+        with self._db._lock:
+            self._update(datos)
+
+    def delete(self):
+        self._db._rpc(escrituras=1)
+        with self._db._lock:
+            self._db._docs(self._coleccion).pop(self.id, None)
+
+    def collection(self, nombre):
+        return ReferenciaColeccion(self._db, f"{self.path}/{nombre}")
+
+
+class Consulta:
+    def __init__(self, db, ruta, filtros=(), orden=None, limite=None, campos=None, despues_de=None):
+        self._db = db
+        self._ruta = ruta
+        self._filtros = tuple(filtros)
+        self._orden = orden
+        self._limite = limite
+        self._campos = campos
+        self._despues_de = despues_de
+
+    def _copiar(self, **cambios):
+        actual = dict(filtros=self._filtros, orden=self._orden, limite=self._limite,
+                      campos=self._campos, despues_de=self._despues_de)
+        return Consulta(self._db, self._ruta, **{**actual, **cambios})
+
+    def where(self, campo=None, op=None, valor=None, filter=None):
+        if filter is not None:
+            campo, op, valor = filter.field_path, filter.op_string, filter.value
+        return self._copiar(filtros=(*self._filtros, (campo, op, valor)))
+
+    def order_by(self, campo, direction="ASCENDING"):
+        return self._copiar(orden=(campo, str(direction).upper().endswith("DESCENDING")))
+
+    def limit(self, n):
+        return self._copiar(limite=n)
+
+    def select(self, campos):
+        return self._copiar(campos=tuple(campos))
+
+    def start_after(self, cursor):
+        return self._copiar(despues_de=cursor.id if hasattr(cursor, "id") else cursor)
+
+    def on_snapshot(self, _callback):
+        raise NotImplementedError("El Firestore falso no tiene listeners: se usa polling.")
+
+    def stream(self):
+        with self._db._lock:
+            items = [(doc_id, datos) for doc_id, datos in self._db._docs(self._ruta).items()
+                     if all(OPERADORES[op](datos.get(campo), valor) for campo, op, valor in self._filtros)]
+            campo, descendente = self._orden or (ID_DOCUMENTO, False)
+            if campo == ID_DOCUMENTO:
+                items.sort(key=lambda kv: kv[0], reverse=descendente)
+            else:
+                items.sort(key=lambda kv: (kv[1].get(campo) is None, kv[1].get(campo)), reverse=descendente)
+            if self._despues_de is not None:
+                ids = [doc_id for doc_id, _ in items]
+                if self._despues_de in ids:
+                    items = items[ids.index(self._despues_de) + 1:]
+            if self._limite is not None:
+                items = items[:self._limite]
+            if self._campos is not None:
+                items = [(doc_id, {k: v for k, v in datos.items() if k in self._campos}) for doc_id, datos in items]
+            snapshots = [Snapshot(ReferenciaDocumento(self._db, self._ruta, doc_id), copy.deepcopy(datos))
+                         for doc_id, datos in items]
+        self._db._rpc(lecturas=max(len(snapshots), 1))
+        yield from snapshots
+
+    def get(self):
+        return list(self.stream())
+
+
+class ReferenciaColeccion(Consulta):
+    def __init__(self, db, ruta):
+        super().__init__(db, ruta)
+        self.id = ruta.rsplit("/", 1)[-1]
+
+    def document(self, doc_id=None):
+        return ReferenciaDocumento(self._db, self._ruta, doc_id or self._db._nuevo_id())
+
+    def add(self, datos):
+        referencia = self.document()
+        referencia.set(datos)
+        return datetime.now(timezone.utc), referencia
+
+
+class Lote:
+    def __init__(self, db):
+        self._db = db
+        self._operaciones = []
+
+    def set(self, referencia, datos, merge=False):
+        self._operaciones.append(lambda: referencia._set(datos, merge))
+
+    def update(self, referencia, datos):
+        self._operaciones.append(lambda: referencia._update(datos))
+
+    def delete(self, referencia):
+        self._operaciones.append(lambda: self._db._docs(referencia._coleccion).pop(referencia.id, None))
+
+    def commit(self):
+        self._db._rpc(escrituras=len(self._operaciones))
+        # Atómico, como un WriteBatch
+        with self._db._lock:
+            respaldo = copy.deepcopy(self._db._colecciones)
+            try:
+                for operacion in self._operaciones:
+                    operacion()
+            except Exception:
+                self._db._colecciones = respaldo
+                raise
+        return []
+
+
+class FirestoreFalso:
+    """Cliente de Firestore en memoria, seguro para varios hilos."""
+
+    def __init__(self, latencia=0.0):
+        self.latencia = latencia
+        self._colecciones = {}
+        self._lock = threading.RLock()
+        self._ids = itertools.count(1)
+        self.lecturas = 0
+        self.escrituras = 0
+        self.llamadas = 0
+
+    def _docs(self, ruta):
+        return self._colecciones.setdefault(ruta, {})
+
+    def _nuevo_id(self):
+        return f"auto{next(self._ids):016d}"
+
+    def _rpc(self, lecturas=0, escrituras=0):
+        with self._lock:
+            self.llamadas += 1
+            self.lecturas += lecturas
+            self.escrituras += escrituras
+        if self.latencia:
+            time.sleep(self.latencia)
+
+    def contadores(self):
+        with self._lock:
+            return {"llamadas": self.llamadas, "lecturas": self.lecturas, "escrituras": self.escrituras}
+
+    def reiniciar_contadores(self):
+        with self._lock:
+            self.llamadas = self.lecturas = self.escrituras = 0
+
+    # --- API del cliente ---
+    def collection(self, ruta):
+        return ReferenciaColeccion(self, ruta.strip("/"))
+
+    def batch(self):
+        return Lote(self)
+
+    def get_all(self, referencias, field_paths=None):
+        referencias = list(referencias)
+        self._rpc(lecturas=len(referencias))
+        with self._lock:
+            snapshots = [Snapshot(referencia, copy.deepcopy(referencia._leer())) for referencia in referencias]
+        yield from snapshots
+
+    def poblar(self, ruta_coleccion, documentos):
+        """Carga ``{doc_id: datos}`` sin contar escrituras (datos iniciales de la prueba)."""
+        with self._lock:
+            self._docs(ruta_coleccion.strip("/")).update(copy.deepcopy(documentos))
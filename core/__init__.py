@@ -0,0 +1,2 @@
+# core/__init__.py
+"""Lógica compartida (datos, cálculos y servicios) usada por las páginas de la app."""
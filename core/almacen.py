@@ -0,0 +1,142 @@
+# core/almacen.py
+"""Almacén columnar (Parquet) para el historial de ventas.
+
+Cada tabla (``diario``, ``bombas``) se guarda en disco local con una
+partición por mes::
+
+    data/ventas/<tabla>/mes=2025-10/part.parquet
+
+Con varias estaciones, cada una tiene su propia raíz
+(``data/ventas/estacion=<id>/...``, ver ``AlmacenVentas.para_estacion``).
+
+Las lecturas por rango de fechas abren solo las particiones y columnas
+necesarias, con lectura mapeada en memoria (``memory_map=True``). Los
+tipos de disco y de memoria son los de ``core/esquema.py``.
+"""
+from datetime import date
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from core.esquema import a_arrow, desde_arrow
+from core.rutas import CARPETA_DATOS
+
+RUTA_POR_DEFECTO = CARPETA_DATOS / "ventas"
+COLUMNA_FECHA = "Fecha"
+
+
+def _clave_mes(fecha):
+    return f"{fecha.year:04d}-{fecha.month:02d}"
+
+
+class AlmacenVentas:
+    """Lectura/escritura de tablas de ventas particionadas por mes."""
+
+    def __init__(self, raiz=RUTA_POR_DEFECTO):
+        self.raiz = Path(raiz)
+
+    @classmethod
+    def para_estacion(cls, estacion_id, raiz=RUTA_POR_DEFECTO):
+        """Almacén propio de una estación."""
+        return cls(Path(raiz) / f"estacion={estacion_id}")
+
+    def _dir_tabla(self, tabla):
+        return self.raiz / tabla
+
+    def _archivo(self, tabla, clave_mes):
+        return self._dir_tabla(tabla) / f"mes={clave_mes}" / "part.parquet"
+
+    def meses(self, tabla):
+        """Particiones (claves ``AAAA-MM``) existentes para ``tabla``, ordenadas."""
+        carpeta = self._dir_tabla(tabla)
+        if not carpeta.exists():
+            return []
+        return sorted(p.name.split("=", 1)[1] for p in carpeta.glob("mes=*") if (p / "part.parquet").exists())
+
+    def tiene_datos(self, tabla):
+        return bool(self.meses(tabla))
+
+    def guardar(self, tabla, df):
+        """Escribe ``df`` reemplazando las particiones de los meses que contiene."""
+        fechas = df[COLUMNA_FECHA]
+        claves = fechas.map(_clave_mes)
+        for clave, grupo in df.groupby(claves, sort=True, observed=True):
+            archivo = self._archivo(tabla, clave)
+            archivo.parent.mkdir(parents=True, exist_ok=True)
+            tabla_arrow = a_arrow(grupo)
+            # Escritura atómica: se escribe a un temporal y luego se renombra
+            temporal = archivo.with_suffix(".tmp")
+            pq.write_table(tabla_arrow, temporal)
+            temporal.replace(archivo)
+
+    def _claves_rango(self, tabla, desde, hasta):
+        return [c for c in self.meses(tabla) if _clave_mes(desde or date.min) <= c <= _clave_mes(hasta or date.max)]
+
+    def contar(self, tabla, desde=None, hasta=None):
+        """Cota superior de filas del rango (metadatos de las particiones, sin leer datos)."""
+        return sum(pq.ParquetFile(self._archivo(tabla, c)).metadata.num_rows
+                   for c in self._claves_rango(tabla, desde, hasta))
+
+    def iterar(self, tabla, desde=None, hasta=None, columnas=None, tamano_lote=50_000):
+        """Como ``leer``, pero en lotes ``pa.Table`` de hasta ``tamano_lote`` filas.
+
+        La memoria usada depende del tamaño del lote, no del rango.
+        """
+        desde = desde or date.min
+        hasta = hasta or date.max
+        leer_cols = None
+        if columnas is not None:
+            leer_cols = list(columnas) if COLUMNA_FECHA in columnas else [COLUMNA_FECHA, *columnas]
+        for clave in self._claves_rango(tabla, desde, hasta):
+            archivo = pq.ParquetFile(self._archivo(tabla, clave), memory_map=True)
+            for lote in archivo.iter_batches(batch_size=tamano_lote, columns=leer_cols):
+                t = pa.Table.from_batches([lote])
+                fechas = t.column(COLUMNA_FECHA)
+                mascara = pc.and_(pc.greater_equal(fechas, pa.scalar(desde, pa.date32())),
+                                  pc.less_equal(fechas, pa.scalar(hasta, pa.date32())))
+                t = t.filter(mascara)
+                if columnas is not None and COLUMNA_FECHA not in columnas:
+                    t = t.drop_columns([COLUMNA_FECHA])
+                if t.num_rows:
+                    yield t
+
+    def leer(self, tabla, desde=None, hasta=None, columnas=None):
+        """Lee ``tabla`` entre ``desde`` y ``hasta`` (inclusive) como DataFrame compacto.
+
+        Solo se abren las particiones de los meses del rango y, si se pasa
+        ``columnas``, solo esas columnas (``Fecha`` se agrega para filtrar).
+        """
+        existentes = self.meses(tabla)
+        if not existentes:
+            raise FileNotFoundError(f"No hay datos guardados para la tabla '{tabla}'.")
+
+        desde = desde or date.min
+        hasta = hasta or date.max
+        claves = [c for c in existentes if _clave_mes(desde) <= c <= _clave_mes(hasta)]
+
+        leer_cols = None
+        if columnas is not None:
+            leer_cols = list(columnas) if COLUMNA_FECHA in columnas else [COLUMNA_FECHA, *columnas]
+
+        partes = []
+        for clave in claves:
+            t = pq.read_table(self._archivo(tabla, clave), columns=leer_cols, memory_map=True)
+            fechas = t.column(COLUMNA_FECHA)
+            mascara = pc.and_(pc.greater_equal(fechas, pa.scalar(desde, pa.date32())),
+                              pc.less_equal(fechas, pa.scalar(hasta, pa.date32())))
+            partes.append(t.filter(mascara))
+
+        if not partes:
+            esquema = pq.read_schema(self._archivo(tabla, existentes[0]))
+            if leer_cols is not None:
+                esquema = pa.schema([esquema.field(c) for c in leer_cols])
+            resultado = esquema.empty_table()
+        else:
+            resultado = pa.concat_tables(partes)
+
+        df = desde_arrow(resultado)
+        if columnas is not None and COLUMNA_FECHA not in columnas:
+            df = df.drop(columns=[COLUMNA_FECHA])
+        return df
@@ -0,0 +1,204 @@
+# core/anomalias.py
+"""Detección vectorizada de anomalías en ventas por bomba y en la caja diaria.
+
+Cada serie (una columna por bomba, o por métrica de caja) se puntúa de dos
+formas en una sola pasada sobre la matriz ``días × series``:
+
+- z móvil: contra la media y desviación de los ``VENTANA`` días previos
+  (sumas acumuladas de x y x², sin bucles por día);
+- z robusto: contra la mediana y la MAD de toda la historia de la serie,
+  que no se deja arrastrar por los mismos valores atípicos.
+
+Una fila se marca si cualquiera de los dos pasa su umbral.
+
+Para el turno en curso no se vuelve a escanear la historia: ``LineaBase``
+guarda mediana y MAD por serie (galones por bomba de los últimos turnos
+cerrados, proporción de gastos y vales de la caja diaria) y cada lectura
+nueva se compara en O(bombas).
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+VENTANA = 28
+MIN_MUESTRAS = 7
+UMBRAL_Z = 3.0
+UMBRAL_ROBUSTO = 3.5
+K_MAD = 0.6745  # escala la MAD a desviación estándar en una normal
+
+# Métricas de la caja diaria: nombre -> (numerador, denominador o None)
+METRICAS_CAJA = {
+    "Venta Bruta": ("Venta Bruta", None),
+    "Gastos / Venta": ("Gastos", "Venta Bruta"),
+    "Vales / Venta": ("Vales", "Venta Bruta"),
+}
+
+
+def z_movil(x, ventana=VENTANA, min_muestras=MIN_MUESTRAS):
+    """z de cada fila de ``x`` (días × series) frente a las ``ventana`` filas previas."""
+    x = np.asarray(x, dtype=np.float64)
+    ceros = np.zeros((1, x.shape[1]))
+    s1 = np.concatenate([ceros, np.cumsum(x, axis=0)])
+    s2 = np.concatenate([ceros, np.cumsum(x * x, axis=0)])
+    t = np.arange(len(x))
+    desde = np.maximum(t - ventana, 0)
+    n = (t - desde)[:, None].astype(np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media = (s1[t] - s1[desde]) / n
+        varianza = np.maximum((s2[t] - s2[desde]) / n - media * media, 0)
+        z = (x - media) / np.sqrt(varianza)
+    z[(n[:, 0] < min_muestras)] = np.nan
+    return np.where(np.isfinite(z), z, np.nan)
+
+
+def mediana_mad(x):
+    """Mediana y MAD por columna de ``x``."""
+    x = np.asarray(x, dtype=np.float64)
+    mediana = np.median(x, axis=0)
+    return mediana, np.median(np.abs(x - mediana), axis=0)
+
+
+def z_robusto(x, mediana, mad):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = K_MAD * (np.asarray(x, dtype=np.float64) - mediana) / mad
+    return np.where(np.isfinite(z), z, np.nan)
+
+
+def escanear(x, ventana=VENTANA):
+    """``(z_movil, z_robusto, mediana, marcadas)`` para la matriz ``días × series``."""
+    zm = z_movil(x, ventana)
+    mediana, mad = mediana_mad(x)
+    zr = z_robusto(x, mediana, mad)
+    marcadas = (np.abs(np.nan_to_num(zm)) > UMBRAL_Z) | (np.abs(np.nan_to_num(zr)) > UMBRAL_ROBUSTO)
+    return zm, zr, mediana, marcadas
+
+
+def _filas(fechas, series, x, resultado, ambito, estacion_id):
+    zm, zr, mediana, marcadas = resultado
+    dia, serie = np.nonzero(marcadas)
+    return pd.DataFrame({
+        "Fecha": np.asarray(fechas, dtype="datetime64[D]")[dia].astype("datetime64[s]"),
+        "Estacion": estacion_id,
+        "Ámbito": ambito,
+        "Serie": np.asarray(series, dtype=object)[serie],
+        "Valor": x[dia, serie],
+        "Mediana": mediana[serie],
+        "z móvil": zm[dia, serie],
+        "z robusto": zr[dia, serie],
+    })
+
+
+def matriz_caja(df_diario):
+    """Matriz ``días × métricas de caja`` (``METRICAS_CAJA``) de un resumen diario."""
+    diario = df_diario.sort_values("Fecha")
+    columnas = []
+    for numerador, denominador in METRICAS_CAJA.values():
+        valores = diario[numerador].to_numpy(dtype=np.float64)
+        if denominador is not None:
+            base = diario[denominador].to_numpy(dtype=np.float64)
+            valores = np.divide(valores, base, out=np.full_like(valores, np.nan), where=base != 0)
+        columnas.append(valores)
+    return diario["Fecha"].to_numpy(dtype="datetime64[D]"), np.column_stack(columnas)
+
+
+def anomalias_caja(df_diario, estacion_id=None, ventana=VENTANA):
+    """Días con venta bruta o proporción de gastos / vales fuera de lo normal."""
+    fechas, x = matriz_caja(df_diario)
+    x = np.nan_to_num(x)
+    return _filas(fechas, list(METRICAS_CAJA), x, escanear(x, ventana), "Caja", estacion_id)
+
+
+def anomalias_bombas(cubo, estacion_id=None, ventana=VENTANA):
+    """Bomba-días con ventas fuera de lo normal para esa bomba (``CuboVentas``)."""
+    x = cubo.ventas.sum(axis=2)
+    return _filas(cubo.dias, cubo.bombas, x, escanear(x, ventana), "Bomba", estacion_id)
+
+
+def escanear_estacion(df_diario, cubo, estacion_id=None, ventana=VENTANA):
+    """Todas las filas marcadas de una estación, de la más reciente a la más antigua."""
+    caja = anomalias_caja(df_diario, estacion_id, ventana)
+    bombas = anomalias_bombas(cubo, estacion_id, ventana)
+    # Sin marcas se devuelve igual un DataFrame vacío con sus tipos
+    partes = [p for p in (caja, bombas) if len(p)] or [caja]
+    return pd.concat(partes, ignore_index=True).sort_values(["Fecha", "Ámbito"], ascending=[False, True],
+                                                            ignore_index=True)
+
+
+# --- Revisión incremental del turno en curso ---
+@dataclass(frozen=True)
+class LineaBase:
+    """Mediana y MAD por serie, para puntuar valores nuevos sin releer la historia."""
+    series: tuple
+    mediana: np.ndarray
+    mad: np.ndarray
+    muestras: int
+
+    @classmethod
+    def desde_matriz(cls, series, x):
+        x = np.asarray(x, dtype=np.float64)
+        mediana, mad = mediana_mad(x) if len(x) else (np.full(len(series), np.nan),) * 2
+        return cls(tuple(series), mediana, mad, len(x))
+
+    def puntuar(self, valores):
+        """z robusto de ``valores`` (uno por serie, en el mismo orden)."""
+        return z_robusto(valores, self.mediana, self.mad)
+
+
+def linea_base_turnos(cierres, ids_bombas, limite=60):
+    """Galones por bomba de los últimos turnos cerrados (``JournalTurnos.cierres``).
+
+    ``None`` si hay menos de ``MIN_MUESTRAS`` turnos con todas las bombas.
+    """
+    posicion = {id_bomba: j for j, id_bomba in enumerate(ids_bombas)}
+    filas = []
+    for _, foto in cierres[:limite]:
+        fila = np.full(len(ids_bombas), np.nan)
+        for item in foto["form_data"]:
+            j = posicion.get(item["id"])
+            if j is not None:
+                fila[j] = item["final"] - item["inicio"]
+        if not np.isnan(fila).any():
+            filas.append(fila)
+    if len(filas) < MIN_MUESTRAS:
+        return None
+    return LineaBase.desde_matriz(ids_bombas, np.vstack(filas))
+
+
+def linea_base_caja(df_diario):
+    """Proporciones de gastos y vales sobre la venta de la caja diaria."""
+    _, x = matriz_caja(df_diario)
+    x = x[:, 1:]
+    x = x[~np.isnan(x).any(axis=1)]
+    if len(x) < MIN_MUESTRAS:
+        return None
+    return LineaBase.desde_matriz(list(METRICAS_CAJA)[1:], x)
+
+
+def revisar_turno(form_data, linea_base):
+    """Mensajes de los contómetros con galones atípicos frente a sus turnos anteriores."""
+    if linea_base is None or not form_data:
+        return []
+    galones = np.array([item["final"] - item["inicio"] for item in form_data], dtype=np.float64)
+    ids = [item["id"] for item in form_data]
+    if tuple(ids) != linea_base.series:
+        return []
+    z = linea_base.puntuar(galones)
+    # 0 galones = lectura aún no ingresada; los retrocesos ya los revisa core/contometros.py
+    marcadas = np.flatnonzero((np.abs(np.nan_to_num(z)) > UMBRAL_ROBUSTO) & (galones > 0))
+    return [f"{ids[j]}: {galones[j]:,.0f} galones (lo usual: ~{linea_base.mediana[j]:,.0f}, z={z[j]:+.1f})"
+            for j in marcadas]
+
+
+def revisar_caja(venta_bruta, total_gastos, total_vales, linea_base):
+    """Mensajes si los gastos o vales del turno son una proporción atípicamente alta de la venta.
+
+    Solo se avisa hacia arriba: un turno sin gastos o sin vales es normal.
+    """
+    if linea_base is None or venta_bruta <= 0:
+        return []
+    proporciones = np.array([total_gastos, total_vales], dtype=np.float64) / venta_bruta
+    z = linea_base.puntuar(proporciones)
+    return [f"{nombre}: {100 * p:.1f}% (lo usual: {100 * m:.1f}%)"
+            for nombre, p, m, zz in zip(linea_base.series, proporciones, linea_base.mediana, z)
+            if np.nan_to_num(zz) > UMBRAL_ROBUSTO]
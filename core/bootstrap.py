@@ -0,0 +1,83 @@
+# core/bootstrap.py
+"""Arranque diferido de Firebase y perfil de tiempos de inicio.
+
+``firebase_admin`` se importa e inicializa recién en el primer acceso a
+datos, no al cargar ``app.py``: la pantalla de login se dibuja sin esperar
+a Firebase. El cliente queda memorizado con ``st.cache_resource`` y lo
+comparten todas las páginas y sesiones del proceso.
+
+Con ``GRIFO_PERFIL_INICIO=1`` se registran los tiempos de las secciones
+medidas con ``medir`` y de los imports pesados hechos con ``importar``;
+``mostrar_perfil()`` los muestra en la página.
+"""
+import importlib
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+import streamlit as st
+
+PROJECT_ID = "streamlit-1320265"
+PERFIL_ACTIVO = os.environ.get("GRIFO_PERFIL_INICIO") == "1"
+
+logger = logging.getLogger("grifo.inicio")
+_tiempos = []
+
+
+@contextmanager
+def medir(etiqueta):
+    """Mide la duración del bloque (solo se registra con el perfil activo)."""
+    if not PERFIL_ACTIVO:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        ms = (time.perf_counter() - inicio) * 1000
+        _tiempos.append((etiqueta, ms))
+        logger.info("inicio etiqueta=%s ms=%.1f", etiqueta, ms)
+
+
+def importar(nombre):
+    """``importlib.import_module`` medido (el primer import es el que cuesta)."""
+    with medir(f"import {nombre}"):
+        return importlib.import_module(nombre)
+
+
+def mostrar_perfil():
+    """Tabla con los tiempos registrados en este proceso (solo con el perfil activo)."""
+    if not PERFIL_ACTIVO:
+        return
+    with st.expander("⏱️ Perfil de inicio"):
+        st.table([{"Sección": etiqueta, "ms": round(ms, 1)} for etiqueta, ms in _tiempos])
+
+
+@st.cache_resource(show_spinner=False)
+def obtener_db():
+    """Inicializa Firebase (una vez por proceso) y devuelve el cliente de Firestore."""
+    firebase_admin = importar("firebase_admin")
+    credentials = importar("firebase_admin.credentials")
+    firestore = importar("firebase_admin.firestore")
+
+    with medir("firebase: initialize_app"):
+        if not firebase_admin._apps:
+            cred_dict = dict(st.secrets["firebase"])
+            if "private_key" in cred_dict:
+                cred_dict["private_key"] = cred_dict["private_key"].replace("\\n", "\n")
+            cred = credentials.Certificate(cred_dict)
+            firebase_admin.initialize_app(cred, {
+                "projectId": PROJECT_ID,
+                "databaseURL": f"https://{PROJECT_ID}.firebaseio.com"
+            })
+    with medir("firebase: firestore.client"):
+        return firestore.client()
+
+
+@st.cache_resource(show_spinner=False)
+def repositorios():
+    """Repositorios sobre Firestore, compartidos por el proceso."""
+    from core.repositorio import crear_repositorios
+
+    return crear_repositorios("firestore", db=obtener_db())
@@ -0,0 +1,328 @@
+# core/cache_firestore.py
+"""Caché de lectura compartida por todo el proceso para ``employees`` y ``products``.
+
+Los precios son por estación: cada colección de precios (``products`` o
+``stations/<id>/products``, ver ``core.estaciones``) tiene su propio caché,
+creado la primera vez que se consulta.
+
+Cada colección se lee una sola vez y luego se mantiene al día con un listener
+``on_snapshot``; si el listener no está disponible (emulador sin soporte,
+fake en memoria, red que lo corta) se pasa a releer la colección cada cierto
+tiempo. Las escrituras hechas desde la app pasan por aquí y se aplican al
+caché en el acto, sin esperar al listener; si Firestore luego las rechaza
+(ver ``core.escritor``), el documento se vuelve a leer y se descarta la
+copia local.
+
+El cliente ``db`` se recibe como parámetro, así que funciona igual con el
+cliente real, el emulador de Firestore o un fake en memoria con la misma API.
+"""
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from firebase_admin import firestore
+
+from core.consultas import TAMANO_PAGINA, paginar
+from core.escritor import escritor_compartido, mutacion_set, mutacion_update, nuevo_id
+from core.instrumentacion import cronometrado
+from core.precios import ResolutorPrecios
+
+
+_FECHA_MINIMA = datetime.min.replace(tzinfo=timezone.utc)
+
+
+def _a_utc(valor):
+    """Firestore guarda las fechas sin zona como UTC; se normalizan igual en la copia local."""
+    if isinstance(valor, datetime) and valor.tzinfo is None:
+        return valor.replace(tzinfo=timezone.utc)
+    return valor
+
+
+# Sin ``password_hash``: las credenciales no se copian a la memoria compartida; el
+# login las lee documento por documento del repositorio (``core.credenciales``)
+CAMPOS_EMPLEADO = ("name", "last_name", "role", "is_active", "station_id", "shift")
+
+
+@dataclass(frozen=True)
+class Empleado:
+    dni: str
+    name: str = ""
+    last_name: str = ""
+    role: str | None = None
+    is_active: bool = False
+    station_id: str | None = None  # estación asignada (sin asignar = la de colecciones raíz)
+    turno: str | None = None  # turno base de un grifero
+
+    @property
+    def nombre_completo(self):
+        return f"{self.name} {self.last_name}"
+
+    @classmethod
+    def desde_doc(cls, doc_id, datos):
+        return cls(
+            dni=doc_id,
+            name=datos.get("name", ""),
+            last_name=datos.get("last_name", ""),
+            role=datos.get("role"),
+            is_active=bool(datos.get("is_active", False)),
+            station_id=datos.get("station_id"),
+            turno=datos.get("shift"),
+        )
+
+
+@dataclass(frozen=True)
+class Precio:
+    id: str
+    product_id: str
+    price_per_gallon: float
+    valid_from: datetime | None = None
+    registered_at: datetime | None = None
+
+    @classmethod
+    def desde_doc(cls, doc_id, datos):
+        return cls(
+            id=doc_id,
+            product_id=datos.get("product_id"),
+            price_per_gallon=float(datos.get("price_per_gallon", 0.0)),
+            valid_from=_a_utc(datos.get("valid_from")),
+            registered_at=_a_utc(datos.get("registered_at")),
+        )
+
+
+def _resolver_centinelas(datos):
+    """Reemplaza ``SERVER_TIMESTAMP`` por la hora local para la copia en caché."""
+    ahora = datetime.now(timezone.utc)
+    return {k: (ahora if v is firestore.SERVER_TIMESTAMP else v) for k, v in datos.items()}
+
+
+class CacheColeccion:
+    """Copia en memoria ``{doc_id: dict}`` de una colección, mantenida al día.
+
+    Si se pasa ``campos``, el caché guarda solo esos campos y las recargas
+    piden únicamente esos campos (``select``), página por página. El listener
+    recibe documentos completos (``on_snapshot`` no admite ``select``), así
+    que cada cambio se proyecta igual antes de guardarse.
+    """
+
+    def __init__(self, coleccion_ref, intervalo_polling=60, espera_inicial=10,
+                 campos=None, tamano_pagina=TAMANO_PAGINA):
+        self._ref = coleccion_ref
+        self._campos = list(campos) if campos is not None else None
+        self._tamano_pagina = tamano_pagina
+        self._intervalo = intervalo_polling
+        self._docs = {}
+        self._lock = threading.RLock()
+        self._listo = threading.Event()
+        self._detener = threading.Event()
+        self._watch = None
+        self.version = 0
+        self.modo = None
+
+        try:
+            self._watch = self._ref.on_snapshot(self._al_cambiar)
+            if not self._listo.wait(espera_inicial):
+                raise TimeoutError("El listener no entregó el snapshot inicial a tiempo.")
+            self.modo = "listener"
+        except Exception:
+            if self._watch is not None:
+                self._watch.unsubscribe()
+                self._watch = None
+            self._recargar()
+            self.modo = "polling"
+            threading.Thread(target=self._polling, daemon=True).start()
+
+    # --- Sincronización ---
+    def _proyectar(self, datos):
+        if self._campos is None:
+            return datos
+        return {k: v for k, v in datos.items() if k in self._campos}
+
+    def _al_cambiar(self, _snapshot, cambios, _read_time):
+        with self._lock:
+            for cambio in cambios:
+                doc = cambio.document
+                if cambio.type.name == "REMOVED":
+                    self._docs.pop(doc.id, None)
+                else:
+                    self._docs[doc.id] = self._proyectar(doc.to_dict())
+            self.version += 1
+        self._listo.set()
+
+    @cronometrado("firestore: recarga de colección")
+    def _recargar(self):
+        query = self._ref.select(self._campos) if self._campos is not None else self._ref
+        docs = {doc.id: doc.to_dict() for doc in paginar(query, self._tamano_pagina)}
+        with self._lock:
+            self._docs = docs
+            self.version += 1
+        self._listo.set()
+
+    def _polling(self):
+        while not self._detener.wait(self._intervalo):
+            try:
+                self._recargar()
+            except Exception:
+                # Un fallo temporal de red no debe matar el hilo; se reintenta en el próximo ciclo
+                pass
+
+    def cerrar(self):
+        self._detener.set()
+        if self._watch is not None:
+            self._watch.unsubscribe()
+
+    # --- Lecturas ---
+    def obtener(self, doc_id):
+        with self._lock:
+            datos = self._docs.get(doc_id)
+            return dict(datos) if datos is not None else None
+
+    def items(self):
+        with self._lock:
+            return [(doc_id, dict(datos)) for doc_id, datos in self._docs.items()]
+
+    # --- Escrituras ---
+    def invalidar(self, doc_id):
+        """Reemplaza la copia local de ``doc_id`` por la de Firestore (p. ej. tras una escritura rechazada)."""
+        snapshot = self._ref.document(doc_id).get()
+        with self._lock:
+            if snapshot.exists:
+                self._docs[doc_id] = self._proyectar(snapshot.to_dict())
+            else:
+                self._docs.pop(doc_id, None)
+            self.version += 1
+
+    def aplicar_local(self, doc_id, datos, merge=True):
+        """Aplica en el caché una escritura antes de que Firestore la confirme.
+
+        Con ``EscritorLotes`` la mutación solo quedó encolada: el caché la
+        muestra de inmediato (optimista) y, si Firestore la rechaza, el
+        escritor avisa y ``invalidar`` vuelve a leer el documento.
+        Devuelve la nueva ``version`` de la colección.
+        """
+        datos = self._proyectar(_resolver_centinelas(datos))
+        with self._lock:
+            if merge and doc_id in self._docs:
+                self._docs[doc_id] = {**self._docs[doc_id], **datos}
+            else:
+                self._docs[doc_id] = datos
+            self.version += 1
+            return self.version
+
+
+class CacheFirestore:
+    """Punto único de lectura/escritura de empleados y precios para las páginas."""
+
+    def __init__(self, db, intervalo_polling=60, escritor=None):
+        self.db = db
+        # Con un ``EscritorLotes`` las escrituras se encolan y se confirman al instante
+        self.escritor = escritor
+        self.intervalo_polling = intervalo_polling
+        self.empleados = CacheColeccion(db.collection("employees"), intervalo_polling, campos=CAMPOS_EMPLEADO)
+        self._precios = {}
+        self._resolutores = {}
+        self._lock = threading.Lock()
+        if escritor is not None:
+            escritor.al_rechazar(self._escritura_rechazada)
+
+    def _escritura_rechazada(self, mutacion, _error):
+        """Revierte en el caché una escritura que Firestore rechazó."""
+        coleccion, doc_id = mutacion["ruta"].strip("/").rsplit("/", 1)
+        if coleccion == "employees":
+            self.empleados.invalidar(doc_id)
+        else:
+            with self._lock:
+                cache = self._precios.get(coleccion)
+            if cache is not None:
+                cache.invalidar(doc_id)
+
+    # --- Empleados ---
+    def empleado(self, dni):
+        datos = self.empleados.obtener(dni)
+        return Empleado.desde_doc(dni, datos) if datos is not None else None
+
+    def empleados_activos(self):
+        return [Empleado.desde_doc(dni, d) for dni, d in self.empleados.items() if d.get("is_active")]
+
+    def actualizar_empleado(self, dni, campos):
+        if self.escritor is not None:
+            self.escritor.encolar([mutacion_update(f"employees/{dni}", campos)])
+        else:
+            self.db.collection("employees").document(dni).update(campos)
+        self.empleados.aplicar_local(dni, campos)
+
+    # --- Precios ---
+    def precios_de(self, coleccion="products"):
+        """Caché de la colección de precios ``coleccion`` (una por estación)."""
+        with self._lock:
+            cache = self._precios.get(coleccion)
+            if cache is None:
+                cache = CacheColeccion(self.db.collection(coleccion), self.intervalo_polling)
+                self._precios[coleccion] = cache
+            return cache
+
+    @property
+    def precios(self):
+        return self.precios_de()
+
+    def historial_precios(self, product_id=None, coleccion="products"):
+        """Precios registrados, del más reciente al más antiguo por ``valid_from``."""
+        precios = [Precio.desde_doc(i, d) for i, d in self.precios_de(coleccion).items()
+                   if product_id is None or d.get("product_id") == product_id]
+        return sorted(precios, key=lambda p: p.valid_from or _FECHA_MINIMA, reverse=True)
+
+    def resolutor_precios(self, coleccion="products"):
+        """Índice de vigencias de precios.
+
+        Los precios registrados desde este proceso se insertan en el índice
+        (``registrar_precio``); se reconstruye entero solo cuando la colección
+        cambia por otra vía (listener, polling, escritura revertida).
+        """
+        version = self.precios_de(coleccion).version
+        resolutor, version_resolutor = self._resolutores.get(coleccion, (None, None))
+        if resolutor is None or version_resolutor != version:
+            resolutor = ResolutorPrecios.desde_precios(self.historial_precios(coleccion=coleccion))
+            self._resolutores[coleccion] = (resolutor, version)
+        return resolutor
+
+    def registrar_precio(self, price_data, coleccion="products"):
+        if self.escritor is not None:
+            precio_id = nuevo_id()
+            self.escritor.encolar([mutacion_set(f"{coleccion}/{precio_id}", price_data)])
+        else:
+            _, ref = self.db.collection(coleccion).add(price_data)
+            precio_id = ref.id
+        cache = self.precios_de(coleccion)
+        version = cache.aplicar_local(precio_id, price_data, merge=False)
+        self._insertar_en_resolutor(coleccion, Precio.desde_doc(precio_id, cache.obtener(precio_id)), version)
+        return precio_id
+
+    def _insertar_en_resolutor(self, coleccion, precio, version):
+        """Agrega ``precio`` al índice de ``coleccion`` si solo le falta ese cambio.
+
+        Las páginas leen el índice sin lock: se agrega sobre una copia y se reemplaza.
+        """
+        with self._lock:
+            resolutor, version_resolutor = self._resolutores.get(coleccion, (None, None))
+            if resolutor is None or version_resolutor != version - 1 or precio.valid_from is None:
+                return
+            nuevo = resolutor.copia()
+            nuevo.agregar(precio.product_id, precio.valid_from, precio.price_per_gallon)
+            self._resolutores[coleccion] = (nuevo, version)
+
+    def cerrar(self):
+        self.empleados.cerrar()
+        for cache in self._precios.values():
+            cache.cerrar()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def cache_compartido(db):
+    """Un único ``CacheFirestore`` por proceso, compartido por todas las páginas."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CacheFirestore(db, escritor=escritor_compartido(db))
+        return _cache
@@ -0,0 +1,65 @@
+# core/consolidado.py
+"""Rollups de Reportes por estación, calculados en paralelo, y vista consolidada.
+
+Cada estación tiene su propio almacén Parquet (``AlmacenVentas.para_estacion``).
+Leer y acumular una estación no depende de las demás, así que cada una se
+procesa en un proceso aparte; el consolidado suma los rollups ya calculados
+(``RollupDiario.combinar``) sin volver a leer los datos.
+"""
+import os
+import pickle
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from core.rollup import RollupDiario
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+def construir_rollup(almacen):
+    """Rollup diario de un almacén (se ejecuta dentro del proceso trabajador)."""
+    return RollupDiario(almacen.leer("diario"))
+
+
+def _en_proceso_aparte(almacen):
+    """``construir_rollup`` en ``python -m core.consolidado``.
+
+    El trabajador arranca desde este módulo, no desde el ``__main__`` del
+    servidor: ``multiprocessing`` con ``spawn`` volvería a ejecutar el script
+    de la página que Streamlit registra como ``__main__``.
+    """
+    resultado = subprocess.run([sys.executable, "-m", "core.consolidado"], input=pickle.dumps(almacen),
+                               capture_output=True, cwd=RAIZ, check=True)
+    return pickle.loads(resultado.stdout)
+
+
+def rollups_por_estacion(almacenes, max_procesos=None):
+    """``{estacion_id: RollupDiario}`` para ``{estacion_id: AlmacenVentas}``.
+
+    Con una sola estación se calcula en el proceso actual (otro proceso no compensa).
+    Son procesos nuevos y no ``fork``: el servidor de Streamlit tiene hilos.
+    """
+    ids = list(almacenes)
+    if len(ids) <= 1:
+        return {i: construir_rollup(almacenes[i]) for i in ids}
+    max_procesos = max_procesos or min(len(ids), os.cpu_count() or 1)
+    # Cada hilo solo espera a su proceso trabajador
+    with ThreadPoolExecutor(max_workers=max_procesos) as pool:
+        rollups = pool.map(_en_proceso_aparte, [almacenes[i] for i in ids])
+        return dict(zip(ids, rollups))
+
+
+def consolidado(rollups):
+    """Rollup con todas las estaciones sumadas."""
+    return RollupDiario.combinar(rollups.values())
+
+
+if __name__ == "__main__":
+    # Proceso trabajador: almacén por stdin y rollup por stdout (pickle). Lo que
+    # se imprima al importar o calcular va a stderr para no mezclarse
+    salida = sys.stdout.buffer
+    sys.stdout = sys.stderr
+    pickle.dump(construir_rollup(pickle.load(sys.stdin.buffer)), salida)
+    salida.flush()
@@ -0,0 +1,43 @@
+# core/consultas.py
+"""Consultas a Firestore con máscara de campos (``select``) y paginación por cursor.
+
+Evitan traer documentos completos (hash de contraseña, datos personales,
+etc.) cuando solo se necesitan unos pocos campos, y mantienen acotado el
+tamaño de cada respuesta aunque la colección crezca a miles de registros.
+"""
+CAMPOS_LOGIN = ("name", "last_name")
+TAMANO_PAGINA = 200
+# Ruta especial de Firestore para ordenar por ID de documento
+ID_DOCUMENTO = "__name__"
+
+
+def paginar(query, tamano_pagina=TAMANO_PAGINA):
+    """Recorre ``query`` página por página con ``limit``/``start_after``.
+
+    Ordena por ID de documento para que el cursor sea estable. Es un
+    generador: la siguiente página solo se pide cuando se consumió la actual.
+    """
+    query = query.order_by(ID_DOCUMENTO)
+    ultimo = None
+    while True:
+        pagina = query.limit(tamano_pagina)
+        if ultimo is not None:
+            pagina = pagina.start_after(ultimo)
+        docs = list(pagina.stream())
+        yield from docs
+        if len(docs) < tamano_pagina:
+            return
+        ultimo = docs[-1]
+
+
+def iterar_empleados_activos(db, campos=CAMPOS_LOGIN, tamano_pagina=TAMANO_PAGINA):
+    """Genera ``(dni, datos)`` de los empleados activos, trayendo solo ``campos``."""
+    query = db.collection("employees").where("is_active", "==", True).select(list(campos))
+    for doc in paginar(query, tamano_pagina):
+        yield doc.id, doc.to_dict()
+
+
+def opciones_empleados(pares):
+    """Genera las opciones ``"DNI - Nombre"`` del selectbox a partir de pares ``(dni, nombre)``."""
+    for dni, nombre in pares:
+        yield f"{dni} - {nombre}"
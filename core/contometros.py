@@ -0,0 +1,98 @@
+# core/contometros.py
+"""Continuidad de lecturas de contómetros entre turnos.
+
+La L. FINAL de un turno es la L. INICIO del siguiente. Cada cierre guarda:
+
+- ``<meters>/{D-xx}``: última lectura de cierre de cada contómetro (la
+  cabeza de la cadena).
+- ``<closings>/{id}/lecturas/{D-xx}`` con ``cierre_anterior``: el eslabón,
+  que apunta al cierre previo del mismo contómetro.
+
+Las últimas lecturas de todos los contómetros de la estación se piden en
+una sola llamada (``db.get_all``). Las lecturas nuevas se revisan en una
+pasada vectorizada: retrocesos (L. FINAL menor que L. INICIO) y saltos
+imposibles (más galones de los que un contómetro despacha en un turno).
+"""
+from datetime import datetime, timezone
+
+import numpy as np
+
+from core.escritor import mutacion_set
+from core.instrumentacion import cronometrado
+
+MAX_GALONES_TURNO = 3000.0  # mismo valor por defecto que ``Estacion.max_galones_turno``
+
+
+def refs_contometros(db, estacion):
+    coleccion = db.collection(estacion.coleccion("meters"))
+    return [coleccion.document(id_bomba) for id_bomba in estacion.ids_bombas()]
+
+
+@cronometrado("firestore: últimas lecturas")
+def ultimas_lecturas(db, estacion):
+    """``{D-xx: {"final", "producto", "cierre_id", "fecha"}}`` en una sola llamada a Firestore."""
+    return {doc.id: doc.to_dict() for doc in db.get_all(refs_contometros(db, estacion)) if doc.exists}
+
+
+def mutaciones_contometros(estacion, cierre_id, fecha, lecturas):
+    """Mutaciones que mueven la cabeza de la cadena de cada contómetro a este cierre."""
+    coleccion = estacion.coleccion("meters") if estacion is not None else "meters"
+    return [mutacion_set(f"{coleccion}/{item['id']}", {
+        "final": item["final"],
+        "producto": item["producto"],
+        "cierre_id": cierre_id,
+        "fecha": fecha,
+    }) for item in lecturas]
+
+
+def _a_timestamp(fecha):
+    if fecha is None:
+        return float("-inf")
+    if isinstance(fecha, datetime):
+        return (fecha if fecha.tzinfo else fecha.replace(tzinfo=timezone.utc)).timestamp()
+    return float(fecha)
+
+
+def lecturas_de_apertura(estacion, remotas, local=None):
+    """Lecturas iniciales del turno nuevo a partir de los últimos cierres.
+
+    ``remotas`` es ``ultimas_lecturas(...)``; ``local`` la foto del último
+    cierre del diario local (``JournalTurnos.ultimo_cierre``), que puede
+    estar más al día si el escritor aún no sincronizó. Por contómetro se
+    usa el cierre más reciente. Devuelve ``None`` si falta algún contómetro.
+    """
+    locales = {}
+    if local is not None:
+        for item in local["form_data"]:
+            locales[item["id"]] = {"final": item["final"], "producto": item["producto"],
+                                   "cierre_id": local.get("cierre_id"), "fecha": local.get("cerrado")}
+    lecturas = []
+    for id_bomba in estacion.ids_bombas():
+        candidatas = [c for c in (remotas.get(id_bomba), locales.get(id_bomba)) if c is not None]
+        if not candidatas:
+            return None
+        ultima = max(candidatas, key=lambda c: _a_timestamp(c.get("fecha")))
+        lecturas.append({"id": id_bomba, "producto": ultima["producto"], "inicio": ultima["final"],
+                         "final": ultima["final"], "cierre_anterior": ultima.get("cierre_id")})
+    return lecturas
+
+
+def revisar_lecturas(inicio, final, max_galones=MAX_GALONES_TURNO):
+    """Máscaras ``(retroceso, salto)`` para arreglos de lecturas, en una sola pasada."""
+    galones = np.asarray(final, dtype=np.float64) - np.asarray(inicio, dtype=np.float64)
+    return galones < 0, galones > max_galones
+
+
+def observaciones(form_data, max_galones=MAX_GALONES_TURNO):
+    """Mensajes de las lecturas sospechosas de ``form_data`` (lista vacía si todo está bien)."""
+    if not form_data:
+        return []
+    ids = np.array([item["id"] for item in form_data], dtype=object)
+    inicio = np.array([item["inicio"] for item in form_data], dtype=np.float64)
+    final = np.array([item["final"] for item in form_data], dtype=np.float64)
+    retroceso, salto = revisar_lecturas(inicio, final, max_galones)
+    mensajes = [f"{i}: L. FINAL {f:,.0f} menor que L. INICIO {a:,.0f} (retroceso)"
+                for i, a, f in zip(ids[retroceso], inicio[retroceso], final[retroceso])]
+    mensajes += [f"{i}: {f - a:,.0f} galones en un turno (máximo {max_galones:,.0f})"
+                 for i, a, f in zip(ids[salto], inicio[salto], final[salto])]
+    return mensajes
@@ -0,0 +1,213 @@
+# core/credenciales.py
+"""Hash y verificación de contraseñas para el login.
+
+Las contraseñas se guardan con un KDF con sal y costo configurable:
+
+- ``pbkdf2_sha256$<iteraciones>$<sal>$<hash>``
+- ``scrypt$<n>$<r>$<p>$<sal>$<hash>``
+
+Los registros antiguos (SHA-256 sin sal, 64 caracteres hex) se siguen
+aceptando y se re-hashean con el esquema actual en el primer login
+correcto. Lo mismo pasa si el costo configurado sube.
+
+El KDF corre en un pool de hilos acotado. El pool no vuelve asíncrono el
+login (la sesión espera el resultado: Streamlit responde en el mismo rerun),
+solo limita cuántos KDF corren a la vez: una ráfaga de logins hace cola en
+lugar de acaparar CPU y memoria. Como ``hashlib`` libera el GIL durante el
+cálculo, las demás sesiones siguen atendidas mientras tanto.
+"""
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class ParametrosKDF:
+    esquema: str = "pbkdf2_sha256"
+    iteraciones: int = 310_000
+    n: int = 2 ** 14
+    r: int = 8
+    p: int = 1
+
+
+def _parametros_de_entorno():
+    return ParametrosKDF(
+        esquema=os.environ.get("GRIFO_KDF", "pbkdf2_sha256"),
+        iteraciones=int(os.environ.get("GRIFO_PBKDF2_ITERACIONES", 310_000)),
+        n=int(os.environ.get("GRIFO_SCRYPT_N", 2 ** 14)),
+    )
+
+
+PARAMETROS = _parametros_de_entorno()
+_POOL = ThreadPoolExecutor(max_workers=int(os.environ.get("GRIFO_KDF_HILOS", 4)), thread_name_prefix="kdf")
+
+
+def _b64(datos):
+    return base64.b64encode(datos).decode("ascii")
+
+
+def _derivar(password, sal, parametros):
+    if parametros.esquema == "pbkdf2_sha256":
+        return hashlib.pbkdf2_hmac("sha256", password.encode(), sal, parametros.iteraciones)
+    if parametros.esquema == "scrypt":
+        return hashlib.scrypt(password.encode(), salt=sal, n=parametros.n, r=parametros.r, p=parametros.p,
+                              maxmem=256 * parametros.n * parametros.r + 2 ** 20)
+    raise ValueError(f"Esquema de hash desconocido: {parametros.esquema}")
+
+
+def hash_legacy(password):
+    """SHA-256 sin sal (formato anterior; solo para verificar registros viejos)."""
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def hash_password(password, parametros=None):
+    """Hash con sal en el formato del esquema configurado."""
+    parametros = parametros or PARAMETROS
+    sal = secrets.token_bytes(16)
+    derivado = _b64(_derivar(password, sal, parametros))
+    if parametros.esquema == "pbkdf2_sha256":
+        return f"pbkdf2_sha256${parametros.iteraciones}${_b64(sal)}${derivado}"
+    return f"scrypt${parametros.n}${parametros.r}${parametros.p}${_b64(sal)}${derivado}"
+
+
+def _leer_hash(almacenado):
+    """``(ParametrosKDF, sal, hash)`` de un hash almacenado, o ``None`` si es legacy."""
+    partes = almacenado.split("$")
+    if partes[0] == "pbkdf2_sha256" and len(partes) == 4:
+        return ParametrosKDF("pbkdf2_sha256", iteraciones=int(partes[1])), base64.b64decode(partes[2]), partes[3]
+    if partes[0] == "scrypt" and len(partes) == 6:
+        parametros = ParametrosKDF("scrypt", n=int(partes[1]), r=int(partes[2]), p=int(partes[3]))
+        return parametros, base64.b64decode(partes[4]), partes[5]
+    return None
+
+
+def verificar_password(password, almacenado, parametros=None):
+    """Devuelve ``(ok, necesita_rehash)``."""
+    parametros = parametros or PARAMETROS
+    if not almacenado:
+        return False, False
+    leido = _leer_hash(almacenado)
+    if leido is None:
+        ok = hmac.compare_digest(hash_legacy(password), almacenado)
+        return ok, ok
+    usados, sal, esperado = leido
+    ok = hmac.compare_digest(_b64(_derivar(password, sal, usados)), esperado)
+    return ok, ok and _costo_menor(usados, parametros)
+
+
+def _costo_menor(usados, actuales):
+    if usados.esquema != actuales.esquema:
+        return True
+    if usados.esquema == "pbkdf2_sha256":
+        return usados.iteraciones < actuales.iteraciones
+    return (usados.n, usados.r, usados.p) < (actuales.n, actuales.r, actuales.p)
+
+
+def verificar_password_async(password, almacenado, parametros=None):
+    """Igual que ``verificar_password``, en el pool del KDF (devuelve un ``Future``).
+
+    Acota la concurrencia, no la espera: quien necesite la respuesta bloquea en ``result``.
+    """
+    return _POOL.submit(verificar_password, password, almacenado, parametros)
+
+
+class CacheRegistrosAuth:
+    """Caché corto en memoria de registros de empleados para el login.
+
+    En un cambio de turno varios empleados inician sesión seguidos; con el
+    caché, repetir el login no vuelve a leer Firestore. El TTL corto acota
+    cuánto tarda en verse un cambio hecho desde otro proceso.
+    """
+
+    def __init__(self, ttl=60.0, max_registros=1000):
+        self.ttl = ttl
+        self.max_registros = max_registros
+        self._datos = {}
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, dni, cargar):
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._datos.get(dni)
+            if entrada is not None and entrada[0] > ahora:
+                self.aciertos += 1
+                return entrada[1]
+            self.fallos += 1
+        registro = cargar(dni)
+        if registro is not None:
+            with self._lock:
+                if len(self._datos) >= self.max_registros:
+                    # Se descartan primero las entradas más antiguas (orden de inserción)
+                    for clave in list(self._datos)[: max(1, self.max_registros // 10)]:
+                        del self._datos[clave]
+                self._datos[dni] = (ahora + self.ttl, registro)
+        return registro
+
+    def actualizar(self, dni, campos):
+        with self._lock:
+            entrada = self._datos.get(dni)
+            if entrada is not None:
+                self._datos[dni] = (entrada[0], {**entrada[1], **campos})
+
+    def invalidar(self, dni=None):
+        with self._lock:
+            if dni is None:
+                self._datos.clear()
+            else:
+                self._datos.pop(dni, None)
+
+
+CACHE_AUTH = CacheRegistrosAuth()
+
+
+def verificar_login(empleados, dni, password, cache=CACHE_AUTH, parametros=None, timeout=30,
+                    limitador=None, cliente=None):
+    """Valida DNI/contraseña contra el repositorio de empleados.
+
+    Devuelve ``(ok, mensaje, datos_del_empleado)``. Si se pasa un
+    ``limitador`` (ver ``core.limites``), los intentos rechazados por él no
+    llegan a leer el repositorio. Si el hash guardado es legacy o de menor
+    costo, se re-hashea en segundo plano tras un login correcto.
+    """
+    if limitador is not None:
+        permitido, mensaje = limitador.permitir(dni, cliente)
+        if not permitido:
+            return False, mensaje, None
+    user = cache.obtener(dni, empleados.obtener) if cache is not None else empleados.obtener(dni)
+    if user is None:
+        if limitador is not None:
+            limitador.registrar_desconocido(dni)
+        return False, "❌ Usuario no encontrado.", None
+    # La sesión espera su turno en el pool: con muchos logins a la vez, hacen cola
+    futuro = verificar_password_async(password, user.get("password_hash"), parametros)
+    try:
+        ok, necesita_rehash = futuro.result(timeout)
+    except TimeoutError:
+        futuro.cancel()  # si aún no empezó, no ocupa el pool
+        return False, "⏳ El servidor está ocupado verificando otros accesos. Intenta de nuevo.", None
+    if not ok:
+        if limitador is not None:
+            limitador.registrar_fallo(dni, cliente)
+        return False, "❌ Contraseña incorrecta.", None
+    if limitador is not None:
+        limitador.registrar_exito(dni, cliente)
+    if not user.get("is_active", False):
+        return False, "❌ Cuenta inactiva.", None
+    if necesita_rehash:
+        _POOL.submit(_rehash, empleados, dni, password, cache, parametros)
+    return True, f"Bienvenido, {user.get('name')}", user
+
+
+def _rehash(empleados, dni, password, cache, parametros):
+    nuevo = {"password_hash": hash_password(password, parametros)}
+    empleados.actualizar(dni, nuevo)
+    if cache is not None:
+        cache.actualizar(dni, nuevo)
@@ -0,0 +1,143 @@
+# core/cubo.py
+"""Cubo de ventas por día × bomba × producto para el análisis de Reportes.
+
+Se arma una vez por carga de datos: un arreglo NumPy denso
+``ventas[día, bomba, producto]`` con sus índices de dimensión (``dias``,
+``bombas``, ``productos``) y las sumas acumuladas por día. A partir de ahí:
+
+- la tabla bomba × producto de cualquier rango son dos búsquedas binarias
+  y una resta de matrices;
+- las series por semana o por mes usan los periodos precalculados de cada
+  día y salen recortadas exactamente al rango (como ``core/rollup.py``);
+- filtrar por producto o bomba es indexar un eje, no un groupby sobre
+  todo ``df_bombas``.
+
+Con 22 bombas y 3 productos, cada año de una estación ocupa ~190 KB (y otro
+tanto sus acumulados).
+"""
+import numpy as np
+import pandas as pd
+
+from core.rollup import FRECUENCIAS
+
+DIMENSIONES = ("Bomba", "Producto")
+
+
+def _periodos(dias, frecuencia):
+    """Número de periodo (día, semana desde lunes o mes) de cada día."""
+    if frecuencia == "D":
+        return dias.astype("int64")
+    if frecuencia == "W":
+        # 1970-01-01 fue jueves: se desplaza para que las semanas empiecen en lunes
+        return (dias.astype("int64") + 3) // 7
+    if frecuencia == "M":
+        return dias.astype("datetime64[M]").astype("int64")
+    raise ValueError(f"Frecuencia no soportada: {frecuencia}")
+
+
+class CuboVentas:
+    """``ventas[día, bomba, producto]`` con índices de dimensión y acumulados por día."""
+
+    def __init__(self, dias, bombas, productos, ventas):
+        self.dias = np.asarray(dias, dtype="datetime64[D]")
+        self.bombas = np.asarray(bombas, dtype=object)
+        self.productos = np.asarray(productos, dtype=object)
+        self.ventas = np.asarray(ventas, dtype=np.float64)
+        self.ventas.setflags(write=False)
+        forma = (len(self.dias), len(self.bombas), len(self.productos))
+        if self.ventas.shape != forma:
+            raise ValueError(f"El cubo debe tener forma {forma}, no {self.ventas.shape}")
+        self._acumulado = np.concatenate([np.zeros((1, *forma[1:])), np.cumsum(self.ventas, axis=0)])
+        self._periodos = {f: _periodos(self.dias, f) for f in FRECUENCIAS}
+
+    def __len__(self):
+        return len(self.dias)
+
+    @classmethod
+    def desde_df(cls, df, columna="Venta Soles"):
+        """Cubo desde un ``df_bombas`` (``Fecha``, ``Bomba``, ``Producto`` y ``columna``)."""
+        dias, i_dia = np.unique(df["Fecha"].to_numpy(dtype="datetime64[D]"), return_inverse=True)
+        bombas, i_bomba = np.unique(df["Bomba"].astype(str).to_numpy(), return_inverse=True)
+        productos, i_producto = np.unique(df["Producto"].astype(str).to_numpy(), return_inverse=True)
+        forma = (len(dias), len(bombas), len(productos))
+        # Una sola pasada: cada fila suma en su celda (índice plano)
+        plano = np.ravel_multi_index((i_dia, i_bomba, i_producto), forma)
+        montos = df[columna].to_numpy(dtype=np.float64).round(2)
+        ventas = np.bincount(plano, weights=montos, minlength=int(np.prod(forma))).reshape(forma)
+        return cls(dias, bombas, productos, ventas)
+
+    @classmethod
+    def desde_almacen(cls, almacen, tabla="bombas"):
+        return cls.desde_df(almacen.leer(tabla, columnas=["Fecha", "Bomba", "Producto", "Venta Soles"]))
+
+    @classmethod
+    def combinar(cls, cubos):
+        """Cubo consolidado de ``{estacion_id: CuboVentas}``.
+
+        Con varias estaciones las bombas se etiquetan ``estacion/bomba``
+        (la ``LADO-01`` de cada estación es un dispensador distinto).
+        """
+        cubos = {i: c for i, c in cubos.items() if len(c)}
+        if len(cubos) == 1:
+            return next(iter(cubos.values()))
+        if not cubos:
+            return cls([], [], [], np.zeros((0, 0, 0)))
+        dias = np.unique(np.concatenate([c.dias for c in cubos.values()]))
+        productos = np.unique(np.concatenate([c.productos for c in cubos.values()]).astype(str))
+        bombas = np.concatenate([[f"{i}/{b}" for b in c.bombas] for i, c in cubos.items()])
+        ventas = np.zeros((len(dias), len(bombas), len(productos)))
+        desplazamiento = 0
+        for cubo in cubos.values():
+            filas = np.searchsorted(dias, cubo.dias)
+            columnas = np.searchsorted(productos, cubo.productos.astype(str))
+            bloque = slice(desplazamiento, desplazamiento + len(cubo.bombas))
+            ventas[filas[:, None, None], np.arange(bloque.start, bloque.stop)[None, :, None],
+                   columnas[None, None, :]] += cubo.ventas
+            desplazamiento = bloque.stop
+        return cls(dias, bombas, productos, ventas)
+
+    # --- Consultas ---
+    def _posiciones(self, desde, hasta):
+        ini = 0 if desde is None else np.searchsorted(self.dias, np.datetime64(desde, "D"), side="left")
+        fin = len(self.dias) if hasta is None else np.searchsorted(self.dias, np.datetime64(hasta, "D"), side="right")
+        return ini, max(ini, fin)
+
+    def _indices(self, eje, seleccion):
+        etiquetas = self.bombas if eje == 1 else self.productos
+        if seleccion is None:
+            return np.arange(len(etiquetas))
+        return np.flatnonzero(np.isin(etiquetas, list(seleccion)))
+
+    def matriz(self, desde=None, hasta=None):
+        """Ventas del rango por bomba (filas) y producto (columnas)."""
+        ini, fin = self._posiciones(desde, hasta)
+        valores = self._acumulado[fin] - self._acumulado[ini]
+        return pd.DataFrame(valores, index=pd.Index(self.bombas, name="Bomba"),
+                            columns=pd.Index(self.productos, name="Producto"))
+
+    def serie(self, desde=None, hasta=None, frecuencia="D", por="Producto", productos=None, bombas=None):
+        """Ventas por periodo (filas) y miembro de ``por`` (columnas), con filtros opcionales.
+
+        Los periodos son días, semanas (lunes) o meses, recortados al rango.
+        """
+        if por not in DIMENSIONES:
+            raise ValueError(f"Dimensión desconocida: {por}")
+        ini, fin = self._posiciones(desde, hasta)
+        periodo = self._periodos[frecuencia][ini:fin]
+        cortes = ini + np.concatenate([[0], np.flatnonzero(np.diff(periodo)) + 1]) if len(periodo) else np.empty(0, dtype=int)
+        limites = np.append(cortes, fin)
+        # (periodos, bombas, productos) solo de los cortes: no se recorre cada día
+        bloques = self._acumulado[limites[1:]] - self._acumulado[limites[:-1]]
+        bloques = bloques[:, self._indices(1, bombas)][:, :, self._indices(2, productos)]
+        if por == "Producto":
+            valores, columnas = bloques.sum(axis=1), self.productos[self._indices(2, productos)]
+        else:
+            valores, columnas = bloques.sum(axis=2), self.bombas[self._indices(1, bombas)]
+        return pd.DataFrame(valores, index=pd.Index(self.dias[cortes].astype(object), name="Fecha"),
+                            columns=pd.Index(columnas, name=por))
+
+    def participacion(self, desde=None, hasta=None, frecuencia="W", por="Producto", **filtros):
+        """Como ``serie`` pero en % del total de cada periodo (mezcla de productos o bombas)."""
+        serie = self.serie(desde, hasta, frecuencia, por, **filtros)
+        totales = serie.sum(axis=1).to_numpy()
+        return serie.div(np.where(totales == 0, 1, totales), axis=0) * 100
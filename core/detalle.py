@@ -0,0 +1,63 @@
+# core/detalle.py
+"""Búsqueda por fecha del detalle de contómetros (pestaña "Detalle por Dispensador").
+
+En lugar de ``df_bombas[df_bombas['Fecha'] == fecha]`` (recorrido completo en
+cada rerun), las filas se ordenan por fecha una sola vez y se guardan los
+límites de cada día: elegir un día es una búsqueda binaria y un slice.
+"""
+import calendar
+from datetime import date
+from functools import lru_cache
+
+import numpy as np
+
+
+class BloquesPorDia:
+    """DataFrame ordenado por ``Fecha`` con el rango de filas de cada día precomputado."""
+
+    def __init__(self, df, columna="Fecha"):
+        self.df = df.sort_values(columna, kind="stable").reset_index(drop=True)
+        dias = self.df[columna].to_numpy(dtype="datetime64[D]")
+        self.dias, self._inicios = np.unique(dias, return_index=True)
+        self._fines = np.append(self._inicios[1:], len(self.df))
+
+    def dia(self, fecha):
+        """Filas de ``fecha`` (vacío si no hay datos de ese día)."""
+        objetivo = np.datetime64(fecha, "D")
+        pos = np.searchsorted(self.dias, objetivo)
+        if pos == len(self.dias) or self.dias[pos] != objetivo:
+            return self.df.iloc[0:0]
+        return self.df.iloc[self._inicios[pos]:self._fines[pos]]
+
+
+class DetalleDispensadores:
+    """Detalle por día leído del almacén Parquet, un mes a la vez.
+
+    Los meses cargados (ya indexados por día) y los DataFrames de detalle ya
+    armados se guardan en LRUs, así que volver a un día visto no lee ni filtra.
+    """
+
+    def __init__(self, almacen, columnas, tabla="bombas", meses_en_cache=6, dias_en_cache=64):
+        self.almacen = almacen
+        self.tabla = tabla
+        self.columnas = list(columnas)
+        self._mes = lru_cache(maxsize=meses_en_cache)(self._cargar_mes)
+        self._dia = lru_cache(maxsize=dias_en_cache)(self._armar_dia)
+
+    def _cargar_mes(self, anio, mes):
+        desde = date(anio, mes, 1)
+        hasta = date(anio, mes, calendar.monthrange(anio, mes)[1])
+        return BloquesPorDia(self.almacen.leer(self.tabla, desde, hasta, columnas=["Fecha", *self.columnas]))
+
+    def _armar_dia(self, fecha):
+        filas = self._mes(fecha.year, fecha.month).dia(fecha)
+        return filas[self.columnas].reset_index(drop=True)
+
+    def dia(self, fecha):
+        """Detalle de ``fecha`` con las columnas configuradas (no modificar: se comparte entre reruns)."""
+        return self._dia(fecha)
+
+    def limpiar(self):
+        """Descarta las LRUs (por ejemplo, después de escribir en el almacén)."""
+        self._mes.cache_clear()
+        self._dia.cache_clear()
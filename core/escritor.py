@@ -0,0 +1,254 @@
+# core/escritor.py
+"""Escritor en segundo plano: encola mutaciones y las envía a Firestore por lotes.
+
+La página solo llama a ``encolar`` y recibe la confirmación al instante; un
+hilo aparte agrupa las mutaciones en ``WriteBatch`` de hasta 500 operaciones
+(límite de Firestore) y reintenta con backoff exponencial si falla la red.
+
+Cada mutación se anota antes en un journal local (JSON por línea). Si el
+servidor se reinicia con escrituras pendientes, se reenvían al arrancar.
+Las mutaciones son idempotentes (``set``/``update`` sobre IDs generados en
+el cliente), así que reenviar una ya aplicada no duplica datos. El journal
+se compacta al arrancar y cada ``compactar_cada`` registros.
+
+Una mutación que Firestore rechaza de forma permanente se descarta (no se
+reintenta), se registra en el logger ``grifo.escritor`` y en ``rechazadas``,
+y se avisa a los oyentes de ``al_rechazar`` (el caché la revierte).
+"""
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+
+from google.api_core import exceptions as gexc
+
+from core.instrumentacion import cronometrado
+from core.rutas import CARPETA_DATOS
+from core.serializacion import a_json, de_json
+
+logger = logging.getLogger("grifo.escritor")
+
+RUTA_JOURNAL = CARPETA_DATOS / "journal" / "escrituras.jsonl"
+MAX_OPERACIONES_LOTE = 500
+COMPACTAR_CADA = 2000  # registros anotados en el journal entre compactaciones
+# Errores que no se arreglan reintentando (documento inexistente, datos inválidos...)
+ERRORES_PERMANENTES = (gexc.NotFound, gexc.InvalidArgument, gexc.PermissionDenied,
+                       gexc.FailedPrecondition, KeyError, ValueError, TypeError)
+
+
+def nuevo_id():
+    """ID de documento generado en el cliente (mismo formato que los auto-ID de Firestore)."""
+    return uuid.uuid4().hex[:20]
+
+
+def referencia(db, ruta):
+    """``DocumentReference`` para ``"coleccion/doc[/subcoleccion/doc...]"``."""
+    partes = ruta.strip("/").split("/")
+    if len(partes) % 2:
+        raise ValueError(f"La ruta '{ruta}' no apunta a un documento.")
+    ref = db.collection(partes[0]).document(partes[1])
+    for i in range(2, len(partes), 2):
+        ref = ref.collection(partes[i]).document(partes[i + 1])
+    return ref
+
+
+def mutacion_set(ruta, datos, merge=False):
+    return {"op": "set", "ruta": ruta, "datos": datos, "merge": merge}
+
+
+def mutacion_update(ruta, datos):
+    return {"op": "update", "ruta": ruta, "datos": datos}
+
+
+class EscritorLotes:
+    """Cola de escritura con journal en disco y envío por lotes en un hilo aparte."""
+
+    def __init__(self, db, ruta_journal=RUTA_JOURNAL, tamano_lote=MAX_OPERACIONES_LOTE,
+                 espera_lote=0.2, backoff_inicial=0.5, backoff_maximo=60.0, compactar_cada=COMPACTAR_CADA):
+        self.db = db
+        self.ruta_journal = Path(ruta_journal)
+        self.tamano_lote = min(tamano_lote, MAX_OPERACIONES_LOTE)
+        self.espera_lote = espera_lote
+        self.backoff_inicial = backoff_inicial
+        self.backoff_maximo = backoff_maximo
+        self.compactar_cada = compactar_cada
+
+        self._cola = queue.Queue()
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._pendientes = 0
+        self._vacio = threading.Condition(self._lock)
+        self.enviadas = 0
+        self.lotes = 0
+        self.ultimo_error = None
+        self.rechazadas = deque(maxlen=100)  # (mutación, error) más recientes
+        self._oyentes_rechazo = []
+        self._registros_journal = 0
+        self.compactaciones = 0
+
+        self.ruta_journal.parent.mkdir(parents=True, exist_ok=True)
+        for seq, mutacion in self._compactar():
+            self._seq = max(self._seq, seq)
+            self._pendientes += 1
+            self._cola.put((seq, mutacion))
+
+        self._hilo = threading.Thread(target=self._bucle, name="escritor-lotes", daemon=True)
+        self._hilo.start()
+
+    # --- Journal ---
+    def _compactar(self):
+        """Lee el journal, deja solo lo no confirmado y lo reescribe compactado.
+
+        Devuelve lo no confirmado. Se llama al arrancar (antes del hilo) o con
+        ``_lock`` tomado, así ninguna anotación queda a medio camino.
+        """
+        if not self.ruta_journal.exists():
+            return []
+        mutaciones, confirmado = {}, 0
+        with open(self.ruta_journal, encoding="utf-8") as f:
+            for linea in f:
+                try:
+                    registro = de_json(linea)
+                except ValueError:
+                    # Última línea cortada por una caída a mitad de escritura
+                    continue
+                if registro["t"] == "m":
+                    mutaciones[registro["seq"]] = registro["mut"]
+                elif registro["t"] == "ok":
+                    confirmado = max(confirmado, registro["hasta"])
+        pendientes = sorted((s, m) for s, m in mutaciones.items() if s > confirmado)
+        temporal = self.ruta_journal.with_suffix(".tmp")
+        with open(temporal, "w", encoding="utf-8") as f:
+            for seq, mutacion in pendientes:
+                f.write(a_json({"t": "m", "seq": seq, "mut": mutacion}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        temporal.replace(self.ruta_journal)
+        self._registros_journal = len(pendientes)
+        self.compactaciones += 1
+        return pendientes
+
+    def _anotar(self, registros):
+        with open(self.ruta_journal, "a", encoding="utf-8") as f:
+            for registro in registros:
+                f.write(a_json(registro) + "\n")
+                self._registros_journal += 1
+            f.flush()
+            os.fsync(f.fileno())
+
+    # --- API pública ---
+    def encolar(self, mutaciones):
+        """Anota las mutaciones en el journal y las deja en cola. Devuelve la última secuencia."""
+        with self._lock:
+            numeradas = []
+            for mutacion in mutaciones:
+                self._seq += 1
+                numeradas.append((self._seq, mutacion))
+            self._anotar({"t": "m", "seq": s, "mut": m} for s, m in numeradas)
+            self._pendientes += len(numeradas)
+            # Se encola dentro del lock para que la cola respete el orden de secuencia
+            for item in numeradas:
+                self._cola.put(item)
+        return numeradas[-1][0] if numeradas else self._seq
+
+    def pendientes(self):
+        with self._lock:
+            return self._pendientes
+
+    def al_rechazar(self, funcion):
+        """Registra ``funcion(mutacion, error)``, llamada (desde el hilo de envío) por cada rechazo permanente."""
+        self._oyentes_rechazo.append(funcion)
+
+    def esperar(self, timeout=None):
+        """Bloquea hasta que no queden mutaciones pendientes (útil en pruebas y al apagar)."""
+        with self._vacio:
+            return self._vacio.wait_for(lambda: self._pendientes == 0, timeout)
+
+    # --- Hilo de envío ---
+    def _tomar_lote(self):
+        lote = [self._cola.get()]
+        limite = time.monotonic() + self.espera_lote
+        while len(lote) < self.tamano_lote:
+            restante = limite - time.monotonic()
+            try:
+                lote.append(self._cola.get(timeout=max(restante, 0.001)))
+            except queue.Empty:
+                break
+        return lote
+
+    @cronometrado("firestore: commit de lote")
+    def _enviar(self, lote):
+        batch = self.db.batch()
+        for _, mutacion in lote:
+            ref = referencia(self.db, mutacion["ruta"])
+            if mutacion["op"] == "set":
+                batch.set(ref, mutacion["datos"], merge=mutacion.get("merge", False))
+            elif mutacion["op"] == "update":
+                batch.update(ref, mutacion["datos"])
+            else:
+                raise ValueError(f"Operación desconocida: {mutacion['op']}")
+        batch.commit()
+
+    def _enviar_con_reintentos(self, lote):
+        """Envía ``lote`` reintentando los errores transitorios con backoff exponencial.
+
+        Si el lote falla por un error permanente, se envía mutación por
+        mutación para aislar la que falla y no bloquear la cola con ella.
+        """
+        espera = self.backoff_inicial
+        while True:
+            try:
+                self._enviar(lote)
+                self.ultimo_error = None
+                return
+            except ERRORES_PERMANENTES as e:
+                if len(lote) == 1:
+                    self._rechazar(lote[0][1], e)
+                    return
+                for item in lote:
+                    self._enviar_con_reintentos([item])
+                return
+            except Exception as e:
+                self.ultimo_error = e
+                time.sleep(espera)
+                espera = min(espera * 2, self.backoff_maximo)
+
+    def _rechazar(self, mutacion, error):
+        """Descarta una mutación que Firestore no aceptará nunca y avisa a los oyentes."""
+        logger.error("escritura rechazada op=%s ruta=%s error=%r", mutacion["op"], mutacion["ruta"], error)
+        self.rechazadas.append((mutacion, repr(error)))
+        for funcion in self._oyentes_rechazo:
+            try:
+                funcion(mutacion, error)
+            except Exception:
+                logger.exception("fallo al procesar el rechazo de %s", mutacion["ruta"])
+
+    def _bucle(self):
+        while True:
+            lote = self._tomar_lote()
+            self._enviar_con_reintentos(lote)
+            with self._lock:
+                self._anotar([{"t": "ok", "hasta": lote[-1][0]}])
+                if self._registros_journal >= self.compactar_cada:
+                    self._compactar()
+                self._pendientes -= len(lote)
+                self.enviadas += len(lote)
+                self.lotes += 1
+                self._vacio.notify_all()
+
+
+_escritor = None
+_escritor_lock = threading.Lock()
+
+
+def escritor_compartido(db):
+    """Un único ``EscritorLotes`` por proceso (todas las páginas comparten cola y journal)."""
+    global _escritor
+    with _escritor_lock:
+        if _escritor is None:
+            _escritor = EscritorLotes(db)
+        return _escritor
@@ -0,0 +1,87 @@
+# core/esquema.py
+"""Tipos compactos de las tablas de Reportes (``diario`` y ``bombas``).
+
+En memoria (pandas):
+
+- ``Fecha``: ``datetime64[s]`` (8 bytes por fila, no un objeto ``date``).
+- ``Estacion``, ``Bomba``, ``Producto``: categóricas (códigos ``int8``).
+- Montos: ``float32``. Representa al céntimo montos de hasta S/ 167.772
+  por fila, de sobra para una bomba o un día de estación; las sumas
+  (``core/rollup.py``) se acumulan en ``float64``.
+
+En disco (Parquet) ``Fecha`` queda como ``date32`` (el almacén filtra por
+fecha) y las categóricas como ``dictionary``.
+
+Los DataFrames compactos se comparten entre sesiones (``st.cache_resource``)
+sin copiarlos: son de solo lectura. Las páginas derivan frames nuevos
+(``assign``, filtros, ``astype``) y nunca los modifican en su lugar. Este
+módulo no cambia opciones globales de pandas al importarse.
+"""
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+COLUMNAS_MONTO = {"Venta Bruta", "Gastos", "Vales", "Saldo Neto", "Venta Soles"}
+COLUMNAS_CATEGORIA = {"Estacion", "Bomba", "Producto"}
+
+TIPO_FECHA = "datetime64[s]"
+TIPO_MONTO = np.float32
+
+
+def _tipo(columna):
+    if columna == "Fecha":
+        return TIPO_FECHA
+    if columna in COLUMNAS_CATEGORIA:
+        return "category"
+    if columna in COLUMNAS_MONTO:
+        return TIPO_MONTO
+    return None
+
+
+def compactar(df):
+    """``df`` con los tipos compactos (las columnas desconocidas no se tocan)."""
+    tipos = {c: t for c in df.columns if (t := _tipo(c)) is not None}
+    if "Fecha" in tipos and df["Fecha"].dtype == object:
+        # Objetos ``date`` (p. ej. Parquet leído con ``date_as_object``)
+        df = df.assign(Fecha=pd.to_datetime(df["Fecha"]))
+    return df.astype(tipos)
+
+
+def esquema_parquet(df):
+    """Esquema Arrow de almacenamiento para las columnas de ``df``."""
+    campos = []
+    for columna in df.columns:
+        if columna == "Fecha":
+            tipo = pa.date32()
+        elif columna in COLUMNAS_CATEGORIA:
+            tipo = pa.dictionary(pa.int8(), pa.string())
+        elif columna in COLUMNAS_MONTO:
+            tipo = pa.float32()
+        else:
+            tipo = pa.Schema.from_pandas(df[[columna]], preserve_index=False).field(columna).type
+        campos.append(pa.field(columna, tipo))
+    return pa.schema(campos)
+
+
+def a_arrow(df):
+    """Tabla Arrow con el esquema de almacenamiento."""
+    # Categorías siempre como texto (p. ej. ``Estacion`` numérica del generador)
+    df = df.astype({c: str for c in df.columns if c in COLUMNAS_CATEGORIA})
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    return tabla.cast(esquema_parquet(df))
+
+
+def desde_arrow(tabla):
+    """DataFrame compacto desde una tabla leída del almacén."""
+    return compactar(tabla.to_pandas(date_as_object=False))
+
+
+def para_mostrar(df):
+    """Copia para la interfaz: montos en ``float64`` redondeados al céntimo."""
+    montos = [c for c in df.columns if c in COLUMNAS_MONTO]
+    return df.astype({c: np.float64 for c in montos}).round({c: 2 for c in montos})
+
+
+def bytes_por_fila(df):
+    """Memoria real (incluye objetos Python) por fila de ``df``."""
+    return df.memory_usage(index=False, deep=True).sum() / max(len(df), 1)
@@ -0,0 +1,97 @@
+# core/estaciones.py
+"""Configuración de estaciones (grifos): contómetros, módulos y personal.
+
+Se lee de ``config/estaciones.toml`` (otra ruta con ``GRIFO_ESTACIONES``). Cada estación guarda sus datos en sus
+propias subcolecciones de Firestore (``stations/<id>/<colección>``), así
+ninguna consulta recorre los datos de todas las estaciones.
+"""
+import os
+import tomllib
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+
+from core.planilla import ReglasPlanilla
+
+RUTA_CONFIG = Path(os.environ.get(
+    "GRIFO_ESTACIONES", Path(__file__).resolve().parent.parent / "config" / "estaciones.toml"))
+
+
+@dataclass(frozen=True)
+class Estacion:
+    id: str
+    nombre: str
+    n_bombas: int = 22
+    modulos: tuple = (("MÓDULO 1", 0, 8), ("MÓDULO 2", 8, 16), ("MÓDULO 3", 16, 22))
+    jefes: tuple = ()
+    griferos: tuple = field(default=())  # (nombre, turno)
+    colecciones_raiz: bool = False
+    max_galones_turno: float = 3000.0  # más galones por contómetro en un turno = lectura sospechosa
+    planilla: ReglasPlanilla = ReglasPlanilla()  # reglas del rol de turnos y la planilla
+
+    def coleccion(self, nombre):
+        """Ruta de la colección ``nombre`` para esta estación."""
+        return nombre if self.colecciones_raiz else f"stations/{self.id}/{nombre}"
+
+    def ids_bombas(self):
+        return [f"D-{i:02d}" for i in range(1, self.n_bombas + 1)]
+
+
+def _desde_dict(datos):
+    modulos = tuple((m["nombre"], int(m["desde"]), int(m["hasta"])) for m in datos.get("modulos", ()))
+    n_bombas = int(datos.get("n_bombas", 22))
+    if modulos and (modulos[0][1] != 0 or modulos[-1][2] != n_bombas):
+        raise ValueError(f"Los módulos de la estación '{datos['id']}' no cubren sus {n_bombas} contómetros.")
+    return Estacion(
+        id=datos["id"],
+        nombre=datos.get("nombre", datos["id"]),
+        n_bombas=n_bombas,
+        modulos=modulos or (("MÓDULO 1", 0, n_bombas),),
+        jefes=tuple(datos.get("jefes", ())),
+        griferos=tuple((g["nombre"], g.get("turno", "")) for g in datos.get("griferos", ())),
+        colecciones_raiz=bool(datos.get("colecciones_raiz", False)),
+        max_galones_turno=float(datos.get("max_galones_turno", 3000.0)),
+        planilla=ReglasPlanilla.desde_dict(datos.get("planilla", {})),
+    )
+
+
+@lru_cache(maxsize=None)
+def cargar_estaciones(ruta=RUTA_CONFIG):
+    """Estaciones configuradas, en el orden del archivo."""
+    with open(ruta, "rb") as f:
+        config = tomllib.load(f)
+    estaciones = tuple(_desde_dict(e) for e in config.get("estacion", ()))
+    if not estaciones:
+        raise ValueError(f"No hay estaciones configuradas en {ruta}.")
+    return estaciones
+
+
+def obtener_estacion(estacion_id=None):
+    """Estación por ID (la primera configurada si no se indica)."""
+    estaciones = cargar_estaciones()
+    if estacion_id is None:
+        return estaciones[0]
+    for estacion in estaciones:
+        if estacion.id == estacion_id:
+            return estacion
+    raise KeyError(f"Estación desconocida: {estacion_id}")
+
+
+def selector_estacion(etiqueta="Estación", key="estacion_id", incluir_consolidado=False):
+    """Selector de estación en la página; devuelve la ``Estacion`` elegida.
+
+    Con ``incluir_consolidado`` se agrega la opción "Consolidado" (devuelve
+    ``None``). Con una sola estación configurada no se muestra el selector.
+    """
+    import streamlit as st
+
+    estaciones = cargar_estaciones()
+    opciones = [e.id for e in estaciones]
+    if incluir_consolidado and len(opciones) > 1:
+        opciones.insert(0, None)
+    if len(opciones) == 1:
+        return estaciones[0]
+    nombres = {e.id: e.nombre for e in estaciones}
+    elegida = st.selectbox(etiqueta, opciones, key=key,
+                           format_func=lambda i: "🌐 Consolidado" if i is None else nombres[i])
+    return None if elegida is None else obtener_estacion(elegida)
@@ -0,0 +1,196 @@
+# core/exportar.py
+"""Exportación por lotes de rangos de auditoría a CSV, Excel (XLSX) o Parquet.
+
+Los datos se leen del almacén en lotes (``AlmacenVentas.iterar``) y cada
+lote se escribe al archivo de salida antes de leer el siguiente: la memoria
+depende del tamaño del lote, no del rango. La exportación corre en un hilo
+de fondo; la página consulta ``progreso`` y, al terminar, ofrece el archivo
+con ``st.download_button``.
+
+XLSX usa ``openpyxl`` en modo ``write_only`` (filas directo a disco). Excel
+admite 1.048.576 filas por hoja: al llegar al límite se abre otra hoja.
+"""
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+# formato -> (nombre visible, tipo MIME)
+FORMATOS = {
+    "csv": ("CSV", "text/csv"),
+    "xlsx": ("Excel", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "parquet": ("Parquet", "application/vnd.apache.parquet"),
+}
+TAMANO_LOTE = 50_000
+FILAS_POR_HOJA = 1_048_575  # 1.048.576 menos la cabecera
+
+
+def _normalizar(tabla):
+    """Mismo esquema en todos los lotes y montos legibles en cualquier formato.
+
+    Las categóricas (``dictionary``) pasan a su tipo de valores y los montos
+    ``float32`` del almacén a ``float64`` redondeado al céntimo.
+    """
+    campos = [pa.field(f.name, f.type.value_type) if pa.types.is_dictionary(f.type) else f for f in tabla.schema]
+    tabla = tabla.cast(pa.schema(campos))
+    for i, campo in enumerate(tabla.schema):
+        if pa.types.is_float32(campo.type):
+            tabla = tabla.set_column(i, campo.name, pc.round(tabla.column(i).cast(pa.float64()), 2))
+    return tabla
+
+
+class _SalidaCSV:
+    def __init__(self, ruta):
+        self._ruta = ruta
+        self._writer = None
+
+    def escribir(self, tabla):
+        if self._writer is None:
+            self._writer = pacsv.CSVWriter(str(self._ruta), tabla.schema)
+        self._writer.write_table(tabla)
+
+    def cerrar(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+class _SalidaParquet:
+    def __init__(self, ruta):
+        self._ruta = ruta
+        self._writer = None
+
+    def escribir(self, tabla):
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(str(self._ruta), tabla.schema)
+        self._writer.write_table(tabla)
+
+    def cerrar(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+class _SalidaXLSX:
+    def __init__(self, ruta):
+        try:
+            from openpyxl import Workbook
+        except ImportError as e:
+            raise RuntimeError("La exportación a Excel necesita 'openpyxl' (pip install openpyxl).") from e
+        self._ruta = ruta
+        self._libro = Workbook(write_only=True)
+        self._hoja = None
+        self._filas_hoja = 0
+
+    def _nueva_hoja(self, columnas):
+        self._hoja = self._libro.create_sheet(f"Datos {len(self._libro.worksheets) + 1}")
+        self._hoja.append(columnas)
+        self._filas_hoja = 0
+
+    def escribir(self, tabla):
+        if self._hoja is None:
+            self._nueva_hoja(tabla.column_names)
+        for lote in tabla.to_batches():
+            for fila in zip(*(c.to_pylist() for c in lote.columns)):
+                if self._filas_hoja >= FILAS_POR_HOJA:
+                    self._nueva_hoja(tabla.column_names)
+                self._hoja.append(fila)
+                self._filas_hoja += 1
+
+    def cerrar(self):
+        if self._hoja is None:
+            self._libro.create_sheet("Datos 1")
+        self._libro.save(str(self._ruta))
+
+
+_SALIDAS = {"csv": _SalidaCSV, "xlsx": _SalidaXLSX, "parquet": _SalidaParquet}
+
+
+class TrabajoExportacion:
+    """Exporta ``tabla`` entre ``desde`` y ``hasta`` en un hilo de fondo.
+
+    ``fuentes`` es ``{estacion_id: AlmacenVentas}``; con más de una estación
+    se agrega la columna ``Estacion``. El archivo queda en un temporal
+    (``ruta``) hasta que se llama a ``limpiar``.
+    """
+
+    def __init__(self, fuentes, tabla, desde, hasta, formato, columnas=None,
+                 tamano_lote=TAMANO_LOTE, directorio=None):
+        if formato not in _SALIDAS:
+            raise ValueError(f"Formato no soportado: {formato}")
+        self.fuentes = dict(fuentes)
+        self.tabla = tabla
+        self.desde, self.hasta = desde, hasta
+        self.formato = formato
+        self.columnas = columnas
+        self.tamano_lote = tamano_lote
+        self.nombre_archivo = f"{tabla}_{desde:%Y%m%d}_{hasta:%Y%m%d}.{formato}"
+        self.mime = FORMATOS[formato][1]
+
+        self.total = sum(a.contar(tabla, desde, hasta) for a in self.fuentes.values())
+        self.filas = 0
+        self.error = None
+        self._cancelar = threading.Event()
+        self._fin = threading.Event()
+
+        fd, ruta = tempfile.mkstemp(prefix="export_", suffix=f".{formato}", dir=directorio)
+        os.close(fd)
+        self.ruta = Path(ruta)
+        self._hilo = threading.Thread(target=self._ejecutar, daemon=True, name="exportacion")
+        self._hilo.start()
+
+    def _lotes(self):
+        varias = len(self.fuentes) > 1
+        for estacion_id, almacen in self.fuentes.items():
+            for lote in almacen.iterar(self.tabla, self.desde, self.hasta, self.columnas, self.tamano_lote):
+                lote = _normalizar(lote)
+                if varias:
+                    lote = lote.add_column(0, "Estacion", pa.repeat(pa.scalar(estacion_id), lote.num_rows))
+                yield lote
+
+    def _ejecutar(self):
+        try:
+            salida = _SALIDAS[self.formato](self.ruta)
+            try:
+                for lote in self._lotes():
+                    if self._cancelar.is_set():
+                        break
+                    salida.escribir(lote)
+                    self.filas += lote.num_rows
+            finally:
+                salida.cerrar()
+        except Exception as e:
+            self.error = e
+        finally:
+            self._fin.set()
+
+    # --- Estado ---
+    @property
+    def terminado(self):
+        return self._fin.is_set()
+
+    @property
+    def listo(self):
+        """Terminó bien y el archivo está completo."""
+        return self.terminado and self.error is None and not self._cancelar.is_set()
+
+    @property
+    def progreso(self):
+        if self.terminado:
+            return 1.0
+        return min(1.0, self.filas / self.total) if self.total else 0.0
+
+    def esperar(self, timeout=None):
+        return self._fin.wait(timeout)
+
+    def cancelar(self):
+        self._cancelar.set()
+
+    def limpiar(self):
+        """Cancela si sigue en curso y borra el archivo temporal."""
+        self.cancelar()
+        self._fin.wait(30)
+        self.ruta.unlink(missing_ok=True)
@@ -0,0 +1,96 @@
+# core/fragmentos.py
+"""Fragmentos (``st.fragment``) con dependencias explícitas y medición de tiempos.
+
+Cada sección de la página se declara como fragmento (con ``key=nombre``):
+un cambio dentro de él solo vuelve a ejecutar ese fragmento, no todo el
+script. Cuando un fragmento cambia datos que otros usan, llama a
+``marcar_cambio(nombre)``; los fragmentos que declararon
+``depende_de=(nombre, ...)`` solo recalculan si alguna de sus dependencias
+cambió. Desde el callback de un widget, ``refrescar(nombre)`` vuelve a
+ejecutar ese fragmento y, a continuación, los que dependen de él, sin
+refresco periódico ni rerun de toda la página.
+
+Cada ejecución se registra en el logger ``grifo.fragmentos`` con su duración
+y en la instrumentación de la página (``core/instrumentacion.py``).
+"""
+import logging
+import time
+from collections import deque
+from functools import wraps
+
+import streamlit as st
+
+from core.instrumentacion import instrumentacion_compartida, pagina_actual
+from core.render import medir_envio
+
+logger = logging.getLogger("grifo.fragmentos")
+
+_CLAVE_VERSIONES = "_versiones_fragmentos"
+_CLAVE_TIEMPOS = "_tiempos_fragmentos"
+_CLAVE_VISTAS = "_vistas_fragmentos"
+
+# {dependencia: {fragmento: None}} declarado con ``depende_de``, en orden de declaración
+_DEPENDIENTES = {}
+
+
+def _versiones():
+    return st.session_state.setdefault(_CLAVE_VERSIONES, {})
+
+
+def marcar_cambio(nombre):
+    """Indica que los datos del fragmento ``nombre`` cambiaron."""
+    versiones = _versiones()
+    versiones[nombre] = versiones.get(nombre, 0) + 1
+
+
+def refrescar(nombre):
+    """Desde un callback: marca el cambio y reejecuta ``nombre`` y sus dependientes.
+
+    Los dependientes corren después de ``nombre``, así ven lo que recalculó.
+    """
+    marcar_cambio(nombre)
+    st.rerun([nombre, *_DEPENDIENTES.get(nombre, ())])
+
+
+def version_de(dependencias):
+    versiones = _versiones()
+    return tuple(versiones.get(d, 0) for d in dependencias)
+
+
+def tiempos_recientes():
+    """Últimas ejecuciones de fragmentos de la sesión: ``(nombre, ms, recalculado)``."""
+    return list(st.session_state.get(_CLAVE_TIEMPOS, ()))
+
+
+def fragmento(nombre, depende_de=(), run_every=None):
+    """Decorador: convierte ``func`` en un ``st.fragment`` medido.
+
+    Si se indican dependencias, ``func`` recibe ``recalcular`` (``True`` la
+    primera vez o cuando alguna dependencia cambió desde la última ejecución).
+    """
+    def decorador(func):
+        for dependencia in depende_de:
+            _DEPENDIENTES.setdefault(dependencia, {})[nombre] = None
+
+        @st.fragment(run_every=run_every, key=nombre)
+        @wraps(func)
+        def envoltura(*args, **kwargs):
+            # En un rerun solo del fragmento se mide lo que él envía (core/render.py)
+            medir_envio(f"fragmento {nombre}")
+            inicio = time.perf_counter()
+            recalcular = True
+            if depende_de:
+                vistas = st.session_state.setdefault(_CLAVE_VISTAS, {})
+                actual = version_de(depende_de)
+                recalcular = vistas.get(nombre) != actual
+                vistas[nombre] = actual
+                kwargs["recalcular"] = recalcular
+            try:
+                return func(*args, **kwargs)
+            finally:
+                ms = (time.perf_counter() - inicio) * 1000
+                st.session_state.setdefault(_CLAVE_TIEMPOS, deque(maxlen=200)).append((nombre, ms, recalcular))
+                logger.info("fragmento=%s ms=%.2f recalculado=%s", nombre, ms, recalcular)
+                instrumentacion_compartida().registrar_tiempo(pagina_actual(), f"fragmento {nombre}", ms)
+        return envoltura
+    return decorador
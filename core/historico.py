@@ -0,0 +1,63 @@
+# core/historico.py
+"""Generador vectorizado de historial de ventas (data fake reproducible).
+
+Reemplaza el bucle fila por fila de ``generar_data_historica``: todas las
+columnas se generan como arreglos NumPy de una sola vez, con los tipos
+compactos de ``core/esquema.py``.
+"""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from core.esquema import compactar
+
+PRODUCTOS = ["90 Oct", "95 Oct", "Diesel"]
+N_BOMBAS = 22
+
+
+def generar_historico(fecha_inicio=date(2025, 10, 1), fecha_fin=date(2025, 12, 30),
+                      n_estaciones=1, n_bombas=N_BOMBAS, seed=None):
+    """Genera ``(df_diario, df_bombas)`` con las mismas columnas que usa Reportes.
+
+    - ``seed``: misma semilla => misma data en cada ejecución.
+    - ``n_estaciones`` > 1 agrega la columna ``Estacion`` a ambos DataFrames.
+    """
+    if fecha_fin < fecha_inicio:
+        raise ValueError("fecha_fin debe ser mayor o igual a fecha_inicio")
+
+    rng = np.random.default_rng(seed)
+    fechas = pd.date_range(fecha_inicio, fecha_fin, freq="D").date
+    n_dias = len(fechas)
+    n_filas = n_dias * n_estaciones
+
+    # --- Resumen diario (una fila por estación y día) ---
+    v_bruta = rng.uniform(5000, 20000, n_filas)
+    gastos = v_bruta * rng.uniform(0.02, 0.05, n_filas)
+    vales = v_bruta * rng.uniform(0.01, 0.04, n_filas)
+
+    col_fecha = np.tile(fechas, n_estaciones)
+    df_diario = pd.DataFrame({
+        "Fecha": col_fecha,
+        "Venta Bruta": np.round(v_bruta, 2),
+        "Gastos": np.round(gastos, 2),
+        "Vales": np.round(vales, 2),
+        "Saldo Neto": np.round(v_bruta - gastos - vales, 2),
+    })
+
+    # --- Detalle por contómetro (n_bombas filas por cada fila del resumen) ---
+    etiquetas = np.array([f"LADO-{b:02d}" for b in range(1, n_bombas + 1)], dtype=object)
+    codigos = rng.integers(0, len(PRODUCTOS), n_filas * n_bombas)
+    df_bombas = pd.DataFrame({
+        "Fecha": np.repeat(col_fecha, n_bombas),
+        "Bomba": np.tile(etiquetas, n_filas),
+        "Producto": pd.Categorical.from_codes(codigos, categories=PRODUCTOS),
+        "Venta Soles": np.repeat(np.round(v_bruta / n_bombas, 2), n_bombas),
+    })
+
+    if n_estaciones > 1:
+        estaciones = np.repeat(np.arange(1, n_estaciones + 1), n_dias)
+        df_diario.insert(0, "Estacion", estaciones)
+        df_bombas.insert(0, "Estacion", np.repeat(estaciones, n_bombas))
+
+    return compactar(df_diario), compactar(df_bombas)
@@ -0,0 +1,221 @@
+# core/instrumentacion.py
+"""Instrumentación liviana de las páginas: tiempos, aciertos de caché y log estructurado.
+
+- ``pagina(nombre)``: al inicio del script; agrupa lo medido en el rerun.
+- ``seccion(nombre)``: mide un bloque (carga de datos, sección de la página).
+- ``cronometrado(nombre)``: lo mismo como decorador (operaciones de Firestore).
+- ``con_cache(nombre, cache)``: memoriza una función con ``cache``
+  (``st.cache_data`` por defecto) y cuenta aciertos y fallos: el cuerpo de
+  la función solo corre en un fallo.
+- ``observar_lru(nombre, funcion)``: expone los contadores de un ``lru_cache``.
+
+Cada tiempo entra en una ventana móvil por (página, sección) en memoria del
+proceso, de donde salen p50/p95, y se escribe como una línea JSON en
+``data/instrumentacion.jsonl`` (logger ``grifo.instrumentacion``).
+``panel_instrumentacion()`` cierra la medición del rerun y muestra el
+resumen solo a administradores (o con ``GRIFO_PERFIL_INICIO=1``).
+"""
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+import numpy as np
+import streamlit as st
+
+from core.bootstrap import PERFIL_ACTIVO
+from core.rutas import CARPETA_DATOS
+
+RUTA_LOG = CARPETA_DATOS / "instrumentacion.jsonl"
+VENTANA = 500  # últimas mediciones por (página, sección)
+
+logger = logging.getLogger("grifo.instrumentacion")
+
+# Página del rerun en curso (cada sesión corre su script en su propio hilo);
+# lo medido fuera de una página (hilos de fondo) queda bajo "proceso"
+_pagina = ContextVar("pagina_instrumentada", default="proceso")
+_inicio_pagina = ContextVar("inicio_pagina", default=None)
+
+
+class Instrumentacion:
+    """Ventanas de tiempos y contadores de caché del proceso."""
+
+    def __init__(self, ruta_log=RUTA_LOG, ventana=VENTANA):
+        self.ventana = ventana
+        self._tiempos = {}  # (página, sección) -> deque de ms
+        self._cache = {}  # nombre -> [aciertos, fallos]
+        self._lrus = {}  # nombre -> función con cache_info()
+        self._base_lrus = {}  # nombre -> (aciertos, fallos) al último reinicio
+        self._lock = threading.Lock()
+        if ruta_log is not None and not logger.handlers:
+            Path(ruta_log).parent.mkdir(parents=True, exist_ok=True)
+            manejador = RotatingFileHandler(ruta_log, maxBytes=5_000_000, backupCount=3, encoding="utf-8")
+            manejador.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(manejador)
+            logger.setLevel(logging.INFO)
+
+    def _log(self, **evento):
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({"ts": round(time.time(), 3), **evento}, ensure_ascii=False))
+
+    # --- Registro ---
+    def registrar_tiempo(self, pagina, seccion, ms):
+        with self._lock:
+            ventana = self._tiempos.get((pagina, seccion))
+            if ventana is None:
+                ventana = self._tiempos[(pagina, seccion)] = deque(maxlen=self.ventana)
+            ventana.append(ms)
+        self._log(tipo="tiempo", pagina=pagina, seccion=seccion, ms=round(ms, 3))
+
+    def registrar_cache(self, nombre, acierto):
+        with self._lock:
+            contador = self._cache.setdefault(nombre, [0, 0])
+            contador[0 if acierto else 1] += 1
+        self._log(tipo="cache", pagina=_pagina.get(), nombre=nombre, acierto=acierto)
+
+    def observar_lru(self, nombre, funcion):
+        with self._lock:
+            self._lrus[nombre] = funcion
+
+    def reiniciar(self):
+        with self._lock:
+            self._tiempos.clear()
+            self._cache.clear()
+            # Los lru_cache no se vacían (son cachés en uso): se descuenta lo ya contado
+            self._base_lrus = {nombre: tuple(f.cache_info())[:2] for nombre, f in self._lrus.items()}
+
+    # --- Resumen ---
+    def resumen_tiempos(self):
+        """Filas ``{Página, Sección, n, p50 ms, p95 ms, máx ms}`` de las ventanas actuales."""
+        with self._lock:
+            ventanas = {clave: np.fromiter(v, dtype=np.float64) for clave, v in self._tiempos.items()}
+        filas = []
+        for (pagina, seccion), ms in sorted(ventanas.items()):
+            p50, p95 = np.percentile(ms, [50, 95])
+            filas.append({"Página": pagina, "Sección": seccion, "n": len(ms),
+                          "p50 ms": round(p50, 1), "p95 ms": round(p95, 1), "máx ms": round(ms.max(), 1)})
+        return filas
+
+    def resumen_cache(self):
+        """Filas ``{Caché, Aciertos, Fallos, % aciertos}`` (contadores propios y de ``lru_cache``)."""
+        with self._lock:
+            contadores = {nombre: tuple(c) for nombre, c in self._cache.items()}
+            for nombre, funcion in self._lrus.items():
+                info = funcion.cache_info()
+                base_aciertos, base_fallos = self._base_lrus.get(nombre, (0, 0))
+                contadores[nombre] = (info.hits - base_aciertos, info.misses - base_fallos)
+        filas = []
+        for nombre, (aciertos, fallos) in sorted(contadores.items()):
+            total = aciertos + fallos
+            filas.append({"Caché": nombre, "Aciertos": aciertos, "Fallos": fallos,
+                          "% aciertos": round(100 * aciertos / total, 1) if total else None})
+        return filas
+
+
+_instrumentacion = None
+_instrumentacion_lock = threading.Lock()
+
+
+def instrumentacion_compartida():
+    """Una única ``Instrumentacion`` por proceso, compartida por todas las páginas."""
+    global _instrumentacion
+    with _instrumentacion_lock:
+        if _instrumentacion is None:
+            _instrumentacion = Instrumentacion()
+        return _instrumentacion
+
+
+# --- Medición ---
+def pagina(nombre):
+    """Marca el inicio del rerun de la página ``nombre``."""
+    _pagina.set(nombre)
+    _inicio_pagina.set(time.perf_counter())
+
+
+def pagina_actual():
+    return _pagina.get()
+
+
+@contextmanager
+def seccion(nombre):
+    """Mide el bloque y lo registra bajo la página actual."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        instrumentacion_compartida().registrar_tiempo(_pagina.get(), nombre, (time.perf_counter() - inicio) * 1000)
+
+
+def cronometrado(nombre):
+    """Decorador: mide cada llamada a la función como la sección ``nombre``."""
+    def decorador(funcion):
+        @wraps(funcion)
+        def envoltura(*args, **kwargs):
+            with seccion(nombre):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+
+def con_cache(nombre, cache=None):
+    """Decorador: memoriza con ``cache`` (``st.cache_data`` por defecto) contando aciertos y fallos.
+
+    La llamada completa se mide como la sección ``nombre``.
+    """
+    def decorador(funcion):
+        fallo = threading.local()
+
+        @wraps(funcion)
+        def calcular(*args, **kwargs):
+            # Solo corre cuando el caché no tenía el resultado
+            fallo.ocurrio = True
+            return funcion(*args, **kwargs)
+
+        memorizada = (cache or st.cache_data)(calcular)
+
+        @wraps(funcion)
+        def envoltura(*args, **kwargs):
+            fallo.ocurrio = False
+            with seccion(nombre):
+                resultado = memorizada(*args, **kwargs)
+            instrumentacion_compartida().registrar_cache(nombre, acierto=not fallo.ocurrio)
+            return resultado
+
+        envoltura.clear = memorizada.clear
+        return envoltura
+    return decorador
+
+
+def observar_lru(nombre, funcion):
+    """Incluye los aciertos y fallos de ``funcion`` (un ``lru_cache``) en el resumen."""
+    instrumentacion_compartida().observar_lru(nombre, funcion)
+    return funcion
+
+
+# --- Panel ---
+def es_administrador():
+    return st.session_state.get("user_role") == "Administrador" or PERFIL_ACTIVO
+
+
+def panel_instrumentacion():
+    """Cierra la medición del rerun y, para administradores, muestra p50/p95 y cachés."""
+    inicio = _inicio_pagina.get()
+    if inicio is not None:
+        instrumentacion_compartida().registrar_tiempo(_pagina.get(), "rerun completo",
+                                                      (time.perf_counter() - inicio) * 1000)
+        _inicio_pagina.set(None)
+    if not es_administrador():
+        return
+    instrumentacion = instrumentacion_compartida()
+    with st.expander("🩺 Rendimiento (p50 / p95 por página y sección)"):
+        st.dataframe(instrumentacion.resumen_tiempos(), hide_index=True, use_container_width=True)
+        st.dataframe(instrumentacion.resumen_cache(), hide_index=True, use_container_width=True)
+        if st.button("Reiniciar métricas", key="_reiniciar_instrumentacion"):
+            instrumentacion.reiniciar()
+            st.rerun()
@@ -0,0 +1,239 @@
+# core/journal_turno.py
+"""Diario local (SQLite en modo WAL) del turno en curso de cada estación.
+
+Cada cambio del turno (una lectura L. FINAL, un gasto, un vale) se agrega
+como un delta pequeño. Abrir la página reconstruye el estado con la foto
+base del turno más los deltas posteriores (O(cambios)), así que un
+reinicio del servidor, una reconexión u otro dispositivo retoman el turno
+donde quedó. Al cerrar el turno los deltas se compactan en una foto.
+
+Cada sesión recuerda el último delta aplicado (``EstadoTurno.seq``) y en
+cada rerun solo aplica los deltas nuevos escritos por otros dispositivos.
+"""
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from core.rutas import CARPETA_DATOS
+
+RUTA_SQLITE = CARPETA_DATOS / "turnos.sqlite"
+
+
+class TurnoCerrado(ValueError):
+    """El turno ya se cerró: no admite más cambios."""
+
+
+@dataclass
+class EstadoTurno:
+    id: str
+    estacion_id: str
+    form_data: list
+    gastos: list = field(default_factory=list)
+    vales: list = field(default_factory=list)
+    seq: int = 0
+    cerrado: bool = False
+
+    def foto(self):
+        return {"form_data": self.form_data, "gastos": self.gastos, "vales": self.vales}
+
+
+def aplicar_delta(estado, tipo, datos):
+    """Aplica un delta al estado en memoria. Devuelve el índice de lectura cambiado (o ``None``)."""
+    if tipo == "final":
+        estado.form_data[datos["i"]]["final"] = datos["v"]
+        return datos["i"]
+    if tipo == "gasto":
+        estado.gastos.append(datos)
+    elif tipo == "vale":
+        estado.vales.append(datos)
+    else:
+        raise ValueError(f"Delta desconocido: {tipo}")
+    return None
+
+
+class JournalTurnos:
+    """Turnos y sus deltas en un archivo SQLite compartido por todas las sesiones."""
+
+    ESQUEMA = """
+    CREATE TABLE IF NOT EXISTS turnos (
+        id TEXT PRIMARY KEY, estacion TEXT NOT NULL, abierto REAL NOT NULL, cerrado REAL,
+        foto TEXT NOT NULL, seq_base INTEGER NOT NULL DEFAULT 0);
+    CREATE INDEX IF NOT EXISTS ix_turnos_estacion ON turnos (estacion, cerrado);
+    CREATE TABLE IF NOT EXISTS deltas (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT, turno TEXT NOT NULL, tipo TEXT NOT NULL, datos TEXT NOT NULL);
+    CREATE INDEX IF NOT EXISTS ix_deltas_turno ON deltas (turno, seq);
+    """
+
+    def __init__(self, ruta=RUTA_SQLITE):
+        if str(ruta) != ":memory:":
+            Path(ruta).parent.mkdir(parents=True, exist_ok=True)
+        self.conexion = sqlite3.connect(str(ruta), timeout=5, isolation_level=None, check_same_thread=False)
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.execute("PRAGMA synchronous=NORMAL")
+        self.conexion.executescript(self.ESQUEMA)
+        self._lock = threading.Lock()
+
+    def _transaccion(self, funcion, inmediata=False):
+        """Ejecuta ``funcion(conexion)`` en una transacción (lecturas consistentes entre sí).
+
+        ``inmediata`` toma el bloqueo de escritura desde el inicio: entre
+        procesos, las escrituras del diario quedan serializadas.
+        """
+        with self._lock:
+            self.conexion.execute("BEGIN IMMEDIATE" if inmediata else "BEGIN")
+            try:
+                resultado = funcion(self.conexion)
+                self.conexion.execute("COMMIT")
+            except Exception:
+                self.conexion.execute("ROLLBACK")
+                raise
+            return resultado
+
+    # --- Turnos ---
+    def turno_abierto(self, estacion_id):
+        filas = self._transaccion(lambda c: c.execute(
+            "SELECT id FROM turnos WHERE estacion = ? AND cerrado IS NULL ORDER BY abierto DESC LIMIT 1",
+            (estacion_id,)).fetchall())
+        return filas[0][0] if filas else None
+
+    def ultimo_cierre(self, estacion_id):
+        """Foto del último turno cerrado de la estación, con ``cierre_id`` y ``cerrado`` (epoch).
+
+        ``None`` si la estación aún no cerró ningún turno.
+        """
+        filas = self._transaccion(lambda c: c.execute(
+            "SELECT id, cerrado, foto FROM turnos WHERE estacion = ? AND cerrado IS NOT NULL "
+            "ORDER BY cerrado DESC LIMIT 1", (estacion_id,)).fetchall())
+        if not filas:
+            return None
+        turno_id, cerrado, foto = filas[0]
+        return {**json.loads(foto), "cierre_id": turno_id, "cerrado": cerrado}
+
+    def cierres(self, estacion_id, limite=60):
+        """``(cierre_id, foto)`` de los últimos ``limite`` turnos cerrados, del más reciente al más antiguo."""
+        filas = self._transaccion(lambda c: c.execute(
+            "SELECT id, foto FROM turnos WHERE estacion = ? AND cerrado IS NOT NULL "
+            "ORDER BY cerrado DESC LIMIT ?", (estacion_id, limite)).fetchall())
+        return [(turno_id, json.loads(foto)) for turno_id, foto in filas]
+
+    def abrir(self, estacion_id, turno_id, form_data):
+        """Turno abierto de la estación; si no hay, registra ``turno_id`` con ``form_data`` como foto base.
+
+        Dos dispositivos que abren la página a la vez retoman el mismo turno.
+        """
+        def operacion(c):
+            fila = c.execute("SELECT id FROM turnos WHERE estacion = ? AND cerrado IS NULL "
+                             "ORDER BY abierto DESC LIMIT 1", (estacion_id,)).fetchone()
+            if fila is not None:
+                return fila[0]
+            foto = json.dumps({"form_data": form_data, "gastos": [], "vales": []})
+            c.execute("INSERT INTO turnos (id, estacion, abierto, foto) VALUES (?, ?, ?, ?)",
+                      (turno_id, estacion_id, time.time(), foto))
+            return turno_id
+
+        return self._transaccion(operacion, inmediata=True)
+
+    @staticmethod
+    def _leer(c, turno_id, desde_seq=None):
+        """``(estacion, cerrado, foto, seq_base, deltas)``; deltas posteriores a ``desde_seq`` (o a la foto)."""
+        fila = c.execute("SELECT estacion, cerrado, foto, seq_base FROM turnos WHERE id = ?", (turno_id,)).fetchone()
+        if fila is None:
+            raise KeyError(f"Turno desconocido: {turno_id}")
+        desde = fila[3] if desde_seq is None else max(desde_seq, fila[3])
+        deltas = c.execute("SELECT seq, tipo, datos FROM deltas WHERE turno = ? AND seq > ? ORDER BY seq",
+                           (turno_id, desde)).fetchall()
+        return (*fila, deltas)
+
+    def _reconstruir(self, turno_id, leido):
+        estacion, cerrado, foto, seq_base, deltas = leido
+        foto = json.loads(foto)
+        estado = EstadoTurno(turno_id, estacion, foto["form_data"], foto["gastos"], foto["vales"],
+                             seq=seq_base, cerrado=cerrado is not None)
+        self._aplicar(estado, deltas)
+        return estado
+
+    @staticmethod
+    def _aplicar(estado, deltas):
+        cambiadas = set()
+        for seq, tipo, datos in deltas:
+            i = aplicar_delta(estado, tipo, json.loads(datos))
+            if i is not None:
+                cambiadas.add(i)
+            estado.seq = seq
+        return cambiadas
+
+    def estado(self, turno_id):
+        """Estado del turno: foto base + deltas posteriores."""
+        return self._reconstruir(turno_id, self._transaccion(lambda c: self._leer(c, turno_id)))
+
+    # --- Deltas ---
+    def _ponerse_al_dia(self, estado, leido):
+        """Aplica lo leído al estado en memoria; ``None`` si hubo que recargarlo entero."""
+        if leido[3] > estado.seq:
+            # Otro dispositivo compactó el turno: los deltas intermedios ya no existen
+            estado.__dict__.update(self._reconstruir(estado.id, leido).__dict__)
+            return None
+        cambiadas = self._aplicar(estado, leido[4])
+        estado.cerrado = leido[1] is not None
+        return cambiadas
+
+    def sincronizar(self, estado):
+        """Aplica al ``estado`` en memoria los deltas escritos por otras sesiones.
+
+        Devuelve los índices de lecturas que cambiaron, o ``None`` si el
+        turno se compactó mientras tanto y se recargó entero.
+        """
+        leido = self._transaccion(lambda c: self._leer(c, estado.id, estado.seq))
+        return self._ponerse_al_dia(estado, leido)
+
+    def registrar(self, estado, tipo, datos):
+        """Agrega un delta al diario y lo aplica al estado en memoria.
+
+        En la misma transacción se leen los deltas ajenos pendientes, así
+        ``estado.seq`` nunca salta un cambio de otro dispositivo. Devuelve
+        lo mismo que ``sincronizar``. Si el turno ya está cerrado (aquí o en
+        otro dispositivo) no se guarda nada: el estado se pone al día y se
+        lanza ``TurnoCerrado``.
+        """
+        def operacion(c):
+            leido = self._leer(c, estado.id, estado.seq)
+            if leido[1] is not None:
+                return leido, None
+            seq = c.execute("INSERT INTO deltas (turno, tipo, datos) VALUES (?, ?, ?)",
+                            (estado.id, tipo, json.dumps(datos))).lastrowid
+            return leido, seq
+
+        leido, seq = self._transaccion(operacion, inmediata=True)
+        cambiadas = self._ponerse_al_dia(estado, leido)
+        if seq is None:
+            raise TurnoCerrado(f"El turno {estado.id} ya está cerrado.")
+        aplicar_delta(estado, tipo, datos)
+        estado.seq = seq
+        return cambiadas
+
+    def cerrar(self, turno_id):
+        """Cierra el turno: la foto pasa a ser el estado final y se borran sus deltas."""
+        def operacion(c):
+            estado = self._reconstruir(turno_id, self._leer(c, turno_id))
+            c.execute("UPDATE turnos SET foto = ?, seq_base = ?, cerrado = COALESCE(cerrado, ?) WHERE id = ?",
+                      (json.dumps(estado.foto()), estado.seq, time.time(), turno_id))
+            c.execute("DELETE FROM deltas WHERE turno = ? AND seq <= ?", (turno_id, estado.seq))
+            estado.cerrado = True
+            return estado
+
+        return self._transaccion(operacion, inmediata=True)
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def journal_compartido():
+    """Diario de turnos del proceso (el archivo lo comparten todos los procesos del servidor)."""
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = JournalTurnos()
+        return _journal
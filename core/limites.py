@@ -0,0 +1,266 @@
+# core/limites.py
+"""Límite de intentos de login y bloqueo temporal por fuerza bruta.
+
+Tres controles, todos antes de tocar Firestore:
+
+- Token bucket de intentos por cliente (IP) y por cliente + DNI: un
+  atacante no agota los intentos del mismo DNI desde otra IP.
+- Bloqueo tras varios fallos de contraseña seguidos, por cliente + DNI: desde
+  otra IP no se bloquea la cuenta de nadie. Un segundo límite por DNI, más
+  alto, frena un ataque repartido entre muchas IPs; cada cliente le suma a
+  lo más ``fallos_para_bloqueo`` fallos por ventana antes de quedar bloqueado.
+- Caché negativo de DNIs inexistentes (no se vuelve a consultar el mismo DNI
+  desconocido durante un rato).
+
+El estado vive en un almacén acotado que descarta lo más viejo: en memoria
+del proceso, o en un archivo SQLite para compartirlo entre varios procesos
+del servidor.
+"""
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+from core.rutas import CARPETA_DATOS
+
+RUTA_SQLITE = CARPETA_DATOS / "limites.sqlite"
+# Proxies cuyo ``X-Forwarded-For`` se cree (IPs separadas por comas)
+PROXIES_CONFIABLES = frozenset(
+    ip.strip() for ip in os.environ.get("GRIFO_PROXIES_CONFIABLES", "127.0.0.1,::1").split(",") if ip.strip())
+
+
+def ip_cliente(ip_socket, x_forwarded_for, proxies_confiables=PROXIES_CONFIABLES):
+    """IP del cliente para el límite de intentos.
+
+    Si la conexión llega de un proxy de confianza (o sin IP de socket, como
+    detrás del proxy de Streamlit Community Cloud), la primera entrada de
+    ``X-Forwarded-For``, la que agregó el proxy de borde; si no, la IP del
+    socket, porque la cabecera la puede inventar el propio cliente.
+    """
+    if x_forwarded_for and (ip_socket is None or ip_socket in proxies_confiables):
+        primera = x_forwarded_for.split(",")[0].strip()
+        if primera:
+            return primera
+    return ip_socket
+
+
+def _recargar(tokens, actualizado, ahora, capacidad, por_segundo):
+    return min(capacidad, tokens + (ahora - actualizado) * por_segundo)
+
+
+class AlmacenMemoria:
+    """Estado en memoria del proceso, con tamaño máximo (LRU)."""
+
+    def __init__(self, max_claves=10_000):
+        self.max_claves = max_claves
+        self._baldes = OrderedDict()
+        self._marcas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _guardar(self, tabla, clave, valor):
+        tabla[clave] = valor
+        tabla.move_to_end(clave)
+        while len(tabla) > self.max_claves:
+            tabla.popitem(last=False)
+
+    def consumir(self, clave, capacidad, por_segundo, costo=1, ahora=None):
+        ahora = time.time() if ahora is None else ahora
+        with self._lock:
+            tokens, actualizado = self._baldes.get(clave, (capacidad, ahora))
+            tokens = _recargar(tokens, actualizado, ahora, capacidad, por_segundo)
+            permitido = tokens >= costo
+            if permitido:
+                tokens -= costo
+            self._guardar(self._baldes, clave, (tokens, ahora))
+        return permitido, 0.0 if permitido else (costo - tokens) / por_segundo
+
+    def disponibles(self, clave, capacidad, por_segundo, ahora=None):
+        ahora = time.time() if ahora is None else ahora
+        with self._lock:
+            tokens, actualizado = self._baldes.get(clave, (capacidad, ahora))
+        return _recargar(tokens, actualizado, ahora, capacidad, por_segundo)
+
+    def reiniciar(self, clave):
+        with self._lock:
+            self._baldes.pop(clave, None)
+
+    def marcar(self, clave, ttl, ahora=None):
+        ahora = time.time() if ahora is None else ahora
+        with self._lock:
+            self._guardar(self._marcas, clave, ahora + ttl)
+
+    def desmarcar(self, clave):
+        with self._lock:
+            self._marcas.pop(clave, None)
+
+    def marcado(self, clave, ahora=None):
+        ahora = time.time() if ahora is None else ahora
+        with self._lock:
+            vence = self._marcas.get(clave)
+            if vence is None:
+                return False
+            if vence <= ahora:
+                del self._marcas[clave]
+                return False
+            return True
+
+
+class AlmacenSQLite:
+    """Estado en un archivo SQLite (modo WAL), compartido entre procesos."""
+
+    ESQUEMA = """
+    CREATE TABLE IF NOT EXISTS baldes (clave TEXT PRIMARY KEY, tokens REAL, actualizado REAL);
+    CREATE INDEX IF NOT EXISTS ix_baldes_actualizado ON baldes (actualizado);
+    CREATE TABLE IF NOT EXISTS marcas (clave TEXT PRIMARY KEY, vence REAL);
+    """
+
+    def __init__(self, ruta=RUTA_SQLITE, max_claves=100_000, purgar_cada=500, antiguedad_maxima=86_400):
+        Path(ruta).parent.mkdir(parents=True, exist_ok=True)
+        self.conexion = sqlite3.connect(str(ruta), timeout=5, isolation_level=None, check_same_thread=False)
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.executescript(self.ESQUEMA)
+        self.max_claves = max_claves
+        self.purgar_cada = purgar_cada
+        self.antiguedad_maxima = antiguedad_maxima
+        self._operaciones = 0
+        self._lock = threading.Lock()
+
+    def _transaccion(self, funcion):
+        with self._lock:
+            self.conexion.execute("BEGIN IMMEDIATE")
+            try:
+                resultado = funcion(self.conexion)
+                self.conexion.execute("COMMIT")
+            except Exception:
+                self.conexion.execute("ROLLBACK")
+                raise
+            self._operaciones += 1
+            if self._operaciones % self.purgar_cada == 0:
+                self._purgar()
+            return resultado
+
+    def _purgar(self):
+        """Descarta estado viejo y, si aún sobra, los baldes menos recientes."""
+        ahora = time.time()
+        c = self.conexion
+        c.execute("DELETE FROM baldes WHERE actualizado < ?", (ahora - self.antiguedad_maxima,))
+        c.execute("DELETE FROM marcas WHERE vence < ?", (ahora,))
+        c.execute("""DELETE FROM baldes WHERE clave IN (
+                         SELECT clave FROM baldes ORDER BY actualizado DESC LIMIT -1 OFFSET ?)""",
+                  (self.max_claves,))
+
+    def consumir(self, clave, capacidad, por_segundo, costo=1, ahora=None):
+        ahora = time.time() if ahora is None else ahora
+
+        def operacion(c):
+            fila = c.execute("SELECT tokens, actualizado FROM baldes WHERE clave = ?", (clave,)).fetchone()
+            tokens = _recargar(*(fila or (capacidad, ahora)), ahora, capacidad, por_segundo)
+            permitido = tokens >= costo
+            if permitido:
+                tokens -= costo
+            c.execute("INSERT OR REPLACE INTO baldes (clave, tokens, actualizado) VALUES (?, ?, ?)",
+                      (clave, tokens, ahora))
+            return permitido, 0.0 if permitido else (costo - tokens) / por_segundo
+
+        return self._transaccion(operacion)
+
+    def disponibles(self, clave, capacidad, por_segundo, ahora=None):
+        ahora = time.time() if ahora is None else ahora
+        with self._lock:
+            fila = self.conexion.execute("SELECT tokens, actualizado FROM baldes WHERE clave = ?", (clave,)).fetchone()
+        return _recargar(*(fila or (capacidad, ahora)), ahora, capacidad, por_segundo)
+
+    def reiniciar(self, clave):
+        self._transaccion(lambda c: c.execute("DELETE FROM baldes WHERE clave = ?", (clave,)))
+
+    def marcar(self, clave, ttl, ahora=None):
+        ahora = time.time() if ahora is None else ahora
+        self._transaccion(lambda c: c.execute("INSERT OR REPLACE INTO marcas (clave, vence) VALUES (?, ?)",
+                                              (clave, ahora + ttl)))
+
+    def desmarcar(self, clave):
+        self._transaccion(lambda c: c.execute("DELETE FROM marcas WHERE clave = ?", (clave,)))
+
+    def marcado(self, clave, ahora=None):
+        ahora = time.time() if ahora is None else ahora
+        with self._lock:
+            fila = self.conexion.execute("SELECT vence FROM marcas WHERE clave = ?", (clave,)).fetchone()
+        return fila is not None and fila[0] > ahora
+
+
+@dataclass(frozen=True)
+class ReglasLogin:
+    intentos_por_dni: int = 10
+    intentos_por_cliente: int = 30
+    ventana_intentos: float = 300.0
+    fallos_para_bloqueo: int = 5
+    fallos_para_bloqueo_global: int = 50
+    ventana_fallos: float = 900.0
+    ttl_desconocidos: float = 600.0
+
+
+class LimitadorLogin:
+    """Decide si un intento de login puede llegar a consultar Firestore."""
+
+    def __init__(self, almacen=None, reglas=ReglasLogin()):
+        self.almacen = almacen or AlmacenMemoria()
+        self.reglas = reglas
+
+    def permitir(self, dni, cliente=None):
+        """``(permitido, mensaje)`` para un intento, antes de leer el empleado."""
+        r = self.reglas
+        if self.almacen.marcado(f"nx:{dni}"):
+            return False, "❌ Usuario no encontrado."
+
+        for clave, capacidad in self._bloqueos(dni, cliente):
+            if self.almacen.disponibles(clave, capacidad, capacidad / r.ventana_fallos) < 1:
+                espera = math.ceil(r.ventana_fallos / capacidad / 60)
+                return False, f"🔒 Cuenta bloqueada por intentos fallidos. Intenta de nuevo en {espera} min."
+
+        claves = [(f"dni:{cliente or ''}:{dni}", r.intentos_por_dni)]
+        if cliente:
+            claves.append((f"cli:{cliente}", r.intentos_por_cliente))
+        for clave, capacidad in claves:
+            permitido, espera = self.almacen.consumir(clave, capacidad, capacidad / r.ventana_intentos)
+            if not permitido:
+                return False, f"⏳ Demasiados intentos. Espera {math.ceil(espera)} s."
+        return True, ""
+
+    def registrar_desconocido(self, dni):
+        self.almacen.marcar(f"nx:{dni}", self.reglas.ttl_desconocidos)
+
+    def olvidar_desconocido(self, dni):
+        """El DNI ya tiene cuenta (p. ej. recién creada en Configuraciones): deja de rechazarse."""
+        self.almacen.desmarcar(f"nx:{dni}")
+
+    def _bloqueos(self, dni, cliente):
+        """Baldes de fallos: ``(clave, capacidad)`` del cliente + DNI y del DNI en total."""
+        r = self.reglas
+        return [(f"fallos:{cliente or ''}:{dni}", r.fallos_para_bloqueo),
+                (f"fallos:{dni}", r.fallos_para_bloqueo_global)]
+
+    def registrar_fallo(self, dni, cliente=None):
+        for clave, capacidad in self._bloqueos(dni, cliente):
+            self.almacen.consumir(clave, capacidad, capacidad / self.reglas.ventana_fallos)
+
+    def registrar_exito(self, dni, cliente=None):
+        for clave, _ in self._bloqueos(dni, cliente):
+            self.almacen.reiniciar(clave)
+
+
+_limitador = None
+_limitador_lock = threading.Lock()
+
+
+def limitador_compartido():
+    """Limitador del proceso; con ``GRIFO_LIMITES=sqlite`` el estado se comparte entre procesos."""
+    global _limitador
+    with _limitador_lock:
+        if _limitador is None:
+            almacen = AlmacenSQLite() if os.environ.get("GRIFO_LIMITES") == "sqlite" else AlmacenMemoria()
+            _limitador = LimitadorLogin(almacen)
+        return _limitador
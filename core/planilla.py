@@ -0,0 +1,231 @@
+# core/planilla.py
+"""Rol de turnos y planilla del personal de una estación, precalculados.
+
+El rol se genera de una vez para todo un periodo (por defecto el año en
+curso y el siguiente) a partir de reglas (``ReglasPlanilla``):
+
+- jefes: residencia por bloques de ``dias_rotacion`` días contados desde una
+  fecha ancla fija, así la rotación sigue de corrido al cambiar de año (no
+  se reinicia el 1 de enero como con ``tm_yday // 15``);
+- griferos: su turno base (de la configuración o repartido en orden), que
+  rota al siguiente cada ``rotar_turnos_cada`` días, y un día de descanso
+  semanal escalonado.
+
+El resultado son matrices ``días × personas`` (código de turno y horas). El
+día ``d`` está en la fila ``(d - inicio).days``, así que consultar una fecha
+es O(1), y la planilla de cualquier periodo (días trabajados, horas extra,
+viáticos, sueldo prorrateado por mes) es una suma vectorizada sobre un
+corte de filas.
+"""
+import calendar
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+JEFE = "Jefe Personal"
+GRIFERO = "Grifero"
+LIBRE = -1  # código de descanso / relevo
+RESIDENCIA = -2  # código del jefe en residencia
+
+
+@dataclass(frozen=True)
+class ReglasPlanilla:
+    dias_rotacion: int = 15
+    ancla_rotacion: date = date(2025, 1, 1)
+    turnos: tuple = (("🟢 Mañana", 8.0), ("🟡 Tarde/Noche", 8.0))  # (nombre, horas)
+    rotar_turnos_cada: int = 0  # días; 0 = cada grifero mantiene su turno
+    descanso_semanal: bool = True
+    horas_jornada: float = 8.0
+    horas_residencia: float = 12.0
+    sueldo_jefe: float = 1900.0
+    sueldo_grifero: float = 1500.0
+    # Por defecto el sueldo fijo ya incluye viáticos y no hay sobretasa por horas
+    # extra (como en la planilla anterior); una estación puede configurarlos
+    viatico_diario: float = 0.0
+    recargo_extra: float = 0.0  # sobretasa de las horas extra
+
+    @classmethod
+    def desde_dict(cls, datos):
+        """Reglas desde la tabla ``planilla`` de una estación (``config/estaciones.toml``)."""
+        datos = dict(datos)
+        if "turnos" in datos:
+            datos["turnos"] = tuple((t["nombre"], float(t.get("horas", 8))) for t in datos["turnos"])
+        if isinstance(datos.get("ancla_rotacion"), str):
+            datos["ancla_rotacion"] = date.fromisoformat(datos["ancla_rotacion"])
+        return cls(**datos)
+
+    def sueldo(self, cargo):
+        return self.sueldo_jefe if cargo == JEFE else self.sueldo_grifero
+
+
+@dataclass(frozen=True)
+class Persona:
+    nombre: str
+    cargo: str
+    turno: str | None = None  # turno base de un grifero
+    dni: str | None = None
+
+
+def personal_desde_config(estacion):
+    """Jefes y griferos de ``config/estaciones.toml``."""
+    return (tuple(Persona(nombre, JEFE) for nombre in estacion.jefes)
+            + tuple(Persona(nombre, GRIFERO, turno or None) for nombre, turno in estacion.griferos))
+
+
+def _cargo_de(rol):
+    rol = (rol or "").strip().lower()
+    if rol.startswith("jefe"):
+        return JEFE
+    if rol.startswith("grifero"):
+        return GRIFERO
+    return None
+
+
+def personal_desde_empleados(empleados, estacion):
+    """Jefes y griferos activos de la colección ``employees`` asignados a la estación.
+
+    Los empleados sin ``station_id`` se asignan a la estación de las
+    colecciones de nivel superior (la original).
+    """
+    personas = []
+    for emp in sorted(empleados, key=lambda e: (e.last_name, e.name, e.dni)):
+        cargo = _cargo_de(emp.role)
+        asignado = emp.station_id == estacion.id or (emp.station_id is None and estacion.colecciones_raiz)
+        if cargo is not None and emp.is_active and asignado:
+            personas.append(Persona(emp.nombre_completo.strip(), cargo, emp.turno or None, emp.dni))
+    # Jefes primero, como en la configuración
+    return tuple(sorted(personas, key=lambda p: p.cargo != JEFE))
+
+
+class RolPersonal:
+    """Rol precalculado de ``personal`` entre ``inicio`` y ``fin`` (inclusive)."""
+
+    def __init__(self, reglas, personal, inicio, fin):
+        if fin < inicio:
+            raise ValueError("fin debe ser mayor o igual a inicio")
+        self.reglas = reglas
+        self.personal = tuple(personal)
+        self.inicio, self.fin = inicio, fin
+        self.turnos = tuple(nombre for nombre, _ in reglas.turnos)
+        dias = np.arange(np.datetime64(inicio, "D"), np.datetime64(fin, "D") + 1)
+        self.dias = dias
+        self.codigo, self.horas = self._generar(dias)
+        self.codigo.setflags(write=False)
+        self.horas.setflags(write=False)
+        # Fracción de sueldo mensual que corresponde a cada día (1 / días del mes)
+        meses = dias.astype("datetime64[M]")
+        dias_mes = ((meses + 1).astype("datetime64[D]") - meses.astype("datetime64[D]")).astype(np.float64)
+        self._peso_dia = 1.0 / dias_mes
+
+    def _generar(self, dias):
+        reglas = self.reglas
+        n_dias, n_personas = len(dias), len(self.personal)
+        codigo = np.full((n_dias, n_personas), LIBRE, dtype=np.int8)
+        horas = np.zeros((n_dias, n_personas), dtype=np.float32)
+        desde_ancla = (dias - np.datetime64(reglas.ancla_rotacion, "D")).astype(np.int64)
+
+        jefes = [j for j, p in enumerate(self.personal) if p.cargo == JEFE]
+        if jefes:
+            # Bloques contados desde la ancla: continúan de un año al siguiente
+            en_residencia = np.asarray(jefes)[(desde_ancla // reglas.dias_rotacion) % len(jefes)]
+            filas = np.arange(n_dias)
+            codigo[filas, en_residencia] = RESIDENCIA
+            horas[filas, en_residencia] = reglas.horas_residencia
+
+        griferos = [j for j, p in enumerate(self.personal) if p.cargo == GRIFERO]
+        horas_turno = np.array([h for _, h in reglas.turnos], dtype=np.float32)
+        # 1970-01-01 fue jueves: lunes = 0, como date.weekday()
+        dia_semana = (dias.astype(np.int64) + 3) % 7
+        for orden, j in enumerate(griferos):
+            persona = self.personal[j]
+            base = self.turnos.index(persona.turno) if persona.turno in self.turnos else orden % len(self.turnos)
+            turno = np.full(n_dias, base, dtype=np.int64)
+            if reglas.rotar_turnos_cada:
+                turno = (turno + desde_ancla // reglas.rotar_turnos_cada) % len(self.turnos)
+            trabaja = np.ones(n_dias, dtype=bool)
+            if reglas.descanso_semanal:
+                # Descansos escalonados: cada grifero libra un día distinto de la semana
+                trabaja = dia_semana != orden % 7
+            codigo[trabaja, j] = turno[trabaja]
+            horas[trabaja, j] = horas_turno[turno[trabaja]]
+        return codigo, horas
+
+    # --- Consultas ---
+    def _fila(self, fecha):
+        fila = (fecha - self.inicio).days
+        if not 0 <= fila < len(self.dias):
+            raise KeyError(f"{fecha} está fuera del rol ({self.inicio} a {self.fin}).")
+        return fila
+
+    def _filas(self, desde, hasta):
+        return slice(self._fila(max(desde, self.inicio)), self._fila(min(hasta, self.fin)) + 1)
+
+    def nombre_turno(self, codigo):
+        if codigo == RESIDENCIA:
+            return "🏠 Residencia"
+        if codigo == LIBRE:
+            return "Descanso"
+        return self.turnos[codigo]
+
+    def dia(self, fecha):
+        """``{nombre: turno}`` del personal en ``fecha`` (O(1))."""
+        codigos = self.codigo[self._fila(fecha)]
+        return {p.nombre: self.nombre_turno(c) for p, c in zip(self.personal, codigos)}
+
+    def jefe_en_residencia(self, fecha):
+        """``(nombre, último día del bloque)`` del jefe en residencia en ``fecha``."""
+        fila = self._fila(fecha)
+        columnas = np.flatnonzero(self.codigo[fila] == RESIDENCIA)
+        if not len(columnas):
+            return None, None
+        desde_ancla = (fecha - self.reglas.ancla_rotacion).days
+        restantes = self.reglas.dias_rotacion - 1 - desde_ancla % self.reglas.dias_rotacion
+        return self.personal[columnas[0]].nombre, fecha + timedelta(days=int(restantes))
+
+    def calendario(self, desde, hasta):
+        """Tabla ``fechas × personas`` con el nombre del turno de cada día."""
+        filas = self._filas(desde, hasta)
+        nombres = np.array([self.nombre_turno(c) for c in (LIBRE, RESIDENCIA, *range(len(self.turnos)))],
+                           dtype=object)
+        # Códigos -1, -2, 0.. -> posiciones 0, 1, 2.. de ``nombres``
+        posiciones = np.where(self.codigo[filas] < 0, -self.codigo[filas] - 1, self.codigo[filas] + 2)
+        return pd.DataFrame(nombres[posiciones], columns=[p.nombre for p in self.personal],
+                            index=pd.Index(self.dias[filas].astype(object), name="Fecha"))
+
+    def planilla(self, desde, hasta):
+        """Planilla del periodo: días, horas, horas extra, sueldo prorrateado, viáticos y total."""
+        reglas = self.reglas
+        filas = self._filas(desde, hasta)
+        codigo, horas = self.codigo[filas], self.horas[filas].astype(np.float64)
+        sueldos = np.array([reglas.sueldo(p.cargo) for p in self.personal])
+        dias_trabajados = (codigo != LIBRE).sum(axis=0)
+        # La residencia del jefe tiene su propio horario: no cuenta como horas extra
+        horas_turno = np.where(codigo == RESIDENCIA, 0.0, horas)
+        horas_extra = np.maximum(horas_turno - reglas.horas_jornada, 0).sum(axis=0)
+        # Sueldo mensual prorrateado por día de cada mes: un mes completo paga el sueldo exacto
+        sueldo = sueldos * self._peso_dia[filas].sum()
+        valor_hora = sueldos / 30 / reglas.horas_jornada
+        pago_extra = horas_extra * valor_hora * (1 + reglas.recargo_extra)
+        viaticos = dias_trabajados * reglas.viatico_diario
+        return pd.DataFrame({
+            "Empleado": [p.nombre for p in self.personal],
+            "Cargo": [p.cargo for p in self.personal],
+            "Días trabajados": dias_trabajados,
+            "Horas": horas.sum(axis=0),
+            "Horas extra": horas_extra,
+            "Sueldo (S/)": sueldo.round(2),
+            "Horas extra (S/)": pago_extra.round(2),
+            "Viáticos (S/)": viaticos.round(2),
+            "Total (S/)": (sueldo + pago_extra + viaticos).round(2),
+        })
+
+
+def rango_de_rol(hoy):
+    """Periodo por defecto del rol: del 1 de enero del año en curso al 31 de diciembre del siguiente."""
+    return date(hoy.year, 1, 1), date(hoy.year + 1, 12, 31)
+
+
+def fin_de_mes(fecha):
+    return fecha.replace(day=calendar.monthrange(fecha.year, fecha.month)[1])
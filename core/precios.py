@@ -0,0 +1,121 @@
+# core/precios.py
+"""Resolución de precios con fecha de vigencia (``valid_from``).
+
+El historial de ``products`` se carga una vez en un índice por producto:
+fechas de vigencia ordenadas y sus precios. "Precio del producto X en el
+momento T" es una búsqueda binaria; los lotes (todas las ventas de un día)
+se resuelven con ``np.searchsorted`` en una sola llamada por producto.
+
+Las fechas se comparan como hora local de la estación, sin zona horaria:
+``valid_from`` se registra como fecha sin zona y así se interpreta.
+"""
+from datetime import datetime
+
+import numpy as np
+
+# Precios de respaldo si aún no hay historial registrado
+PRECIOS_POR_DEFECTO = {"DL": 14.0, "90": 14.0, "95": 15.0}
+# Nombres de producto usados en Reportes -> códigos de ``products``
+ALIAS_PRODUCTOS = {"90 Oct": "90", "95 Oct": "95", "Diesel": "DL"}
+
+
+def _hora_local(momento):
+    """``datetime64`` de la hora "de pared" (se descarta la zona horaria sin convertir)."""
+    if isinstance(momento, datetime) and momento.tzinfo is not None:
+        momento = momento.replace(tzinfo=None)
+    return np.datetime64(momento, "us")
+
+
+class ResolutorPrecios:
+    """Índice de intervalos de vigencia por producto."""
+
+    def __init__(self, historial=()):
+        """``historial``: tuplas ``(product_id, valid_from, price_per_gallon)``."""
+        self._fechas = {}
+        self._precios = {}
+        self._actuales = None
+        self._actuales_vencen = None
+        agrupado = {}
+        for producto, valid_from, precio in historial:
+            if valid_from is None:
+                continue
+            agrupado.setdefault(producto, []).append((_hora_local(valid_from), float(precio)))
+        for producto, filas in agrupado.items():
+            # Ante dos precios con la misma vigencia, el orden estable deja último al registrado después
+            filas.sort(key=lambda f: f[0])
+            self._fechas[producto] = np.array([f[0] for f in filas], dtype="datetime64[us]")
+            self._precios[producto] = np.array([f[1] for f in filas], dtype=np.float64)
+
+    @classmethod
+    def desde_precios(cls, precios):
+        """Construye el índice a partir de objetos ``Precio`` (ver ``core.cache_firestore``)."""
+        return cls((p.product_id, p.valid_from, p.price_per_gallon) for p in precios)
+
+    def productos(self):
+        return list(self._fechas)
+
+    def copia(self):
+        """Otro índice con los mismos precios (los arreglos no se modifican, se comparten)."""
+        nuevo = ResolutorPrecios()
+        nuevo._fechas, nuevo._precios = dict(self._fechas), dict(self._precios)
+        return nuevo
+
+    def agregar(self, producto, valid_from, precio):
+        """Inserta un precio nuevo en su posición e invalida los precios actuales."""
+        fechas = self._fechas.get(producto, np.empty(0, dtype="datetime64[us]"))
+        precios = self._precios.get(producto, np.empty(0, dtype=np.float64))
+        t = _hora_local(valid_from)
+        pos = np.searchsorted(fechas, t, side="right")
+        self._fechas[producto] = np.insert(fechas, pos, t)
+        self._precios[producto] = np.insert(precios, pos, float(precio))
+        self._actuales = None
+
+    def precio(self, producto, momento):
+        """Precio vigente de ``producto`` en ``momento`` (``None`` si no había precio)."""
+        fechas = self._fechas.get(producto)
+        if fechas is None:
+            return None
+        i = np.searchsorted(fechas, _hora_local(momento), side="right") - 1
+        return float(self._precios[producto][i]) if i >= 0 else None
+
+    def precios(self, producto, momentos):
+        """Precios de ``producto`` para un arreglo de momentos (``NaN`` donde no había precio)."""
+        momentos = np.asarray(momentos, dtype="datetime64[us]")
+        fechas = self._fechas.get(producto)
+        if fechas is None:
+            return np.full(momentos.shape, np.nan)
+        idx = np.searchsorted(fechas, momentos, side="right") - 1
+        resultado = self._precios[producto][np.clip(idx, 0, None)]
+        return np.where(idx >= 0, resultado, np.nan)
+
+    def precios_lote(self, productos, momentos):
+        """Precio de cada par ``(productos[i], momentos[i])``: una búsqueda vectorizada por producto."""
+        productos = np.asarray(productos, dtype=object)
+        momentos = np.asarray(momentos, dtype="datetime64[us]")
+        resultado = np.full(len(productos), np.nan)
+        for producto in np.unique(productos):
+            mascara = productos == producto
+            codigo = ALIAS_PRODUCTOS.get(producto, producto)
+            resultado[mascara] = self.precios(codigo, momentos[mascara])
+        return resultado
+
+    def actuales(self, ahora=None, respaldo=PRECIOS_POR_DEFECTO):
+        """Precio vigente de cada producto ``{product_id: precio}``.
+
+        Se guarda en caché hasta que se agregue un precio o llegue la
+        siguiente vigencia ya programada.
+        """
+        t = _hora_local(ahora or datetime.now())
+        if self._actuales is not None and (self._actuales_vencen is None or t < self._actuales_vencen):
+            return dict(self._actuales)
+
+        actuales = dict(respaldo)
+        proxima = None
+        for producto, fechas in self._fechas.items():
+            i = np.searchsorted(fechas, t, side="right")
+            if i > 0:
+                actuales[producto] = float(self._precios[producto][i - 1])
+            if i < len(fechas) and (proxima is None or fechas[i] < proxima):
+                proxima = fechas[i]
+        self._actuales, self._actuales_vencen = actuales, proxima
+        return dict(actuales)
@@ -0,0 +1,153 @@
+# core/render.py
+"""Estilos y bloques HTML compartidos por las páginas, y medición de lo enviado al navegador.
+
+- ``inyectar_css``: todo el CSS de la página en un solo elemento, armado y
+  minificado una vez por proceso. Como el texto es idéntico en cada rerun,
+  el navegador lo guarda en su caché de mensajes (``global.minCachedMessageSize``
+  en ``.streamlit/config.toml``) y en los reruns siguientes solo viaja una
+  referencia al mensaje ya recibido.
+- Filas de contómetros, tarjetas y el panel de cierre se arman como un
+  único fragmento HTML, memorizado por sus valores de entrada.
+- ``medir_envio`` cuenta elementos y bytes enviados en cada rerun (y en cada
+  rerun de fragmento); se registran en el logger ``grifo.render``.
+"""
+import logging
+import re
+from collections import deque
+from functools import lru_cache
+
+import streamlit as st
+
+from core.bootstrap import PERFIL_ACTIVO
+
+logger = logging.getLogger("grifo.render")
+
+# Oculta la navegación lateral (todas las páginas navegan con botones)
+CSS_SIN_SIDEBAR = """
+    [data-testid="stSidebar"], [data-testid="stSidebarNav"], button[data-testid="stSidebarToggle"] { display: none !important; }
+    [data-testid="stAppViewContainer"] { margin-left: 0px !important; }
+"""
+
+
+@lru_cache(maxsize=32)
+def _minificar(*bloques):
+    css = "\n".join(bloques)
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};:,>])\s*", r"\1", css)
+    return f"<style>{css.strip()}</style>"
+
+
+def inyectar_css(*bloques):
+    """Emite el CSS de la página como un solo elemento (texto estable entre reruns)."""
+    st.markdown(_minificar(*bloques), unsafe_allow_html=True)
+
+
+# --- Fragmentos HTML memorizados ---
+@lru_cache(maxsize=4096)
+def celdas_lectura(id_bomba, producto, inicio):
+    """ID, producto y L. INICIO de un contómetro en un solo bloque."""
+    return (f'<div class="fila-lectura"><b>{id_bomba}</b>'
+            f'<span class="txt-prod">{producto}</span><span>{int(inicio)}</span></div>')
+
+
+@lru_cache(maxsize=4096)
+def celdas_venta(galones, soles):
+    """Galones y soles de un contómetro en un solo bloque."""
+    return (f'<div class="fila-lectura"><span style="color:blue">{galones:,.2f}</span>'
+            f'<span class="txt-soles">S/ {soles:,.2f}</span></div>')
+
+
+@lru_cache(maxsize=256)
+def panel_cierre(venta_bruta, total_gastos, total_vales):
+    neto = venta_bruta - total_gastos - total_vales
+    return f"""
+        <div style="border:2px solid #000; padding:25px; text-align:center; background-color:#fff;">
+            <h2 style="margin:0;">CIERRE DE CAJA</h2>
+            <hr>
+            <h4 style="margin:5px;">Venta Bruta: S/ {venta_bruta:,.2f}</h4>
+            <h4 style="margin:5px; color:red;">Total Gastos: S/ {total_gastos:,.2f}</h4>
+            <h4 style="margin:5px; color:orange;">Total Vales: S/ {total_vales:,.2f}</h4>
+            <h1 style="color:green; font-size:3rem; margin:15px 0;">NETO: S/ {neto:,.2f}</h1>
+        </div>
+    """
+
+
+@lru_cache(maxsize=64)
+def tarjeta_jefe(nombre, sueldo):
+    return f"""
+    <div class="jefe-card">
+        <h1 style='color: white;'>🏠 EN RESIDENCIA: {nombre}</h1>
+        <p style='font-size: 18px;'><b>Encargado de Orden y Supervisión de Personal</b></p>
+        <hr>
+        <p><b>Sueldo Mensual:</b> S/ {sueldo:,.2f} | <b>Estado:</b> Viviendo en Grifo</p>
+    </div>
+    """
+
+
+@lru_cache(maxsize=64)
+def tarjetas_griferos(griferos, sueldo):
+    """Todas las tarjetas de griferos en una sola grilla (``griferos``: tuplas ``(nombre, turno)``)."""
+    tarjetas = "".join(f"""
+        <div class="grifero-card">
+            <h4 style='margin:0;'>{nombre}</h4>
+            <p style='color: #10B981; font-weight: bold; margin:0;'>{turno}</p>
+            <p style='margin:0;'>S/ {sueldo:,.2f}</p>
+        </div>""" for nombre, turno in griferos)
+    return f'<div class="grilla-griferos">{tarjetas}</div>'
+
+
+# --- Medición de lo enviado por rerun ---
+_CLAVE_MEDICIONES = "_mediciones_render"
+
+
+def medir_envio(etiqueta):
+    """Empieza a contar los mensajes enviados al navegador en el rerun actual.
+
+    Se engancha al ``ScriptRunContext`` del rerun (uno por ejecución); si la
+    API interna de Streamlit cambia, simplemente no se mide.
+    """
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+        ctx = get_script_run_ctx()
+        if ctx is None or getattr(ctx, "_medicion_render", None) is not None:
+            return
+        medicion = {"etiqueta": etiqueta, "elementos": 0, "en_cache": 0, "bytes": 0}
+        enviar = ctx._enqueue
+
+        def contar(msg):
+            tipo = msg.WhichOneof("type")
+            if tipo == "ref_hash":
+                medicion["en_cache"] += 1
+            elif tipo == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                medicion["elementos"] += 1
+            medicion["bytes"] += msg.ByteSize()
+            enviar(msg)
+
+        ctx._enqueue = contar
+        ctx._medicion_render = medicion
+    except Exception:
+        return
+
+    mediciones = st.session_state.setdefault(_CLAVE_MEDICIONES, deque(maxlen=50))
+    if mediciones:
+        # La medición anterior ya terminó: se registra completa
+        m = mediciones[-1]
+        logger.info("render etiqueta=%s elementos=%d en_cache=%d bytes=%d",
+                    m["etiqueta"], m["elementos"], m["en_cache"], m["bytes"])
+    mediciones.append(medicion)
+
+
+def mediciones_recientes():
+    """Mediciones terminadas de la sesión (la última, en curso, se excluye)."""
+    return list(st.session_state.get(_CLAVE_MEDICIONES, ()))[:-1]
+
+
+def mostrar_mediciones():
+    """Tabla con lo enviado en los últimos reruns (solo con ``GRIFO_PERFIL_INICIO=1``)."""
+    if not PERFIL_ACTIVO:
+        return
+    with st.expander("📦 Envío al navegador por rerun"):
+        st.table([{"Rerun": m["etiqueta"], "Elementos": m["elementos"], "En caché": m["en_cache"],
+                   "Bytes": m["bytes"]} for m in reversed(mediciones_recientes())])
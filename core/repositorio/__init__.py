@@ -0,0 +1,59 @@
+# core/repositorio/__init__.py
+"""Capa de acceso a datos con backends intercambiables (Firestore o SQLite).
+
+Uso::
+
+    repos = crear_repositorios("firestore", db=firestore.client())
+    repos = crear_repositorios("firestore", db=db, estacion=obtener_estacion("norte"))
+    repos = crear_repositorios("sqlite")            # en memoria
+    repos = crear_repositorios("sqlite", ruta="local.db")
+"""
+from dataclasses import dataclass
+
+from core.repositorio.base import (
+    RepositorioCierres, RepositorioEmpleados, RepositorioPrecios, clave_vigencia,
+)
+
+
+@dataclass
+class Repositorios:
+    empleados: RepositorioEmpleados
+    precios: RepositorioPrecios
+    cierres: RepositorioCierres
+
+    def lecturas(self):
+        return {"empleados": self.empleados.lecturas, "precios": self.precios.lecturas,
+                "cierres": self.cierres.lecturas}
+
+    def reiniciar_contadores(self):
+        for repo in (self.empleados, self.precios, self.cierres):
+            repo.reiniciar_contadores()
+
+
+def crear_repositorios(backend="firestore", db=None, ruta=":memory:", estacion=None):
+    """Construye los repositorios del ``backend`` pedido.
+
+    Con ``estacion`` (Firestore), precios y cierres usan las colecciones de
+    esa estación; sin ella, las de nivel superior.
+    """
+    if backend == "firestore":
+        from core.repositorio.firestore import CierresFirestore, EmpleadosFirestore, PreciosFirestore
+
+        if db is None:
+            raise ValueError("El backend 'firestore' necesita el cliente 'db'.")
+        if estacion is None:
+            return Repositorios(EmpleadosFirestore(db), PreciosFirestore(db), CierresFirestore(db))
+        return Repositorios(EmpleadosFirestore(db), PreciosFirestore(db, estacion.coleccion("products")),
+                            CierresFirestore(db, estacion.coleccion("closings")))
+    if backend == "sqlite":
+        from core.repositorio.sqlite import BaseSQLite, CierresSQLite, EmpleadosSQLite, PreciosSQLite
+
+        base = BaseSQLite(ruta)
+        return Repositorios(EmpleadosSQLite(base), PreciosSQLite(base), CierresSQLite(base))
+    raise ValueError(f"Backend desconocido: {backend}")
+
+
+__all__ = [
+    "Repositorios", "RepositorioCierres", "RepositorioEmpleados", "RepositorioPrecios",
+    "clave_vigencia", "crear_repositorios",
+]
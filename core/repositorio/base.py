@@ -0,0 +1,71 @@
+# core/repositorio/base.py
+"""Interfaces de acceso a datos, independientes del backend.
+
+Cada repositorio lleva la cuenta de los documentos leídos (``lecturas``),
+que es lo que cobra Firestore, para poder medir cada operación sin
+necesidad de un proyecto real.
+"""
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+
+
+def clave_vigencia(precio):
+    """Clave de orden por ``valid_from`` (las fechas sin zona se toman como UTC, como en Firestore)."""
+    valor = precio.get("valid_from")
+    if not isinstance(valor, datetime):
+        return float("-inf")
+    if valor.tzinfo is None:
+        valor = valor.replace(tzinfo=timezone.utc)
+    return valor.timestamp()
+
+
+class Repositorio(ABC):
+    def __init__(self):
+        self.lecturas = 0
+
+    def reiniciar_contadores(self):
+        self.lecturas = 0
+
+
+class RepositorioEmpleados(Repositorio):
+    """Colección ``employees`` (ID de documento = DNI)."""
+
+    @abstractmethod
+    def obtener(self, dni):
+        """Datos del empleado o ``None`` si no existe."""
+
+    @abstractmethod
+    def listar_activos(self, campos=None):
+        """Genera ``(dni, datos)`` de los empleados activos (solo ``campos`` si se indican)."""
+
+    @abstractmethod
+    def guardar(self, dni, datos):
+        """Crea o reemplaza el empleado ``dni``."""
+
+    @abstractmethod
+    def actualizar(self, dni, campos):
+        """Actualiza algunos campos de un empleado existente."""
+
+
+class RepositorioPrecios(Repositorio):
+    """Colección ``products``: historial de precios con fecha de vigencia."""
+
+    @abstractmethod
+    def historial(self, product_id=None):
+        """Precios (``dict`` con ``id``) del más reciente al más antiguo por ``valid_from``."""
+
+    @abstractmethod
+    def registrar(self, datos):
+        """Agrega un precio al historial y devuelve su ID."""
+
+
+class RepositorioCierres(Repositorio):
+    """Cierres de turno (ventas por contómetro, gastos, vales y total de caja)."""
+
+    @abstractmethod
+    def obtener(self, cierre_id):
+        """Datos del cierre o ``None`` si no existe."""
+
+    @abstractmethod
+    def guardar(self, cierre_id, datos):
+        """Crea o reemplaza el cierre ``cierre_id``."""
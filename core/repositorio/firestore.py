@@ -0,0 +1,76 @@
+# core/repositorio/firestore.py
+"""Backend de repositorios sobre Firestore (cliente real o emulador).
+
+Precios y cierres reciben la ruta de su colección: cada estación tiene las
+suyas (ver ``core.estaciones``). Los empleados son comunes a todas.
+"""
+from core.consultas import iterar_empleados_activos
+from core.instrumentacion import cronometrado
+from core.repositorio.base import (
+    RepositorioCierres, RepositorioEmpleados, RepositorioPrecios, clave_vigencia,
+)
+
+
+class EmpleadosFirestore(RepositorioEmpleados):
+    def __init__(self, db):
+        super().__init__()
+        self.ref = db.collection("employees")
+        self.db = db
+
+    @cronometrado("firestore: empleado")
+    def obtener(self, dni):
+        doc = self.ref.document(dni).get()
+        self.lecturas += 1
+        return doc.to_dict() if doc.exists else None
+
+    def listar_activos(self, campos=None):
+        if campos is None:
+            for doc in self.ref.where("is_active", "==", True).stream():
+                self.lecturas += 1
+                yield doc.id, doc.to_dict()
+            return
+        for dni, datos in iterar_empleados_activos(self.db, campos):
+            self.lecturas += 1
+            yield dni, datos
+
+    def guardar(self, dni, datos):
+        self.ref.document(dni).set(datos)
+
+    def actualizar(self, dni, campos):
+        self.ref.document(dni).update(campos)
+
+
+class PreciosFirestore(RepositorioPrecios):
+    def __init__(self, db, coleccion="products"):
+        super().__init__()
+        self.ref = db.collection(coleccion)
+
+    @cronometrado("firestore: historial de precios")
+    def historial(self, product_id=None):
+        query = self.ref.where("product_id", "==", product_id) if product_id else self.ref
+        precios = []
+        for doc in query.stream():
+            self.lecturas += 1
+            precios.append({"id": doc.id, **doc.to_dict()})
+        # Se ordena aquí para no requerir un índice compuesto (product_id + valid_from)
+        return sorted(precios, key=clave_vigencia, reverse=True)
+
+    def registrar(self, datos):
+        _, ref = self.ref.add(datos)
+        return ref.id
+
+
+class CierresFirestore(RepositorioCierres):
+    def __init__(self, db, coleccion="closings"):
+        super().__init__()
+        self.ref = db.collection(coleccion)
+
+    @cronometrado("firestore: cierre")
+    def obtener(self, cierre_id):
+        doc = self.ref.document(cierre_id).get()
+        self.lecturas += 1
+        return doc.to_dict() if doc.exists else None
+
+    @cronometrado("firestore: guardar cierre")
+    def guardar(self, cierre_id, datos):
+        self.ref.document(cierre_id).set(datos)
@@ -0,0 +1,115 @@
+# core/repositorio/sqlite.py
+"""Backend de repositorios sobre SQLite (``":memory:"`` por defecto).
+
+Sirve como reemplazo local de Firestore para desarrollo sin conexión y para
+los benchmarks. Los documentos se guardan como JSON; las columnas que se
+usan en consultas (``is_active``, ``product_id``, ``valid_from``) van aparte
+e indexadas.
+"""
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timezone
+
+from firebase_admin import firestore
+
+from core.repositorio.base import (
+    RepositorioCierres, RepositorioEmpleados, RepositorioPrecios, clave_vigencia,
+)
+from core.serializacion import a_json, de_json
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS employees (dni TEXT PRIMARY KEY, is_active INTEGER, datos TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS ix_employees_activos ON employees (is_active);
+CREATE TABLE IF NOT EXISTS products (id TEXT PRIMARY KEY, product_id TEXT, valid_from REAL, datos TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS ix_products_vigencia ON products (product_id, valid_from);
+CREATE TABLE IF NOT EXISTS closings (id TEXT PRIMARY KEY, datos TEXT NOT NULL);
+"""
+
+
+def _a_json(datos):
+    # En la base local el "timestamp del servidor" es la hora de escritura
+    ahora = datetime.now(timezone.utc)
+    return a_json({k: (ahora if v is firestore.SERVER_TIMESTAMP else v) for k, v in datos.items()})
+
+
+class BaseSQLite:
+    """Conexión compartida (una por backend) protegida con un lock."""
+
+    def __init__(self, ruta=":memory:"):
+        self.conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self.conexion.executescript(ESQUEMA)
+        self.lock = threading.Lock()
+
+    def consultar(self, sql, parametros=()):
+        with self.lock:
+            return self.conexion.execute(sql, parametros).fetchall()
+
+    def ejecutar(self, sql, parametros=()):
+        with self.lock, self.conexion:
+            return self.conexion.execute(sql, parametros)
+
+
+class EmpleadosSQLite(RepositorioEmpleados):
+    def __init__(self, base):
+        super().__init__()
+        self.base = base
+
+    def obtener(self, dni):
+        filas = self.base.consultar("SELECT datos FROM employees WHERE dni = ?", (dni,))
+        self.lecturas += 1
+        return de_json(filas[0][0]) if filas else None
+
+    def listar_activos(self, campos=None):
+        for dni, texto in self.base.consultar("SELECT dni, datos FROM employees WHERE is_active = 1 ORDER BY dni"):
+            self.lecturas += 1
+            datos = de_json(texto)
+            if campos is not None:
+                datos = {k: v for k, v in datos.items() if k in campos}
+            yield dni, datos
+
+    def guardar(self, dni, datos):
+        self.base.ejecutar("INSERT OR REPLACE INTO employees (dni, is_active, datos) VALUES (?, ?, ?)",
+                           (dni, int(bool(datos.get("is_active"))), _a_json(datos)))
+
+    def actualizar(self, dni, campos):
+        actual = self.obtener(dni)
+        if actual is None:
+            raise KeyError(f"No existe el empleado {dni}.")
+        self.guardar(dni, {**actual, **campos})
+
+
+class PreciosSQLite(RepositorioPrecios):
+    def __init__(self, base):
+        super().__init__()
+        self.base = base
+
+    def historial(self, product_id=None):
+        sql = "SELECT id, datos FROM products"
+        parametros = ()
+        if product_id:
+            sql += " WHERE product_id = ?"
+            parametros = (product_id,)
+        filas = self.base.consultar(sql + " ORDER BY valid_from DESC", parametros)
+        self.lecturas += len(filas)
+        return [{"id": i, **de_json(texto)} for i, texto in filas]
+
+    def registrar(self, datos):
+        precio_id = uuid.uuid4().hex
+        self.base.ejecutar("INSERT INTO products (id, product_id, valid_from, datos) VALUES (?, ?, ?, ?)",
+                           (precio_id, datos.get("product_id"), clave_vigencia(datos), _a_json(datos)))
+        return precio_id
+
+
+class CierresSQLite(RepositorioCierres):
+    def __init__(self, base):
+        super().__init__()
+        self.base = base
+
+    def obtener(self, cierre_id):
+        filas = self.base.consultar("SELECT datos FROM closings WHERE id = ?", (cierre_id,))
+        self.lecturas += 1
+        return de_json(filas[0][0]) if filas else None
+
+    def guardar(self, cierre_id, datos):
+        self.base.ejecutar("INSERT OR REPLACE INTO closings (id, datos) VALUES (?, ?)", (cierre_id, _a_json(datos)))
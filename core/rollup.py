@@ -0,0 +1,110 @@
+# core/rollup.py
+"""Índice de acumulados (prefix sums) por día para el panel de auditoría.
+
+Con las sumas acumuladas, el total de cualquier rango "Desde/Hasta" cuesta
+dos búsquedas binarias (O(log n)) en lugar de una máscara sobre todo el
+DataFrame. Los puntos semanales/mensuales del gráfico se obtienen del
+mismo índice, recortados exactamente al rango pedido.
+"""
+import numpy as np
+import pandas as pd
+
+COLUMNAS = ["Venta Bruta", "Gastos", "Vales", "Saldo Neto"]
+FRECUENCIAS = {"D": "Diario", "W": "Semanal", "M": "Mensual"}
+
+
+class RollupDiario:
+    """Acumulados por día (todas las estaciones sumadas) de las columnas de ``COLUMNAS``."""
+
+    @classmethod
+    def combinar(cls, rollups):
+        """Rollup consolidado: suma día a día de varios rollups (p. ej. uno por estación)."""
+        resultado = cls()
+        partes = [r.diario() for r in rollups if len(r)]
+        if partes:
+            resultado.agregar(pd.concat(partes, ignore_index=True))
+        return resultado
+
+    def __init__(self, df_diario=None):
+        self.dias = np.empty(0, dtype="datetime64[D]")
+        self._acumulado = {c: np.zeros(1) for c in COLUMNAS}
+        if df_diario is not None:
+            self.agregar(df_diario)
+
+    def __len__(self):
+        return len(self.dias)
+
+    @staticmethod
+    def _por_dia(df):
+        # Los montos pueden venir en float32 (core/esquema.py): se vuelven a llevar
+        # al céntimo exacto en float64 antes de acumular
+        montos = df[COLUMNAS].astype(np.float64).round(2)
+        diario = montos.groupby(df["Fecha"], sort=True).sum()
+        return np.asarray(diario.index, dtype="datetime64[D]"), diario
+
+    def agregar(self, df):
+        """Incorpora nuevos días. Si son posteriores al último, solo se extienden los acumulados."""
+        dias, diario = self._por_dia(df)
+        if len(dias) == 0:
+            return
+        if len(self.dias) and dias[0] <= self.dias[-1]:
+            # Días que se solapan o llegan desordenados: se reconstruye el índice completo.
+            # Ambas partes llevan ``Fecha`` en datetime64 (``date`` no se ordena junto a ``Timestamp``)
+            nuevos = diario.reset_index(drop=True).assign(Fecha=dias.astype("datetime64[s]"))
+            combinado = pd.concat([self.diario(), nuevos], ignore_index=True)
+            self.dias = np.empty(0, dtype="datetime64[D]")
+            self._acumulado = {c: np.zeros(1) for c in COLUMNAS}
+            self.agregar(combinado)
+            return
+        self.dias = np.concatenate([self.dias, dias])
+        for c in COLUMNAS:
+            ultimo = self._acumulado[c][-1]
+            self._acumulado[c] = np.concatenate([self._acumulado[c], ultimo + np.cumsum(diario[c].to_numpy())])
+
+    def diario(self, desde=None, hasta=None):
+        """Valores por día (``Fecha`` + ``COLUMNAS``) del rango, sin volver a la fuente."""
+        ini, fin = self._posiciones(desde, hasta) if desde is not None else (0, len(self.dias))
+        datos = {c: np.diff(self._acumulado[c][ini:fin + 1]) for c in COLUMNAS}
+        return pd.DataFrame({"Fecha": self.dias[ini:fin].astype("datetime64[s]"), **datos})
+
+    def _posiciones(self, desde, hasta):
+        ini = np.searchsorted(self.dias, np.datetime64(desde, "D"), side="left")
+        fin = np.searchsorted(self.dias, np.datetime64(hasta, "D"), side="right")
+        return ini, max(ini, fin)
+
+    def totales(self, desde, hasta):
+        """Suma de cada columna entre ``desde`` y ``hasta`` (inclusive)."""
+        ini, fin = self._posiciones(desde, hasta)
+        return {c: float(self._acumulado[c][fin] - self._acumulado[c][ini]) for c in COLUMNAS}
+
+    def frecuencia_para(self, desde, hasta, umbral_semanal=120, umbral_mensual=730):
+        """Resolución sugerida del gráfico según la cantidad de días del rango."""
+        n_dias = (hasta - desde).days + 1
+        if n_dias > umbral_mensual:
+            return "M"
+        if n_dias > umbral_semanal:
+            return "W"
+        return "D"
+
+    def serie(self, columna, desde, hasta, frecuencia="D"):
+        """Serie de ``columna`` en el rango, con un punto por día, semana (lunes) o mes."""
+        ini, fin = self._posiciones(desde, hasta)
+        dias = self.dias[ini:fin]
+        if frecuencia == "D":
+            cortes = np.arange(ini, fin)
+            etiquetas = dias
+        else:
+            if frecuencia == "W":
+                # 1970-01-01 fue jueves: se desplaza para que las semanas empiecen en lunes
+                periodo = (dias.astype("int64") + 3) // 7
+            elif frecuencia == "M":
+                periodo = dias.astype("datetime64[M]").astype("int64")
+            else:
+                raise ValueError(f"Frecuencia no soportada: {frecuencia}")
+            cambios = np.flatnonzero(np.diff(periodo)) + 1
+            cortes = ini + np.concatenate([[0], cambios]) if len(dias) else np.empty(0, dtype=int)
+            etiquetas = dias[cortes - ini]
+        limites = np.append(cortes, fin)
+        acumulado = self._acumulado[columna]
+        valores = acumulado[limites[1:]] - acumulado[limites[:-1]]
+        return pd.Series(valores, index=pd.Index(etiquetas.astype(object), name="Fecha"), name=columna)
@@ -0,0 +1,11 @@
+# core/rutas.py
+"""Carpeta de datos locales del servidor: almacén Parquet, diarios SQLite y JSONL, logs.
+
+Por defecto ``data/`` en la raíz del proyecto; otra ruta con ``GRIFO_DATOS``
+(se lee al importar, como ``GRIFO_ESTACIONES``). Las pruebas de carga la
+apuntan a una carpeta temporal para no tocar los diarios del servidor.
+"""
+import os
+from pathlib import Path
+
+CARPETA_DATOS = Path(os.environ.get("GRIFO_DATOS", Path(__file__).resolve().parent.parent / "data"))
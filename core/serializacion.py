@@ -0,0 +1,37 @@
+# core/serializacion.py
+"""JSON para documentos tipo Firestore (fechas y ``SERVER_TIMESTAMP`` incluidos).
+
+Lo usan el backend SQLite y el journal del escritor en segundo plano.
+"""
+import json
+from datetime import date, datetime
+
+from firebase_admin import firestore
+
+
+def _codificar(valor):
+    if valor is firestore.SERVER_TIMESTAMP:
+        return {"$servidor": True}
+    if isinstance(valor, datetime):
+        return {"$fecha": valor.isoformat()}
+    if isinstance(valor, date):
+        return {"$dia": valor.isoformat()}
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+
+def _decodificar(obj):
+    if "$servidor" in obj:
+        return firestore.SERVER_TIMESTAMP
+    if "$fecha" in obj:
+        return datetime.fromisoformat(obj["$fecha"])
+    if "$dia" in obj:
+        return date.fromisoformat(obj["$dia"])
+    return obj
+
+
+def a_json(datos):
+    return json.dumps(datos, default=_codificar, ensure_ascii=False)
+
+
+def de_json(texto):
+    return json.loads(texto, object_hook=_decodificar)
@@ -0,0 +1,50 @@
+# core/turno.py
+"""Datos de un turno de venta (lecturas de contómetros, gastos, vales y cierre)."""
+from firebase_admin import firestore
+
+from core.contometros import mutaciones_contometros
+from core.escritor import mutacion_set
+
+
+def mutaciones_cierre(cierre_id, fecha, lecturas, gastos, vales, precios, estacion=None):
+    """Mutaciones para guardar un cierre de turno completo.
+
+    - ``closings/{cierre_id}``: totales, gastos y vales.
+    - ``closings/{cierre_id}/lecturas/{D-xx}``: una por contómetro.
+    - ``meters/{D-xx}``: última lectura de cada contómetro (``core.contometros``).
+
+    Con ``estacion`` se usa su colección de cierres (``core.estaciones``).
+    """
+    coleccion = estacion.coleccion("closings") if estacion is not None else "closings"
+    mutaciones = []
+    venta_bruta = 0.0
+    for item in lecturas:
+        galones = item["final"] - item["inicio"]
+        soles = galones * precios[item["producto"]]
+        venta_bruta += soles
+        mutaciones.append(mutacion_set(f"{coleccion}/{cierre_id}/lecturas/{item['id']}", {
+            "producto": item["producto"],
+            "inicio": item["inicio"],
+            "final": item["final"],
+            "galones": galones,
+            "soles": round(soles, 2),
+            "cierre_anterior": item.get("cierre_anterior"),
+        }))
+
+    total_g = sum(g["M"] for g in gastos)
+    total_v = sum(v["M"] for v in vales)
+    cierre = {
+        "fecha": fecha,
+        "venta_bruta": round(venta_bruta, 2),
+        "total_gastos": round(total_g, 2),
+        "total_vales": round(total_v, 2),
+        "neto": round(venta_bruta - total_g - total_v, 2),
+        "gastos": list(gastos),
+        "vales": list(vales),
+        "registered_at": firestore.SERVER_TIMESTAMP,
+    }
+    if estacion is not None:
+        cierre["station_id"] = estacion.id
+    mutaciones.insert(0, mutacion_set(f"{coleccion}/{cierre_id}", cierre))
+    mutaciones += mutaciones_contometros(estacion, cierre_id, fecha, lecturas)
+    return mutaciones
@@ -0,0 +1,30 @@
+# core/ventas.py
+"""Cálculo vectorizado de ventas por contómetro para el registro de turno."""
+import numpy as np
+import pandas as pd
+
+# (nombre, índice inicial, índice final) de cada módulo de dispensadores
+MODULOS = (("MÓDULO 1", 0, 8), ("MÓDULO 2", 8, 16), ("MÓDULO 3", 16, 22))
+
+
+def tabla_lecturas(form_data, modulos=MODULOS):
+    """DataFrame ``id, modulo, producto, inicio, final`` a partir de ``form_data``."""
+    df = pd.DataFrame(form_data, columns=["id", "producto", "inicio", "final"])
+    etiquetas = np.empty(len(df), dtype=object)
+    for nombre, ini, fin in modulos:
+        etiquetas[ini:fin] = nombre
+    df.insert(1, "modulo", etiquetas)
+    return df
+
+
+def calcular_ventas(df, precios):
+    """Agrega ``galones`` y ``soles`` en una sola pasada vectorizada."""
+    df = df.copy()
+    df["galones"] = df["final"] - df["inicio"]
+    df["soles"] = df["galones"] * df["producto"].map(precios).astype(float)
+    return df
+
+
+def subtotales_por_modulo(df):
+    """Soles por módulo, en el orden en que aparecen los módulos."""
+    return df.groupby("modulo", sort=False)["soles"].sum()
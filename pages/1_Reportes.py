@@ -1,78 +1,123 @@
 import streamlit as st
 import pandas as pd
-import random
 from datetime import datetime, date, timedelta
 
+from core.almacen import AlmacenVentas
+from core.anomalias import escanear_estacion
+from core.consolidado import consolidado, rollups_por_estacion
+from core.cubo import CuboVentas
+from core.detalle import DetalleDispensadores
+from core.estaciones import cargar_estaciones, selector_estacion
+from core.exportar import FORMATOS, TrabajoExportacion
+from core.fragmentos import fragmento
+from core.historico import generar_historico
+from core.esquema import para_mostrar
+from core.instrumentacion import con_cache, cronometrado, observar_lru, pagina, panel_instrumentacion, seccion
+from core.render import CSS_SIN_SIDEBAR, inyectar_css, medir_envio, mostrar_mediciones
+from core.rollup import FRECUENCIAS
+
 # --- 1. CONFIGURACIÓN DE PÁGINA ---
 st.set_page_config(page_title="Reporte Histórico V&T", layout="wide")
+medir_envio("página reportes")
+pagina("reportes")
 
-# CSS para mantener la interfaz limpia sin menús laterales
-st.markdown("""
-    <style>
-        [data-testid="stSidebar"], [data-testid="stSidebarNav"], button[data-testid="stSidebarToggle"] { display: none !important; }
-        [data-testid="stAppViewContainer"] { margin-left: 0px !important; }
-        .main-title { color: #003366; font-size: 28px; font-weight: bold; text-align: center; }
-        .stMetric { background-color: #f8f9fa; border: 1px solid #e0e0e0; padding: 10px; border-radius: 8px; }
-    </style>
-""", unsafe_allow_html=True)
+# CSS para mantener la interfaz limpia sin menús laterales (un solo elemento, core/render.py)
+inyectar_css(CSS_SIN_SIDEBAR, """
+    .main-title { color: #003366; font-size: 28px; font-weight: bold; text-align: center; }
+    .stMetric { background-color: #f8f9fa; border: 1px solid #e0e0e0; padding: 10px; border-radius: 8px; }
+""")
 
 st.markdown('<div style="text-align: center; color: gray;">Hecho Nilser Cesar Tuero Mayta - Senati</div>', unsafe_allow_html=True)
 st.markdown('<div class="main-title">📈 AUDITORÍA CONTABLE: HISTORIAL DE VENTAS</div>', unsafe_allow_html=True)
 
 # --- 2. GENERADOR DE DATOS FAKE (OCTUBRE - DICIEMBRE) ---
-@st.cache_data
-def generar_data_historica():
-    fecha_inicio = date(2025, 10, 1)
-    fecha_fin = date(2025, 12, 30)
-    delta = (fecha_fin - fecha_inicio).days
-    
-    lista_resumen = []
-    lista_bombas = []
-    
-    for i in range(delta + 1):
-        actual = fecha_inicio + timedelta(days=i)
-        # Generar venta diaria entre 5,000 y 20,000
-        v_bruta = random.uniform(5000, 20000)
-        gastos = v_bruta * random.uniform(0.02, 0.05)
-        vales = v_bruta * random.uniform(0.01, 0.04)
-        
-        lista_resumen.append({
-            "Fecha": actual,
-            "Venta Bruta": round(v_bruta, 2),
-            "Gastos": round(gastos, 2),
-            "Vales": round(vales, 2),
-            "Saldo Neto": round(v_bruta - gastos - vales, 2)
-        })
-        
-        # Simular detalle de los 22 contómetros para ese día
-        for b in range(1, 23):
-            lista_bombas.append({
-                "Fecha": actual,
-                "Bomba": f"LADO-{b:02d}",
-                "Producto": random.choice(["90 Oct", "95 Oct", "Diesel"]),
-                "Venta Soles": round(v_bruta / 22, 2)
-            })
-            
-    return pd.DataFrame(lista_resumen), pd.DataFrame(lista_bombas)
-
-df_diario, df_bombas = generar_data_historica()
+# Sin caché: solo se usa para llenar el almacén la primera vez (no vale la pena
+# guardar una copia en st.cache_data que luego nadie vuelve a leer)
+@cronometrado("reportes: data histórica")
+def generar_data_historica(n_bombas=22, seed=2025):
+    # Generación vectorizada con tipos compactos (core/historico.py, core/esquema.py);
+    # la semilla fija da la misma data en cada ejecución
+    return generar_historico(date(2025, 10, 1), date(2025, 12, 30), n_bombas=n_bombas, seed=seed)
+
+ESTACIONES = cargar_estaciones()
+
+# Un almacén Parquet por estación: se llena una sola vez y sobrevive a los reinicios del servidor
+@con_cache("reportes: almacenes", st.cache_resource)
+def obtener_almacenes():
+    almacenes = {}
+    for i, estacion in enumerate(ESTACIONES):
+        almacen = AlmacenVentas.para_estacion(estacion.id)
+        if not (almacen.tiene_datos("diario") and almacen.tiene_datos("bombas")):
+            df_diario, df_bombas = generar_data_historica(estacion.n_bombas, seed=2025 + i)
+            almacen.guardar("diario", df_diario)
+            almacen.guardar("bombas", df_bombas)
+        almacenes[estacion.id] = almacen
+    return almacenes
+
+almacenes = obtener_almacenes()
+
+# Índice de acumulados por día de cada estación (en paralelo, un proceso por estación)
+# y el consolidado que los suma: los totales de cualquier rango salen en O(log n)
+@con_cache("reportes: rollups", st.cache_resource)
+def obtener_rollups():
+    por_estacion = rollups_por_estacion(almacenes)
+    return por_estacion, consolidado(por_estacion)
+
+rollups, rollup_consolidado = obtener_rollups()
+
+# Cubo día × bomba × producto por estación (y consolidado): el análisis por
+# producto o dispensador son cortes de arreglos, no groupbys sobre df_bombas
+@con_cache("reportes: cubos", st.cache_resource)
+def obtener_cubos():
+    por_estacion = {i: CuboVentas.desde_almacen(a) for i, a in almacenes.items()}
+    return por_estacion, CuboVentas.combinar(por_estacion)
+
+cubos, cubo_consolidado = obtener_cubos()
+
+# Anomalías de toda la historia (caja diaria y ventas por bomba), una pasada por estación
+@con_cache("reportes: anomalías", st.cache_resource)
+def obtener_anomalias():
+    return pd.concat([escanear_estacion(almacenes[i].leer("diario"), cubos[i], i) for i in almacenes],
+                     ignore_index=True)
+
+anomalias = obtener_anomalias()
+
+# Detalle por dispensador indexado por día, con LRU de los días ya armados. Los
+# DataFrames compactos se comparten entre sesiones sin copiarse (solo lectura)
+@con_cache("reportes: detalle", st.cache_resource)
+def obtener_detalle(estacion_id):
+    detalle = DetalleDispensadores(almacenes[estacion_id], ['Bomba', 'Producto', 'Venta Soles'])
+    observar_lru(f"detalle {estacion_id}: meses", detalle._mes)
+    observar_lru(f"detalle {estacion_id}: días", detalle._dia)
+    return detalle
 
 # --- 3. FILTROS DE RANGO DE FECHAS ---
 st.write("### 🔍 Filtros de Auditoría")
+# "Consolidado" (None) suma todas las estaciones
+estacion = selector_estacion(incluir_consolidado=True)
+rollup = rollup_consolidado if estacion is None else rollups[estacion.id]
+
 c1, c2 = st.columns(2)
 with c1:
     f_inicio = st.date_input("Desde:", date(2025, 10, 1), min_value=date(2025, 10, 1), max_value=date(2025, 12, 30))
 with c2:
     f_fin = st.date_input("Hasta:", date(2025, 12, 30), min_value=date(2025, 10, 1), max_value=date(2025, 12, 30))
 
-# Filtrado de datos
-df_filtrado = df_diario[(df_diario['Fecha'] >= f_inicio) & (df_diario['Fecha'] <= f_fin)]
+# Filtrado de datos: solo se leen las particiones mensuales del rango de la
+# estación; el consolidado sale del rollup, sin leer ningún almacén
+with seccion("lectura del rango"):
+    if estacion is None:
+        df_filtrado = rollup.diario(f_inicio, f_fin)
+    else:
+        df_filtrado = almacenes[estacion.id].leer("diario", f_inicio, f_fin)
 
 # --- 4. PANEL DE MÉTRICAS ACUMULADAS ---
 st.divider()
-total_v = df_filtrado['Venta Bruta'].sum()
-total_g = df_filtrado['Gastos'].sum()
-total_s = df_filtrado['Saldo Neto'].sum()
+with seccion("totales del rango"):
+    totales = rollup.totales(f_inicio, f_fin)
+total_v = totales['Venta Bruta']
+total_g = totales['Gastos']
+total_s = totales['Saldo Neto']
 
 m1, m2, m3 = st.columns(3)
 m1.metric("Venta Bruta Acumulada", f"S/ {total_v:,.2f}")
@@ -80,22 +125,114 @@ m2.metric("Total Egresos (Gastos/Vales)", f"S/ {(total_v - total_s):,.2f}", delt
 m3.metric("Saldo Neto en Caja", f"S/ {total_s:,.2f}")
 
 # --- 5. GRÁFICO DE DESEMPEÑO ---
-st.subheader("📊 Comportamiento de Ventas Diarias")
-st.line_chart(df_filtrado.set_index('Fecha')['Venta Bruta'])
+# En rangos largos el gráfico pasa a puntos semanales o mensuales
+frecuencia = rollup.frecuencia_para(f_inicio, f_fin)
+st.subheader(f"📊 Comportamiento de Ventas ({FRECUENCIAS[frecuencia]})")
+with seccion("gráfico"):
+    st.line_chart(rollup.serie('Venta Bruta', f_inicio, f_fin, frecuencia))
 
 
 # --- 6. LISTADO DETALLADO ---
-t1, t2 = st.tabs(["📅 Resumen por Día", "⛽ Detalle por Dispensador"])
+t1, t2, t3, t4 = st.tabs(["📅 Resumen por Día", "⛽ Detalle por Dispensador", "🧊 Producto × Dispensador",
+                          "🚨 Anomalías"])
+
+with t1, seccion("tabla por día"):
+    st.dataframe(para_mostrar(df_filtrado.sort_values(by="Fecha", ascending=False)), use_container_width=True,
+                 hide_index=True, column_config={"Fecha": st.column_config.DateColumn(format="DD/MM/YYYY")})
+
+with t2, seccion("detalle por dispensador"):
+    # El detalle es por estación; en el consolidado se elige cuál ver
+    estacion_detalle = estacion or selector_estacion("Estación del detalle:", key="estacion_detalle")
+    detalle = obtener_detalle(estacion_detalle.id)
+    fecha_sel = st.selectbox(f"Seleccione un día para ver los {estacion_detalle.n_bombas} contómetros:",
+                             df_filtrado['Fecha'].dt.date, format_func=lambda f: f.strftime("%d/%m/%Y"))
+    if fecha_sel is None:
+        # Rango vacío (sin ventas, o "Desde" posterior a "Hasta")
+        st.info("No hay días con ventas en el rango seleccionado.")
+    else:
+        df_detalle_dia = detalle.dia(fecha_sel)
+        st.table(para_mostrar(df_detalle_dia))
 
-with t1:
-    st.dataframe(df_filtrado.sort_values(by="Fecha", ascending=False), use_container_width=True, hide_index=True)
+with t3, seccion("análisis producto × dispensador"):
+    cubo = cubo_consolidado if estacion is None else cubos[estacion.id]
+    a1, a2, a3 = st.columns([1, 1, 2])
+    por = a1.radio("Agrupar por:", ["Producto", "Bomba"], horizontal=True)
+    frecuencia_cubo = a2.selectbox("Periodo:", list(FRECUENCIAS), index=list(FRECUENCIAS).index(frecuencia),
+                                   format_func=FRECUENCIAS.get)
+    productos_sel = a3.multiselect("Productos:", list(cubo.productos), default=list(cubo.productos))
 
-with t2:
-    fecha_sel = st.selectbox("Seleccione un día para ver los 22 contómetros:", df_filtrado['Fecha'])
-    df_detalle_dia = df_bombas[df_bombas['Fecha'] == fecha_sel]
-    st.table(df_detalle_dia[['Bomba', 'Producto', 'Venta Soles']])
+    # Tabla dinámica del rango: ventas por dispensador y producto
+    matriz = cubo.matriz(f_inicio, f_fin)[productos_sel]
+    st.dataframe(matriz.assign(Total=matriz.sum(axis=1)).round(2), use_container_width=True)
+
+    st.write(f"**Ventas por {por.lower()} ({FRECUENCIAS[frecuencia_cubo]})**")
+    st.bar_chart(cubo.serie(f_inicio, f_fin, frecuencia_cubo, por, productos=productos_sel))
+    st.write("**Participación en cada periodo (%)**")
+    st.dataframe(cubo.participacion(f_inicio, f_fin, frecuencia_cubo, por, productos=productos_sel).round(1),
+                 use_container_width=True)
+
+with t4, seccion("anomalías"):
+    # z móvil (28 días previos) y z robusto (mediana/MAD de toda la historia), core/anomalias.py
+    fechas_anomalias = anomalias["Fecha"].dt.date
+    en_rango = (fechas_anomalias >= f_inicio) & (fechas_anomalias <= f_fin)
+    if estacion is not None:
+        en_rango &= anomalias["Estacion"] == estacion.id
+    marcadas = anomalias[en_rango]
+    if marcadas.empty:
+        st.success("✅ Sin lecturas ni cajas fuera de lo normal en el rango.")
+    else:
+        st.warning(f"⚠️ Valores fuera de lo normal en el rango: {len(marcadas)}.")
+        st.dataframe(marcadas, use_container_width=True, hide_index=True, column_config={
+            "Fecha": st.column_config.DateColumn(format="DD/MM/YYYY"),
+            "Valor": st.column_config.NumberColumn(format="%.4g"),
+            "Mediana": st.column_config.NumberColumn(format="%.4g"),
+            "z móvil": st.column_config.NumberColumn(format="%+.1f"),
+            "z robusto": st.column_config.NumberColumn(format="%+.1f"),
+        })
 
-# --- 7. CIERRE ---
+# --- 7. EXPORTACIÓN DEL RANGO ---
+# Se escribe por lotes a un archivo temporal en un hilo de fondo; el fragmento
+# muestra el avance y, al terminar, el botón de descarga
+TABLAS_EXPORTACION = {"diario": "Resumen por día", "bombas": "Detalle por dispensador"}
+
+st.write("### 📤 Exportar rango")
+e1, e2, e3 = st.columns([2, 1, 1])
+tabla_exp = e1.selectbox("Datos:", list(TABLAS_EXPORTACION), format_func=TABLAS_EXPORTACION.get)
+formato_exp = e2.selectbox("Formato:", list(FORMATOS), format_func=lambda f: FORMATOS[f][0])
+with e3:
+    st.write("")
+    if st.button("Generar archivo", use_container_width=True):
+        anterior = st.session_state.pop("_exportacion", None)
+        if anterior is not None:
+            anterior.limpiar()
+        fuentes = almacenes if estacion is None else {estacion.id: almacenes[estacion.id]}
+        st.session_state._exportacion = TrabajoExportacion(fuentes, tabla_exp, f_inicio, f_fin, formato_exp)
+        st.session_state._exportacion_en_curso = True
+
+trabajo = st.session_state.get("_exportacion")
+if trabajo is not None:
+    @fragmento("exportacion", run_every=None if trabajo.terminado else "1s")
+    def fragmento_exportacion():
+        if not trabajo.terminado:
+            st.progress(trabajo.progreso, text=f"Exportando {trabajo.nombre_archivo}: {trabajo.filas:,} de ~{trabajo.total:,} filas")
+            return
+        if st.session_state.get("_exportacion_en_curso", True):
+            # Terminó: un rerun completo deja de refrescar el fragmento cada segundo
+            st.session_state._exportacion_en_curso = False
+            st.rerun()
+        if trabajo.error is not None:
+            st.error(f"❌ No se pudo exportar: {trabajo.error}")
+        elif trabajo.listo:
+            with open(trabajo.ruta, "rb") as archivo:
+                st.download_button(f"⬇️ Descargar {trabajo.nombre_archivo} ({trabajo.filas:,} filas)",
+                                   archivo, file_name=trabajo.nombre_archivo, mime=trabajo.mime)
+
+    fragmento_exportacion()
+
+# --- 8. CIERRE ---
 st.divider()
 if st.button("⬅️ Volver al Panel de Prueba"):
     st.switch_page("pages/PRUEBA_DE_LA_APP.py")
+
+mostrar_mediciones()
+panel_instrumentacion()
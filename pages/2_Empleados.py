@@ -1,94 +1,112 @@
 # pages/2_Empleados.py
 import streamlit as st
-import pandas as pd
-from datetime import datetime
+import pytz
+from datetime import datetime, timedelta
+
+from core.bootstrap import obtener_db
+from core.cache_firestore import cache_compartido
+from core.estaciones import obtener_estacion, selector_estacion
+from core.instrumentacion import con_cache, pagina, panel_instrumentacion, seccion
+from core.planilla import (GRIFERO, JEFE, RolPersonal, fin_de_mes, personal_desde_config,
+                           personal_desde_empleados, rango_de_rol)
+from core.render import CSS_SIN_SIDEBAR, inyectar_css, medir_envio, mostrar_mediciones, tarjeta_jefe, tarjetas_griferos
 
 # --- 1. CONFIGURACIÓN DE PÁGINA (SIN NAVEGACIÓN LATERAL) ---
 st.set_page_config(page_title="Personal V&T", layout="wide")
+medir_envio("página empleados")
+pagina("empleados")
 
-st.markdown("""
-    <style>
-        [data-testid="stSidebar"], [data-testid="stSidebarNav"], button[data-testid="stSidebarToggle"] { display: none !important; }
-        [data-testid="stAppViewContainer"] { margin-left: 0px !important; }
-        .jefe-card { background-color: #1E3A8A; color: white; padding: 25px; border-radius: 15px; text-align: center; box-shadow: 2px 2px 10px rgba(0,0,0,0.1); }
-        .grifero-card { background-color: #ffffff; padding: 15px; border-radius: 10px; border-left: 5px solid #10B981; box-shadow: 2px 2px 5px rgba(0,0,0,0.05); margin-bottom: 10px; }
-        .stMetric { background-color: #f0f2f6; padding: 10px; border-radius: 10px; }
-    </style>
-""", unsafe_allow_html=True)
+inyectar_css(CSS_SIN_SIDEBAR, """
+    .jefe-card { background-color: #1E3A8A; color: white; padding: 25px; border-radius: 15px; text-align: center; box-shadow: 2px 2px 10px rgba(0,0,0,0.1); }
+    .grifero-card { background-color: #ffffff; padding: 15px; border-radius: 10px; border-left: 5px solid #10B981; box-shadow: 2px 2px 5px rgba(0,0,0,0.05); margin-bottom: 10px; }
+    .grilla-griferos { display: grid; grid-template-columns: repeat(4, 1fr); gap: 0 16px; }
+    .stMetric { background-color: #f0f2f6; padding: 10px; border-radius: 10px; }
+""")
 
 st.markdown('<div style="text-align: center; color: gray; font-weight: bold;">Hecho Nilser Cesar Tuero Mayta - Senati</div>', unsafe_allow_html=True)
 st.title("👥 Gestión de Personal y Roles de Turno")
 
-# --- 2. LÓGICA DE ROTACIÓN DE JEFES (15 DÍAS) ---
-hoy = datetime.now()
-dia_del_año = hoy.timetuple().tm_yday
-# Alterna cada 15 días: Juan (bloque 0), Jose (bloque 1)
-ciclo_15 = (dia_del_año // 15) % 2
+# Reglas del rol y personal de respaldo de la estación (config/estaciones.toml)
+estacion = selector_estacion()
+
+# --- 2. ROL DE TURNOS PRECALCULADO (core/planilla.py) ---
+# El rol del año en curso y el siguiente se genera una vez por estación y
+# personal: consultar un día es O(1) y la planilla de cualquier periodo es
+# una suma sobre un corte del rol. La rotación de jefes cuenta bloques desde
+# una fecha ancla, así no se reinicia al cambiar de año.
+def personal_de(estacion):
+    """Jefes y griferos activos de ``employees``; si Firebase no responde o no hay, los de la configuración."""
+    try:
+        personal = personal_desde_empleados(cache_compartido(obtener_db()).empleados_activos(), estacion)
+    except Exception:
+        personal = ()
+    return personal or personal_desde_config(estacion)
+
+@con_cache("empleados: rol de turnos", st.cache_resource(max_entries=16))
+def rol_de_personal(estacion_id, personal, inicio, fin):
+    return RolPersonal(obtener_estacion(estacion_id).planilla, personal, inicio, fin)
+
+hoy = datetime.now(pytz.timezone('America/Lima')).date()
+with seccion("rol de turnos"):
+    rol = rol_de_personal(estacion.id, personal_de(estacion), *rango_de_rol(hoy))
+reglas = estacion.planilla
+turnos_hoy = rol.dia(hoy)
 
-if ciclo_15 == 0:
-    jefe_en_grifo, jefe_libre = "JUAN", "JOSE"
-else:
-    jefe_en_grifo, jefe_libre = "JOSE", "JUAN"
+jefe_en_grifo, fin_bloque = rol.jefe_en_residencia(hoy)
+jefe_en_grifo = jefe_en_grifo or "—"
+jefe_libre = ", ".join(p.nombre for p in rol.personal if p.cargo == JEFE and p.nombre != jefe_en_grifo) or "—"
 
 # --- 3. SECCIÓN JEFATURA ---
-st.subheader("🏁 Jefatura de Personal (Residencia 15 días)")
+st.subheader(f"🏁 Jefatura de Personal (Residencia {reglas.dias_rotacion} días)")
 col_j1, col_j2 = st.columns([2, 1])
 
 with col_j1:
-    st.markdown(f"""
-    <div class="jefe-card">
-        <h1 style='color: white;'>🏠 EN RESIDENCIA: {jefe_en_grifo}</h1>
-        <p style='font-size: 18px;'><b>Encargado de Orden y Supervisión de Personal</b></p>
-        <hr>
-        <p><b>Sueldo Mensual:</b> S/ 1,900.00 | <b>Estado:</b> Viviendo en Grifo</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(tarjeta_jefe(jefe_en_grifo, reglas.sueldo_jefe), unsafe_allow_html=True)
 
 with col_j2:
     st.info(f"**Personal Libre / Relevo:** {jefe_libre}")
     st.write("📌 **Regla de Negocio:**")
-    st.write("- Rotación obligatoria cada 15 días.")
+    st.write(f"- Rotación obligatoria cada {reglas.dias_rotacion} días.")
     st.write("- El jefe en turno supervisa las 24 horas.")
+    if fin_bloque is not None:
+        st.write(f"- Relevo el {(fin_bloque + timedelta(days=1)).strftime('%d/%m/%Y')}.")
     st.write(f"📅 **Fecha Actual:** {hoy.strftime('%d/%m/%Y')}")
 
 st.divider()
 
 # --- 4. SECCIÓN GRIFEROS ---
-st.subheader("⛽ Griferos Operativos (8 Horas / Viáticos Incluidos)")
-
-griferos = [
-    {"nom": "VERONICA", "est": "🟢 Mañana"},
-    {"nom": "GUILLERMO", "est": "🟢 Mañana"},
-    {"nom": "CESAR", "est": "🟡 Tarde/Noche"},
-    {"nom": "GRIMALDA", "est": "🟡 Tarde/Noche"}
-]
-
-c1, c2, c3, c4 = st.columns(4)
-for i, g in enumerate(griferos):
-    with [c1, c2, c3, c4][i]:
-        st.markdown(f"""
-        <div class="grifero-card">
-            <h4 style='margin:0;'>{g['nom']}</h4>
-            <p style='color: #10B981; font-weight: bold; margin:0;'>{g['est']}</p>
-            <p style='margin:0;'>S/ 1,500.00</p>
-        </div>
-        """, unsafe_allow_html=True)
-
-# --- 5. CUADRO RESUMEN DE PLANILLA ---
-st.subheader("📊 Resumen Económico de Personal")
-data = {
-    "Empleado": ["JUAN", "JOSE", "VERONICA", "GUILLERMO", "CESAR", "GRIMALDA"],
-    "Cargo": ["Jefe Personal", "Jefe Personal", "Grifero", "Grifero", "Grifero", "Grifero"],
-    "Sueldo (S/)": [1900, 1900, 1500, 1500, 1500, 1500],
-    "Beneficios": ["Residencia + Viáticos", "Residencia + Viáticos", "Viáticos", "Viáticos", "Viáticos", "Viáticos"]
-}
-df = pd.DataFrame(data)
-st.table(df)
-
-total = df["Sueldo (S/)"].sum()
-st.metric("Total Planilla Mensual", f"S/ {total:,.2f}")
+st.subheader(f"⛽ Griferos Operativos ({reglas.horas_jornada:g} Horas / Viáticos Incluidos)")
+
+# Turno de hoy de cada grifero según el rol (o "Descanso")
+griferos_hoy = tuple((p.nombre, turnos_hoy[p.nombre]) for p in rol.personal if p.cargo == GRIFERO)
+# Todas las tarjetas en un solo bloque HTML (antes: una columna y un markdown por grifero)
+st.markdown(tarjetas_griferos(griferos_hoy, reglas.sueldo_grifero), unsafe_allow_html=True)
+
+# --- 5. PLANIFICACIÓN Y PLANILLA DEL PERIODO ---
+st.subheader("📆 Rol de Turnos y Planilla")
+mes_actual = hoy.replace(day=1)
+periodo = st.date_input("Periodo", value=(mes_actual, fin_de_mes(hoy)),
+                        min_value=rol.inicio, max_value=rol.fin, format="DD/MM/YYYY")
+# Mientras se elige el rango, date_input devuelve solo la fecha inicial
+desde, hasta = (periodo[0], periodo[-1]) if isinstance(periodo, (tuple, list)) and periodo else (mes_actual, fin_de_mes(hoy))
+
+with seccion("planilla del periodo"):
+    df = rol.planilla(desde, hasta)
+t_planilla, t_rol = st.tabs(["📊 Planilla", "🗓️ Rol"])
+with t_planilla:
+    st.dataframe(df, hide_index=True, use_container_width=True)
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Total Planilla del Periodo", f"S/ {df['Total (S/)'].sum():,.2f}")
+    c2.metric("Horas Extra", f"{df['Horas extra'].sum():,.0f} h", f"S/ {df['Horas extra (S/)'].sum():,.2f}",
+              delta_color="off")
+    c3.metric("Viáticos", f"S/ {df['Viáticos (S/)'].sum():,.2f}")
+with t_rol:
+    st.dataframe(rol.calendario(desde, hasta), use_container_width=True)
 
 # --- BOTÓN DE SALIDA ---
 st.divider()
 if st.button("⬅️ Volver al Panel de Prueba"):
     st.switch_page("pages/PRUEBA_DE_LA_APP.py")
+
+mostrar_mediciones()
+panel_instrumentacion()
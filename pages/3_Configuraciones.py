@@ -2,7 +2,14 @@
 import streamlit as st
 from firebase_admin import firestore
 from datetime import datetime
-import hashlib
+
+from core.bootstrap import obtener_db
+from core.cache_firestore import cache_compartido
+from core.consultas import opciones_empleados
+from core.credenciales import CACHE_AUTH, hash_password
+from core.estaciones import selector_estacion
+from core.instrumentacion import pagina, panel_instrumentacion, seccion
+from core.limites import limitador_compartido
 
 # === VERIFICACIÓN DE SEGURIDAD ===
 if 'is_authenticated' not in st.session_state or not st.session_state.is_authenticated:
@@ -10,15 +17,27 @@ if 'is_authenticated' not in st.session_state or not st.session_state.is_authent
     st.stop()
 # ==================================
 st.set_page_config(page_title="Configuraciones del Sistema", page_icon="⚙️")
+pagina("configuraciones")
 st.title("⚙️ Configuraciones de Administración")
 
 # Inicializamos la conexión a Firestore
 try:
-    db = firestore.client()
+    db = obtener_db()
 except Exception:
     st.error("Error: Conexión a Firebase no inicializada.")
     st.stop()
 
+# Caché compartido por todo el proceso: lee cada colección una vez y se
+# mantiene al día con listeners de Firestore (o polling si no están disponibles).
+# Las escrituras pasan por el escritor en segundo plano: la página no espera a Firestore
+cache_fs = cache_compartido(db)
+
+# Escrituras que Firestore rechazó (ya revertidas en el caché): se muestran para rehacerlas
+if cache_fs.escritor is not None and cache_fs.escritor.rechazadas:
+    with st.expander(f"⚠️ Cambios rechazados por Firestore ({len(cache_fs.escritor.rechazadas)})"):
+        for mutacion, error in reversed(cache_fs.escritor.rechazadas):
+            st.write(f"- `{mutacion['ruta']}` ({mutacion['op']}): {error}")
+
 # --- PESTAÑAS ---
 tab1, tab2 = st.tabs(["Gestión de Cuentas Móviles", "Precios de Productos"])
 
@@ -29,22 +48,16 @@ tab1, tab2 = st.tabs(["Gestión de Cuentas Móviles", "Precios de Productos"])
 
 with tab1:
     st.header("Gestión de Cuentas de Acceso (App Móvil)")
-    st.warning("El DNI del empleado será su 'usuario'. Por seguridad, las contraseñas se almacenarán encriptadas (hash).")
-
-    # Función para hashear la contraseña
-    def hash_password(password):
-        """Genera un hash SHA-256 de la contraseña."""
-        return hashlib.sha256(password.encode()).hexdigest()
+    st.warning("El DNI del empleado será su 'usuario'. Por seguridad, las contraseñas se almacenarán encriptadas (hash con sal).")
 
     # Cargar la lista de empleados para seleccionar
-    @st.cache_data(ttl=600)
     def load_employees_for_login():
-        """Carga solo DNI y Nombre de empleados activos."""
-        query = db.collection('employees').where('is_active', '==', True).stream()
-        return {doc.id: f"{doc.to_dict().get('name')} {doc.to_dict().get('last_name')}" for doc in query}
+        """Carga solo DNI y Nombre de empleados activos (desde el caché compartido)."""
+        return {emp.dni: emp.nombre_completo for emp in cache_fs.empleados_activos()}
 
-    employee_list = load_employees_for_login()
-    employee_options = [f"{dni} - {name}" for dni, name in employee_list.items()]
+    with seccion("empleados para login"):
+        employee_list = load_employees_for_login()
+    employee_options = opciones_empleados(employee_list.items())
     
     # ------------------ 1. CREAR / RESTABLECER CUENTA ------------------
     st.subheader("Crear / Restablecer Contraseña")
@@ -62,11 +75,15 @@ with tab1:
                 hashed_pw = hash_password(new_password)
                 try:
                     # Actualiza el documento del empleado con el hash de la contraseña
-                    db.collection('employees').document(selected_dni).update({
+                    cache_fs.actualizar_empleado(selected_dni, {
                         "password_hash": hashed_pw,
                         "last_pw_update": firestore.SERVER_TIMESTAMP,
                         "employee_uid": selected_dni, # Aseguramos que el UID esté presente para el login
                     })
+                    # El login no debe seguir usando el registro anterior en caché
+                    # ni rechazar el DNI como desconocido (caché negativo de core/limites.py)
+                    CACHE_AUTH.invalidar(selected_dni)
+                    limitador_compartido().olvidar_desconocido(selected_dni)
                     st.success(f"✅ Contraseña para {selected_employee_info} actualizada correctamente. Su usuario es: **{selected_dni}**")
                 except Exception as e:
                     st.error(f"❌ Error al actualizar la contraseña: {e}")
@@ -80,10 +97,10 @@ with tab1:
 
 with tab2:
     st.header("Gestión de Precios de Combustible")
+    # Cada estación tiene su propio historial de precios
+    estacion = selector_estacion(key="estacion_precios")
+    coleccion_precios = estacion.coleccion("products")
     
-    # Referencia a la colección de productos
-    products_ref = db.collection('products')
-
     # ------------------ 1. FORMULARIO PARA NUEVO PRECIO ------------------
     st.subheader("Registrar Nuevo Precio de Venta")
     with st.form("price_form"):
@@ -106,8 +123,8 @@ with tab2:
                     "valid_from": datetime.combine(valid_from, datetime.min.time()),
                     "registered_at": firestore.SERVER_TIMESTAMP,
                 }
-                # Firestore generará un ID único, manteniendo el historial
-                products_ref.add(price_data) 
+                # Cada precio es un documento nuevo (ID generado en el cliente): se conserva el historial
+                cache_fs.registrar_precio(price_data, coleccion=coleccion_precios)
                 st.success(f"✅ Nuevo precio de S/. {new_price:.3f} para {product_id} registrado con vigencia desde {valid_from}.")
             except Exception as e:
                 st.error(f"❌ Error al registrar precio: {e}")
@@ -115,13 +132,24 @@ with tab2:
     # ------------------ 2. HISTORIAL DE PRECIOS ------------------
     st.subheader("Historial de Precios Registrados")
 
-    @st.cache_data(ttl=600)
     def load_price_history():
         """Carga el historial de precios ordenado por fecha de vigencia."""
-        query = products_ref.order_by('valid_from', direction=firestore.Query.DESCENDING).stream()
-        data = [doc.to_dict() for doc in query]
-        
-        # Procesar los datos para una mejor visualización
-        for item in data:
-            if isinstance(item.get('valid_from'), datetime):
-                item['valid_from'] = item['valid_from'].strftime
+        data = [
+            {
+                "product_id": p.product_id,
+                "price_per_gallon": p.price_per_gallon,
+                # Procesar los datos para una mejor visualización
+                "valid_from": p.valid_from.strftime("%d/%m/%Y") if p.valid_from else "",
+            }
+            for p in cache_fs.historial_precios(coleccion=coleccion_precios)
+        ]
+        return data
+
+    with seccion("historial de precios"):
+        price_history = load_price_history()
+    if price_history:
+        st.dataframe(price_history, use_container_width=True, hide_index=True)
+    else:
+        st.info("Aún no hay precios registrados.")
+
+panel_instrumentacion()
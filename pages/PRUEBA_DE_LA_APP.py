@@ -1,198 +1,426 @@
-import streamlit as st
-import pandas as pd
-import random
-from datetime import datetime
-import pytz
-
-# --- 1. CONFIGURACIÓN DE PÁGINA ---
-st.set_page_config(page_title="Sistema V&T", layout="wide")
-
-# --- 2. CSS DE REINICIO Y ESTILOS (MEJORADO) ---
-st.markdown("""
-    <style>
-    /* ELIMINAR CONTENEDORES Y BORDES DEL INPUT */
-    div[data-testid="stNumberInput"] button { display: none !important; }
-    div[data-testid="stNumberInput"] > div,
-    div[data-testid="stNumberInput"] div[data-baseweb="input"],
-    div[data-testid="stNumberInput"] div[data-baseweb="base-input"],
-    input {
-        background-color: transparent !important;
-        border: none !important;
-        padding: 0px !important;
-        margin: 0px !important;
-        min-height: auto !important;
-        height: 22px !important;
-        box-shadow: none !important;
-        outline: none !important;
-        font-family: monospace !important;
-        font-size: 1rem !important;
-        text-align: left !important;
-    }
-
-    /* COLOR VERDE PARA LA COLUMNA L. FINAL */
-    .input-verde input {
-        color: #1a7f37 !important; 
-        font-weight: bold !important;
-    }
-
-    /* ALINEACIÓN DE COLUMNAS PARA QUE TODO ESTÉ EN UNA LÍNEA */
-    [data-testid="column"] {
-        display: flex !important;
-        align-items: center !important;
-        height: 24px !important; 
-        padding: 0px 5px !important;
-    }
-
-    [data-testid="stVerticalBlock"] { gap: 0px !important; }
-    
-    /* ESTILO DE TEXTO PLANO */
-    .txt-flat {
-        font-size: 0.9rem;
-        font-family: monospace;
-        margin: 0px !important;
-        line-height: 24px !important;
-    }
-    .txt-prod { color: #cc0000; font-weight: bold; }
-    .txt-soles { color: #28a745; font-weight: bold; }
-
-    /* CABECERA DE MÓDULOS CON DOBLE ESPACIO EXTRA */
-    .mod-header {
-        background-color: #f8f9fa;
-        border-bottom: 2px solid #333;
-        padding: 6px 12px;
-        font-size: 0.85rem;
-        margin-top: 55px; /* Los 2 espacios extra que pediste */
-        margin-bottom: 10px;
-        font-weight: bold;
-        color: #333;
-    }
-    
-    /* TOTAL POR MÓDULO */
-    .mod-footer {
-        border-top: 1px dashed #bbb;
-        margin-bottom: 20px;
-        padding-top: 5px;
-        text-align: right;
-        font-family: monospace;
-        font-weight: bold;
-    }
-    </style>
-""", unsafe_allow_html=True)
-
-# --- 3. CONFIGURACIÓN DE TIEMPO Y PRECIOS ---
-tz = pytz.timezone('America/Lima')
-ahora = datetime.now(tz)
-fecha_hoy = ahora.strftime("%d/%m/%Y")
-PRECIOS = {"DL": 14.0, "90": 14.0, "95": 15.0}
-
-# --- 4. INICIALIZACIÓN DE DATOS (RESPETANDO TU LÓGICA) ---
-if 'form_data' not in st.session_state:
-    st.session_state.form_data = [
-        {"id": f"D-{i:02d}", "producto": random.choice(["90", "95", "DL"]),
-         "inicio": random.randint(100000, 500000)} for i in range(1, 23)
-    ]
-    for item in st.session_state.form_data:
-        item["final"] = item["inicio"]
-
-if 'gastos' not in st.session_state: st.session_state.gastos = []
-if 'vales' not in st.session_state: st.session_state.vales = []
-
-# --- 5. ENCABEZADO Y WIDGETS ---
-st.subheader(f"V&T | REGISTRO DE VENTAS | {fecha_hoy}")
-
-# Widgets de precio arriba
-c_p1, c_p2, c_p3 = st.columns(3)
-c_p1.metric("PRECIO DL", f"S/ {PRECIOS['DL']:.2f}")
-c_p2.metric("PRECIO 90", f"S/ {PRECIOS['90']:.2f}")
-c_p3.metric("PRECIO 95", f"S/ {PRECIOS['95']:.2f}")
-
-# --- 6. PESTAÑAS (INCLUYENDO VALES) ---
-tab1, tab2, tab3, tab4 = st.tabs(["🛒 VENTAS", "💸 GASTOS", "🎫 VALES", "💰 SALDO"])
-
-with tab1:
-    def render_bloque(inicio_idx, fin_idx, nombre_modulo):
-        st.markdown(f'<div class="mod-header">{nombre_modulo}</div>', unsafe_allow_html=True)
-        
-        # Cabeceras
-        h = st.columns([0.2, 0.3, 0.6, 0.6, 0.4, 0.5])
-        h[0].caption("ID")
-        h[1].caption("PROD")
-        h[2].caption("L. INICIO")
-        h[3].caption("L. FINAL")
-        h[4].caption("GL")
-        h[5].caption("SOLES")
-
-        total_mod_soles = 0.0
-
-        for i in range(inicio_idx, fin_idx):
-            item = st.session_state.form_data[i]
-            cols = st.columns([0.2, 0.3, 0.6, 0.6, 0.4, 0.5])
-            
-            with cols[0]: st.markdown(f'<p class="txt-flat"><b>{item["id"]}</b></p>', unsafe_allow_html=True)
-            with cols[1]: st.markdown(f'<p class="txt-flat txt-prod">{item["producto"]}</p>', unsafe_allow_html=True)
-            # Inicio como entero puro
-            with cols[2]: st.markdown(f'<p class="txt-flat">{int(item["inicio"])}</p>', unsafe_allow_html=True)
-            
-            with cols[3]:
-                st.markdown('<div class="input-verde">', unsafe_allow_html=True)
-                nuevo_final = st.number_input(
-                    label=f"in_{i}", 
-                    value=int(item['final']), 
-                    step=1, 
-                    key=f"k_{i}", 
-                    label_visibility="collapsed"
-                )
-                st.markdown('</div>', unsafe_allow_html=True)
-            
-            item['final'] = nuevo_final
-            galones = item["final"] - item["inicio"]
-            subtotal = galones * PRECIOS[item["producto"]]
-            total_mod_soles += subtotal
-            
-            with cols[4]: st.markdown(f'<p class="txt-flat" style="color:blue">{galones:,.2f}</p>', unsafe_allow_html=True)
-            with cols[5]: st.markdown(f'<p class="txt-flat txt-soles">S/ {subtotal:,.2f}</p>', unsafe_allow_html=True)
-
-        st.markdown(f'<div class="mod-footer">SUBTOTAL {nombre_modulo}: S/ {total_mod_soles:,.2f}</div>', unsafe_allow_html=True)
-        return total_mod_soles
-
-    m1 = render_bloque(0, 8, "MÓDULO 1")
-    m2 = render_bloque(8, 16, "MÓDULO 2")
-    m3 = render_bloque(16, 22, "MÓDULO 3")
-    
-    venta_bruta_total = m1 + m2 + m3
-
-with tab2:
-    st.markdown("### Registro de Gastos")
-    with st.form("f_gastos", clear_on_submit=True):
-        c1, c2 = st.columns([3,1])
-        d = c1.text_input("Gasto / Concepto")
-        m = c2.number_input("Monto S/", min_value=0.0)
-        if st.form_submit_button("Añadir"):
-            if d: st.session_state.gastos.append({"D": d, "M": m}); st.rerun()
-    if st.session_state.gastos: st.table(st.session_state.gastos)
-
-with tab3:
-    st.markdown("### Registro de Vales")
-    with st.form("f_vales", clear_on_submit=True):
-        c1, c2 = st.columns([3,1])
-        cl = c1.text_input("Cliente / Placa")
-        v = c2.number_input("S/", min_value=0.0)
-        if st.form_submit_button("Añadir Vale"):
-            if cl: st.session_state.vales.append({"C": cl, "M": v}); st.rerun()
-    if st.session_state.vales: st.table(st.session_state.vales)
-
-with tab4:
-    total_g = sum(g["M"] for g in st.session_state.gastos)
-    total_v = sum(v["M"] for v in st.session_state.vales)
-    neto = venta_bruta_total - total_g - total_v
-    
-    st.markdown(f"""
-        <div style="border:2px solid #000; padding:25px; text-align:center; background-color:#fff;">
-            <h2 style="margin:0;">CIERRE DE CAJA</h2>
-            <hr>
-            <h4 style="margin:5px;">Venta Bruta: S/ {venta_bruta_total:,.2f}</h4>
-            <h4 style="margin:5px; color:red;">Total Gastos: S/ {total_g:,.2f}</h4>
-            <h4 style="margin:5px; color:orange;">Total Vales: S/ {total_v:,.2f}</h4>
-            <h1 style="color:green; font-size:3rem; margin:15px 0;">NETO: S/ {neto:,.2f}</h1>
-        </div>
-    """, unsafe_allow_html=True)
+import streamlit as st
+import pandas as pd
+import random
+from datetime import datetime
+import pytz
+
+from core.almacen import AlmacenVentas
+from core.anomalias import linea_base_caja, linea_base_turnos, revisar_caja, revisar_turno
+from core.bootstrap import obtener_db
+from core.contometros import lecturas_de_apertura, observaciones, ultimas_lecturas
+from core.cache_firestore import cache_compartido
+from core.escritor import escritor_compartido, nuevo_id
+from core.estaciones import obtener_estacion, selector_estacion
+from core.fragmentos import fragmento, marcar_cambio, refrescar
+from core.instrumentacion import con_cache, pagina, panel_instrumentacion, seccion
+from core.journal_turno import TurnoCerrado, journal_compartido
+from core.precios import PRECIOS_POR_DEFECTO
+from core.render import celdas_lectura, celdas_venta, inyectar_css, medir_envio, mostrar_mediciones, panel_cierre
+from core.turno import mutaciones_cierre
+from core.ventas import calcular_ventas, subtotales_por_modulo, tabla_lecturas
+
+# --- 1. CONFIGURACIÓN DE PÁGINA ---
+st.set_page_config(page_title="Sistema V&T", layout="wide")
+medir_envio("página ventas")
+pagina("ventas")
+
+# --- 2. CSS DE REINICIO Y ESTILOS (MEJORADO) ---
+CSS_VENTAS = """
+    /* ELIMINAR CONTENEDORES Y BORDES DEL INPUT */
+    div[data-testid="stNumberInput"] button { display: none !important; }
+    div[data-testid="stNumberInput"] > div,
+    div[data-testid="stNumberInput"] div[data-baseweb="input"],
+    div[data-testid="stNumberInput"] div[data-baseweb="base-input"],
+    input {
+        background-color: transparent !important;
+        border: none !important;
+        padding: 0px !important;
+        margin: 0px !important;
+        min-height: auto !important;
+        height: 22px !important;
+        box-shadow: none !important;
+        outline: none !important;
+        font-family: monospace !important;
+        font-size: 1rem !important;
+        text-align: left !important;
+    }
+
+    /* COLOR VERDE PARA LA COLUMNA L. FINAL (los number_input con key k_*) */
+    [class*="st-key-k_"] input {
+        color: #1a7f37 !important; 
+        font-weight: bold !important;
+    }
+
+    /* ALINEACIÓN DE COLUMNAS PARA QUE TODO ESTÉ EN UNA LÍNEA */
+    [data-testid="column"] {
+        display: flex !important;
+        align-items: center !important;
+        height: 24px !important; 
+        padding: 0px 5px !important;
+    }
+
+    [data-testid="stVerticalBlock"] { gap: 0px !important; }
+    
+    .txt-prod { color: #cc0000; font-weight: bold; }
+
+    /* UNA FILA DE CONTÓMETRO = UN SOLO BLOQUE HTML */
+    .fila-lectura {
+        display: flex;
+        font-size: 0.9rem;
+        font-family: monospace;
+        line-height: 24px;
+    }
+    .fila-lectura > * { flex: 1; }
+    .txt-soles { color: #28a745; font-weight: bold; }
+
+    /* CABECERA DE MÓDULOS CON DOBLE ESPACIO EXTRA */
+    .mod-header {
+        background-color: #f8f9fa;
+        border-bottom: 2px solid #333;
+        padding: 6px 12px;
+        font-size: 0.85rem;
+        margin-top: 55px; /* Los 2 espacios extra que pediste */
+        margin-bottom: 10px;
+        font-weight: bold;
+        color: #333;
+    }
+    
+    /* TOTAL POR MÓDULO */
+    .mod-footer {
+        border-top: 1px dashed #bbb;
+        margin-bottom: 20px;
+        padding-top: 5px;
+        text-align: right;
+        font-family: monospace;
+        font-weight: bold;
+    }
+"""
+# Un solo elemento de estilos, idéntico en cada rerun (core/render.py)
+inyectar_css(CSS_VENTAS)
+
+# --- 3. CONFIGURACIÓN DE TIEMPO, ESTACIÓN Y PRECIOS ---
+tz = pytz.timezone('America/Lima')
+# Contómetros, módulos y colecciones de Firestore salen de la estación (config/estaciones.toml)
+estacion = selector_estacion()
+
+def hora_local():
+    return datetime.now(tz)
+
+def precios_vigentes(momento):
+    """Precios de la estación vigentes en ``momento`` según el historial de Configuraciones
+    (valid_from); si Firebase no está disponible se usan los precios por defecto."""
+    with seccion("precios vigentes"):
+        try:
+            return cache_compartido(obtener_db()).resolutor_precios(estacion.coleccion("products")).actuales(momento)
+        except Exception:
+            return dict(PRECIOS_POR_DEFECTO)
+
+# Solo para el encabezado: los fragmentos y el cierre vuelven a pedir hora y
+# precios al ejecutarse (el índice de vigencias está en caché)
+ahora = hora_local()
+fecha_hoy = ahora.strftime("%d/%m/%Y")
+PRECIOS = precios_vigentes(ahora)
+
+# --- 4. INICIALIZACIÓN DE DATOS (RESPETANDO TU LÓGICA) ---
+# El turno vive en el diario local (core/journal_turno.py): cada cambio se guarda
+# como un delta, así una reconexión, un reinicio u otro dispositivo retoman el turno
+journal = journal_compartido()
+
+def lecturas_iniciales(estacion):
+    """L. INICIO del turno nuevo: la última L. FINAL de cada contómetro (core/contometros.py)."""
+    try:
+        # Una sola llamada a Firestore para todos los contómetros de la estación
+        remotas = ultimas_lecturas(obtener_db(), estacion)
+    except Exception:
+        remotas = {}
+    lecturas = lecturas_de_apertura(estacion, remotas, journal.ultimo_cierre(estacion.id))
+    if lecturas is not None:
+        return lecturas
+    # Primer turno de la estación: no hay lecturas previas
+    lecturas = [{"id": id_bomba, "producto": random.choice(["90", "95", "DL"]),
+                 "inicio": random.randint(100000, 500000)} for id_bomba in estacion.ids_bombas()]
+    for item in lecturas:
+        item["final"] = item["inicio"]
+    return lecturas
+
+def limpiar_widgets_lecturas(indices=None):
+    """Descarta el estado de los widgets de lecturas para que muestren ``form_data``."""
+    claves = [f"k_{i}" for i in indices] if indices is not None else [k for k in st.session_state if str(k).startswith("k_")]
+    for clave in [*claves, "grid_ventas"]:
+        st.session_state.pop(clave, None)
+
+def usar_turno(estado):
+    st.session_state.turno = estado
+    st.session_state.form_data = estado.form_data
+    st.session_state.gastos = estado.gastos
+    st.session_state.vales = estado.vales
+    # ID fijo por turno: registrar el cierre dos veces sobrescribe, no duplica
+    st.session_state.cierre_id = estado.id
+    limpiar_widgets_lecturas()
+    for clave in ("_msg_cierre", "_html_cierre", "_avisos_caja"):
+        st.session_state.pop(clave, None)
+
+def cargar_turno(estacion):
+    """Retoma el turno abierto de la estación o abre uno nuevo."""
+    turno_id = journal.turno_abierto(estacion.id) or journal.abrir(
+        estacion.id, f"{hora_local():%Y%m%d}-{nuevo_id()}", lecturas_iniciales(estacion))
+    usar_turno(journal.estado(turno_id))
+    st.session_state.turno_estacion = estacion.id
+
+def aplicar_cambios(cambiadas, n_gastos, n_vales):
+    """Refleja en la página los deltas de otros dispositivos ya aplicados al turno."""
+    if cambiadas is None:
+        usar_turno(st.session_state.turno)
+        cambiadas = range(len(st.session_state.form_data))
+    elif cambiadas:
+        limpiar_widgets_lecturas(cambiadas)
+    if len(st.session_state.gastos) != n_gastos: marcar_cambio("gastos")
+    if len(st.session_state.vales) != n_vales: marcar_cambio("vales")
+
+def registrar_delta(tipo, datos=None):
+    """Guarda un cambio en el diario (``tipo=None``: solo trae los cambios ajenos)."""
+    estado = st.session_state.turno
+    n_gastos, n_vales = len(estado.gastos), len(estado.vales)
+    if tipo is None:
+        cambiadas = journal.sincronizar(estado)
+    else:
+        try:
+            cambiadas = journal.registrar(estado, tipo, datos)
+        except TurnoCerrado:
+            # Otro dispositivo cerró el turno: el cambio no se guarda y toda la
+            # página pasa a solo lectura (se llama desde callbacks)
+            usar_turno(estado)
+            st.rerun()
+    aplicar_cambios(cambiadas, n_gastos, n_vales)
+
+if st.session_state.get('turno_estacion') != estacion.id:
+    with seccion("abrir o retomar turno"):
+        cargar_turno(estacion)
+else:
+    with seccion("sincronizar turno"):
+        registrar_delta(None)
+
+# Líneas base para revisar el turno sin releer la historia (core/anomalias.py):
+# galones por bomba de los turnos cerrados antes del actual y proporción de
+# gastos / vales de la caja diaria de Reportes
+@con_cache("ventas: línea base de turnos", st.cache_resource(max_entries=64))
+def linea_base_bombas(estacion_id, turno_id):
+    # ``turno_id`` solo forma parte de la clave: la base cambia cuando se abre otro turno
+    return linea_base_turnos(journal.cierres(estacion_id), obtener_estacion(estacion_id).ids_bombas())
+
+@con_cache("ventas: línea base de caja", st.cache_resource(ttl=3600))
+def linea_base_caja_estacion(estacion_id):
+    try:
+        return linea_base_caja(AlmacenVentas.para_estacion(estacion_id).leer("diario"))
+    except FileNotFoundError:
+        # Reportes aún no llenó el almacén de la estación
+        return None
+
+# --- 5. ENCABEZADO Y WIDGETS ---
+st.subheader(f"{estacion.nombre} | REGISTRO DE VENTAS | {fecha_hoy}")
+
+# Widgets de precio arriba
+c_p1, c_p2, c_p3 = st.columns(3)
+c_p1.metric("PRECIO DL", f"S/ {PRECIOS['DL']:.2f}")
+c_p2.metric("PRECIO 90", f"S/ {PRECIOS['90']:.2f}")
+c_p3.metric("PRECIO 95", f"S/ {PRECIOS['95']:.2f}")
+
+# Turno cerrado: lecturas, gastos y vales quedan en solo lectura
+if st.session_state.turno.cerrado:
+    st.info("🔒 Turno cerrado: ya no admite cambios. Abre el turno siguiente desde la pestaña SALDO.")
+
+# --- 6. PESTAÑAS (INCLUYENDO VALES) ---
+tab1, tab2, tab3, tab4 = st.tabs(["🛒 VENTAS", "💸 GASTOS", "🎫 VALES", "💰 SALDO"])
+
+with tab1:
+    def cambiar_final(i):
+        registrar_delta("final", {"i": i, "v": int(st.session_state[f"k_{i}"])})
+        refrescar("ventas")
+
+    def render_bloque(inicio_idx, fin_idx, nombre_modulo, precios):
+        st.markdown(f'<div class="mod-header">{nombre_modulo}</div>', unsafe_allow_html=True)
+        
+        # Cabeceras (misma grilla que las filas: datos fijos | L. FINAL | resultado)
+        h = st.columns([1.1, 0.6, 0.9])
+        h[0].markdown('<div class="fila-lectura"><small>ID</small><small>PROD</small><small>L. INICIO</small></div>', unsafe_allow_html=True)
+        h[1].caption("L. FINAL")
+        h[2].markdown('<div class="fila-lectura"><small>GL</small><small>SOLES</small></div>', unsafe_allow_html=True)
+
+        total_mod_soles = 0.0
+
+        for i in range(inicio_idx, fin_idx):
+            item = st.session_state.form_data[i]
+            cols = st.columns([1.1, 0.6, 0.9])
+            
+            # ID, producto e inicio en un solo bloque HTML, memorizado por sus valores
+            with cols[0]: st.markdown(celdas_lectura(item["id"], item["producto"], item["inicio"]), unsafe_allow_html=True)
+            
+            with cols[1]:
+                st.number_input(
+                    label=f"in_{i}", 
+                    value=int(item['final']), 
+                    step=1, 
+                    key=f"k_{i}", 
+                    on_change=cambiar_final,
+                    args=(i,),
+                    disabled=st.session_state.turno.cerrado,
+                    label_visibility="collapsed"
+                )
+            
+            galones = item["final"] - item["inicio"]
+            subtotal = galones * precios[item["producto"]]
+            total_mod_soles += subtotal
+            
+            with cols[2]: st.markdown(celdas_venta(float(galones), float(subtotal)), unsafe_allow_html=True)
+
+        st.markdown(f'<div class="mod-footer">SUBTOTAL {nombre_modulo}: S/ {total_mod_soles:,.2f}</div>', unsafe_allow_html=True)
+        return total_mod_soles
+
+    def render_grid(precios):
+        """Modo cuadrícula: un solo st.data_editor para los contómetros de la estación."""
+        def aplicar_ediciones():
+            for fila, campos in st.session_state["grid_ventas"]["edited_rows"].items():
+                if "final" in campos and campos["final"] is not None:
+                    i, valor = int(fila), int(campos["final"])
+                    if st.session_state.form_data[i]["final"] != valor:
+                        registrar_delta("final", {"i": i, "v": valor})
+            refrescar("ventas")
+
+        df_ventas = calcular_ventas(tabla_lecturas(st.session_state.form_data, estacion.modulos), precios)
+        st.data_editor(
+            df_ventas,
+            key="grid_ventas",
+            on_change=aplicar_ediciones,
+            hide_index=True,
+            use_container_width=True,
+            disabled=st.session_state.turno.cerrado or ["id", "modulo", "producto", "inicio", "galones", "soles"],
+            column_config={
+                "id": "ID",
+                "modulo": "MÓDULO",
+                "producto": "PROD",
+                "inicio": st.column_config.NumberColumn("L. INICIO", format="%d"),
+                "final": st.column_config.NumberColumn("L. FINAL", step=1, format="%d", required=True),
+                "galones": st.column_config.NumberColumn("GL", format="%.2f"),
+                "soles": st.column_config.NumberColumn("SOLES", format="S/ %.2f"),
+            },
+        )
+        subtotales = subtotales_por_modulo(df_ventas)
+        resumen = " | ".join(f"{mod}: S/ {total:,.2f}" for mod, total in subtotales.items())
+        st.markdown(f'<div class="mod-footer">{resumen}</div>', unsafe_allow_html=True)
+        return float(subtotales.sum())
+
+    # Cada pestaña es un fragmento: editar una lectura, un gasto o un vale solo
+    # vuelve a ejecutar su fragmento y SALDO (refrescar), que depende de los tres
+    # y recalcula solo si cambiaron.
+    @fragmento("ventas")
+    def fragmento_ventas():
+        precios = precios_vigentes(hora_local())
+        # El modo cuadrícula evita los ~150 elementos del modo clásico (más liviano en tablets)
+        if st.toggle("Modo cuadrícula", value=True, key="modo_grid"):
+            total = render_grid(precios)
+        else:
+            total = sum(render_bloque(ini, fin, nombre, precios) for nombre, ini, fin in estacion.modulos)
+        if st.session_state.get("venta_bruta_total") != total:
+            st.session_state.venta_bruta_total = total
+            marcar_cambio("ventas")
+        # Retrocesos y saltos imposibles, revisados en una pasada vectorizada
+        obs = observaciones(st.session_state.form_data, estacion.max_galones_turno)
+        # Galones atípicos frente a los turnos anteriores de cada contómetro
+        obs += revisar_turno(st.session_state.form_data, linea_base_bombas(estacion.id, st.session_state.cierre_id))
+        st.session_state._observaciones = obs
+        if obs:
+            st.warning("⚠️ Lecturas para revisar:\n\n" + "\n".join(f"- {m}" for m in obs))
+
+    fragmento_ventas()
+
+with tab2:
+    def anadir_gasto():
+        d, m = st.session_state.gasto_concepto, st.session_state.gasto_monto
+        if d:
+            registrar_delta("gasto", {"D": d, "M": m})
+            refrescar("gastos")
+
+    @fragmento("gastos")
+    def fragmento_gastos():
+        st.markdown("### Registro de Gastos")
+        with st.form("f_gastos", clear_on_submit=True):
+            c1, c2 = st.columns([3,1])
+            cerrado = st.session_state.turno.cerrado
+            c1.text_input("Gasto / Concepto", key="gasto_concepto", disabled=cerrado)
+            c2.number_input("Monto S/", min_value=0.0, key="gasto_monto", disabled=cerrado)
+            st.form_submit_button("Añadir", on_click=anadir_gasto, disabled=cerrado)
+        if st.session_state.gastos: st.table(st.session_state.gastos)
+
+    fragmento_gastos()
+
+with tab3:
+    def anadir_vale():
+        cl, v = st.session_state.vale_cliente, st.session_state.vale_monto
+        if cl:
+            registrar_delta("vale", {"C": cl, "M": v})
+            refrescar("vales")
+
+    @fragmento("vales")
+    def fragmento_vales():
+        st.markdown("### Registro de Vales")
+        with st.form("f_vales", clear_on_submit=True):
+            c1, c2 = st.columns([3,1])
+            cerrado = st.session_state.turno.cerrado
+            c1.text_input("Cliente / Placa", key="vale_cliente", disabled=cerrado)
+            c2.number_input("S/", min_value=0.0, key="vale_monto", disabled=cerrado)
+            st.form_submit_button("Añadir Vale", on_click=anadir_vale, disabled=cerrado)
+        if st.session_state.vales: st.table(st.session_state.vales)
+
+    fragmento_vales()
+
+with tab4:
+    def registrar_cierre():
+        # Hora y precios del momento del cierre, no los del último rerun completo
+        momento = hora_local()
+        try:
+            escritor = escritor_compartido(obtener_db())
+            escritor.encolar(mutaciones_cierre(
+                st.session_state.cierre_id, momento, st.session_state.form_data,
+                st.session_state.gastos, st.session_state.vales, precios_vigentes(momento), estacion=estacion,
+            ))
+            # El diario compacta los deltas del turno en su foto final
+            usar_turno(journal.cerrar(st.session_state.cierre_id))
+            st.session_state._msg_cierre = ("ok", f"✅ Cierre {st.session_state.cierre_id} registrado. Se sincronizará en segundo plano.")
+        except Exception as e:
+            st.session_state._msg_cierre = ("error", f"❌ No se pudo registrar el cierre: {e}")
+            return
+        # Rerun de toda la página: las otras pestañas pasan a solo lectura
+        st.rerun()
+
+    @fragmento("saldo", depende_de=("ventas", "gastos", "vales"))
+    def fragmento_saldo(recalcular):
+        if recalcular or "_html_cierre" not in st.session_state:
+            venta_bruta_total = st.session_state.venta_bruta_total
+            total_g = sum(g["M"] for g in st.session_state.gastos)
+            total_v = sum(v["M"] for v in st.session_state.vales)
+
+            st.session_state._html_cierre = panel_cierre(venta_bruta_total, total_g, total_v)
+            st.session_state._avisos_caja = revisar_caja(venta_bruta_total, total_g, total_v,
+                                                         linea_base_caja_estacion(estacion.id))
+        st.markdown(st.session_state._html_cierre, unsafe_allow_html=True)
+        if st.session_state.get("_avisos_caja"):
+            st.warning("⚠️ Caja fuera de lo normal:\n\n" + "\n".join(f"- {m}" for m in st.session_state._avisos_caja))
+
+        # Registro del cierre: se encola y se envía a Firestore en segundo plano
+        obs = st.session_state.get("_observaciones", [])
+        confirmado = not obs or st.checkbox(f"Confirmo las {len(obs)} lecturas observadas en VENTAS")
+        st.button("💾 REGISTRAR CIERRE DE TURNO", disabled=not confirmado or st.session_state.turno.cerrado,
+                  on_click=registrar_cierre)
+        # El mensaje se guarda para que no desaparezca en el siguiente rerun del fragmento
+        if "_msg_cierre" in st.session_state:
+            tipo, texto = st.session_state._msg_cierre
+            (st.success if tipo == "ok" else st.error)(texto)
+        # Turno cerrado: el siguiente empieza con sus L. FINAL como L. INICIO
+        if st.session_state.turno.cerrado and st.button("🆕 ABRIR TURNO SIGUIENTE"):
+            cargar_turno(estacion)
+            st.rerun()
+
+    fragmento_saldo()
+
+mostrar_mediciones()
+panel_instrumentacion()